@@ -0,0 +1,39 @@
+"""Brojač rezervisanih mesta
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-01-01
+
+Četvrta migracija - dodaje izlozbe.rezervisano i popunjava ga iz prijava
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'izlozbe',
+        sa.Column('rezervisano', sa.Integer(), nullable=False, server_default='0')
+    )
+    
+    # Popunjavanje brojača iz postojećih prijava
+    op.execute("""
+        UPDATE izlozbe i
+        SET rezervisano = p.ukupno
+        FROM (
+            SELECT id_izlozba, SUM(broj_karata) AS ukupno
+            FROM prijave
+            GROUP BY id_izlozba
+        ) p
+        WHERE p.id_izlozba = i.id_izlozba
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('izlozbe', 'rezervisano')
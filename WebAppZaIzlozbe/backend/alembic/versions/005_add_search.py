@@ -0,0 +1,76 @@
+"""Full-text i trigram pretraga
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-01-01
+
+Peta migracija - generisana kolona izlozbe.search_vector sa GIN indeksom
+(unaccent + preslovljavanje ćirilice) i trigram indeks za filter po gradu
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FOLD_FUNCTION = """
+CREATE OR REPLACE FUNCTION izlozbe_fold(tekst text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT public.unaccent(
+        'public.unaccent'::regdictionary,
+        translate(
+            replace(replace(replace(replace(replace(
+                lower(coalesce(tekst, '')),
+                'љ', 'lj'), 'њ', 'nj'), 'џ', 'dz'), 'ђ', 'dj'), 'đ', 'dj'),
+            'абвгдежзијклмнопрстћуфхцчш',
+            'abvgdezzijklmnoprstcufhccs'
+        )
+    )
+$$
+"""
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, izlozbe_fold(naslov)), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, izlozbe_fold(kratak_opis)), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, izlozbe_fold(opis)), 'C')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(FOLD_FUNCTION)
+    
+    # Generisana kolona se popunjava za postojeće redove pri dodavanju
+    op.add_column(
+        'izlozbe',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True
+        )
+    )
+    op.create_index(
+        'ix_izlozbe_search_vector', 'izlozbe', ['search_vector'],
+        postgresql_using='gin'
+    )
+    
+    # Trigram indeks za ILIKE '%grad%' (lista izložbi i lista lokacija)
+    op.create_index(
+        'ix_lokacije_grad_trgm', 'lokacije', ['grad'],
+        postgresql_using='gin',
+        postgresql_ops={'grad': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_lokacije_grad_trgm', 'lokacije')
+    op.drop_index('ix_izlozbe_search_vector', 'izlozbe')
+    op.drop_column('izlozbe', 'search_vector')
+    op.execute("DROP FUNCTION IF EXISTS izlozbe_fold(text)")
@@ -0,0 +1,83 @@
+"""Indeksi prema stvarnim upitima
+
+Revision ID: 006
+Revises: 005
+Create Date: 2024-01-01
+
+Šesta migracija - kompozitni, parcijalni i covering indeksi za javnu listu
+izložbi, prijave korisnika i listu slika. Kreiraju se CONCURRENTLY, pa
+migracija ne zaključava tabele u produkciji.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY ne može u transakciji
+    with op.get_context().autocommit_block():
+        # Javna lista: WHERE objavljeno ORDER BY datum_pocetka DESC, id DESC.
+        # INCLUDE (aktivan) omogućava index-only scan za stranu id-jeva.
+        op.create_index(
+            'ix_izlozbe_objavljeno_datum', 'izlozbe',
+            [sa.text('datum_pocetka DESC'), sa.text('id_izlozba DESC')],
+            postgresql_where=sa.text('objavljeno'),
+            postgresql_include=['aktivan'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        
+        # /api/prijave/moje: WHERE id_korisnik ORDER BY datum_registracije DESC
+        op.create_index(
+            'ix_prijave_korisnik_datum', 'prijave',
+            ['id_korisnik', sa.text('datum_registracije DESC'), sa.text('id_prijava DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        
+        # Admin lista prijava, sa i bez filtera po izložbi
+        op.create_index(
+            'ix_prijave_izlozba_datum', 'prijave',
+            ['id_izlozba', sa.text('datum_registracije DESC'), sa.text('id_prijava DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_prijave_datum', 'prijave',
+            [sa.text('datum_registracije DESC'), sa.text('id_prijava DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        
+        # /api/slike/: ORDER BY redosled, id (istaknute kao parcijalni indeks)
+        op.create_index(
+            'ix_slike_istaknuta_redosled', 'slike',
+            ['redosled', 'id_slika'],
+            postgresql_where=sa.text('istaknuta'),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_slike_redosled', 'slike',
+            ['redosled', 'id_slika'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in [
+            ('ix_slike_redosled', 'slike'),
+            ('ix_slike_istaknuta_redosled', 'slike'),
+            ('ix_prijave_datum', 'prijave'),
+            ('ix_prijave_izlozba_datum', 'prijave'),
+            ('ix_prijave_korisnik_datum', 'prijave'),
+            ('ix_izlozbe_objavljeno_datum', 'izlozbe'),
+        ]:
+            op.drop_index(name, table, postgresql_concurrently=True, if_exists=True)
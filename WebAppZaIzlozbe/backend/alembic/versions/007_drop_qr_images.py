@@ -0,0 +1,26 @@
+"""Brisanje sačuvanih QR slika
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-01-01
+
+Sedma migracija - QR slike se crtaju na zahtev iz qr_kod,
+pa se base64 slike iz prijave.slika_qr brišu
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE prijave SET slika_qr = NULL WHERE slika_qr IS NOT NULL")
+
+
+def downgrade() -> None:
+    # Slike se ne vraćaju - GET /api/prijave/{id}/qr.png ih crta iz qr_kod
+    pass
@@ -0,0 +1,36 @@
+"""Indeks za validaciju karata
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-01-01
+
+Osma migracija - jedinstveni indeks na prijave.qr_kod za
+POST /api/prijave/validate
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_prijave_qr_kod', 'prijave', ['qr_kod'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_prijave_qr_kod', table_name='prijave',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
@@ -0,0 +1,50 @@
+"""Email outbox
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-01-01
+
+Deveta migracija - tabela email_outbox; email sa kartom se upisuje
+u transakciji prijave, a šalje ga pozadinski worker
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('id_email', sa.Integer(), primary_key=True),
+        sa.Column(
+            'id_prijava', sa.Integer(),
+            sa.ForeignKey('prijave.id_prijava', ondelete='CASCADE'),
+            nullable=True
+        ),
+        sa.Column('primalac', sa.String(255), nullable=False),
+        sa.Column('naslov', sa.String(255), nullable=False),
+        sa.Column('sadrzaj', sa.Text(), nullable=False),
+        sa.Column('qr_kod', sa.String(500), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='na_cekanju'),
+        sa.Column('pokusaja', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sledeci_pokusaj', sa.DateTime(), nullable=False),
+        sa.Column('poslednja_greska', sa.Text(), nullable=True),
+        sa.Column('datum_kreiranja', sa.DateTime(), nullable=False),
+        sa.Column('datum_slanja', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_email_outbox_id_prijava', 'email_outbox', ['id_prijava'])
+    op.create_index(
+        'ix_email_outbox_na_cekanju', 'email_outbox', ['sledeci_pokusaj'],
+        postgresql_where=sa.text("status = 'na_cekanju'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_na_cekanju', table_name='email_outbox')
+    op.drop_index('ix_email_outbox_id_prijava', table_name='email_outbox')
+    op.drop_table('email_outbox')
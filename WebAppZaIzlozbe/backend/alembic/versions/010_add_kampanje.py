@@ -0,0 +1,45 @@
+"""Kampanje
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-01-01
+
+Deseta migracija - tabela kampanje (obaveštenja o izmenama izložbe
+i podsetnici) sa checkpoint-om za nastavak posle prekida
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'kampanje',
+        sa.Column('id_kampanja', sa.Integer(), primary_key=True),
+        sa.Column(
+            'id_izlozba', sa.Integer(),
+            sa.ForeignKey('izlozbe.id_izlozba', ondelete='CASCADE'),
+            nullable=False
+        ),
+        sa.Column('vrsta', sa.String(20), nullable=False),
+        sa.Column('kljuc', sa.String(100), nullable=True, unique=True),
+        sa.Column('poruka', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='na_cekanju'),
+        sa.Column('poslednja_prijava', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('poslato', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('neuspelo', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('zakljucano_do', sa.DateTime(), nullable=True),
+        sa.Column('datum_kreiranja', sa.DateTime(), nullable=False),
+        sa.Column('datum_zavrsetka', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_kampanje_id_izlozba', 'kampanje', ['id_izlozba'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_kampanje_id_izlozba', table_name='kampanje')
+    op.drop_table('kampanje')
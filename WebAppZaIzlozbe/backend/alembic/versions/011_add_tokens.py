@@ -0,0 +1,54 @@
+"""Refresh tokeni i opozvani tokeni
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-01-01
+
+Jedanaesta migracija - tabela refresh_tokeni (rotacija) i lista
+opozvanih access tokena
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'refresh_tokeni',
+        sa.Column('id_token', sa.Integer(), primary_key=True),
+        sa.Column(
+            'id_korisnik', sa.Integer(),
+            sa.ForeignKey('korisnici.id_korisnik', ondelete='CASCADE'),
+            nullable=False
+        ),
+        sa.Column('token_hash', sa.String(64), nullable=False, unique=True),
+        sa.Column('porodica', sa.String(32), nullable=False),
+        sa.Column('istice', sa.DateTime(), nullable=False),
+        sa.Column('datum_kreiranja', sa.DateTime(), nullable=False),
+        sa.Column('datum_opoziva', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_refresh_tokeni_id_korisnik', 'refresh_tokeni', ['id_korisnik'])
+    op.create_index('ix_refresh_tokeni_porodica', 'refresh_tokeni', ['porodica'])
+
+    op.create_table(
+        'opozvani_tokeni',
+        sa.Column('id_opoziv', sa.Integer(), primary_key=True),
+        sa.Column('jti', sa.String(32), nullable=True, unique=True),
+        sa.Column('id_korisnik', sa.Integer(), nullable=True),
+        sa.Column('datum_opoziva', sa.DateTime(), nullable=False),
+        sa.Column('istice', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_opozvani_tokeni_istice', 'opozvani_tokeni', ['istice'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_opozvani_tokeni_istice', table_name='opozvani_tokeni')
+    op.drop_table('opozvani_tokeni')
+    op.drop_index('ix_refresh_tokeni_porodica', table_name='refresh_tokeni')
+    op.drop_index('ix_refresh_tokeni_id_korisnik', table_name='refresh_tokeni')
+    op.drop_table('refresh_tokeni')
@@ -0,0 +1,31 @@
+"""Brojači rate limiter-a
+
+Revision ID: 012
+Revises: 011
+Create Date: 2024-01-01
+
+Dvanaesta migracija - UNLOGGED tabela sa brojačima zahteva za
+deljeni rate limiter (prijava i registracija)
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limit_brojaci',
+        sa.Column('kljuc', sa.String(200), primary_key=True),
+        sa.Column('prozor', sa.BigInteger(), primary_key=True),
+        sa.Column('broj', sa.Integer(), nullable=False),
+        prefixes=['UNLOGGED'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_brojaci')
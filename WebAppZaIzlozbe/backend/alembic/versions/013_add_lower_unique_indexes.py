@@ -0,0 +1,49 @@
+"""Jedinstvenost korisničkog imena i emaila bez obzira na velika/mala slova
+
+Revision ID: 013
+Revises: 012
+Create Date: 2024-01-01
+
+Trinaesta migracija - funkcionalni jedinstveni indeksi na lower(username)
+i lower(email). Registracija se oslanja na njih umesto na ILIKE provere.
+Ako u bazi već postoje duplikati koji se razlikuju samo po velikim/malim
+slovima, pravljenje indeksa ne uspeva i duplikate treba prvo razrešiti.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_korisnici_username_lower', 'korisnici', [sa.text('lower(username)')],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        op.create_index(
+            'ix_korisnici_email_lower', 'korisnici', [sa.text('lower(email)')],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_korisnici_email_lower', table_name='korisnici',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
+        op.drop_index(
+            'ix_korisnici_username_lower', table_name='korisnici',
+            postgresql_concurrently=True,
+            if_exists=True
+        )
@@ -0,0 +1,32 @@
+"""Zakup poruka u email outbox-u
+
+Revision ID: 014
+Revises: 013
+Create Date: 2024-01-01
+
+Četrnaesta migracija - kolona zakljucano_do u email_outbox; worker zauzima
+seriju poruka kratkom transakcijom i šalje ih van transakcije
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('email_outbox', sa.Column('zakljucano_do', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_email_outbox_u_slanju', 'email_outbox', ['zakljucano_do'],
+        postgresql_where=sa.text("status = 'u_slanju'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_u_slanju', table_name='email_outbox')
+    # Zauzete poruke se vraćaju u red
+    op.execute("UPDATE email_outbox SET status = 'na_cekanju' WHERE status = 'u_slanju'")
+    op.drop_column('email_outbox', 'zakljucano_do')
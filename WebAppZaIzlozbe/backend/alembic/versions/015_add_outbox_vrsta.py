@@ -0,0 +1,30 @@
+"""Vrsta poruke u email outbox-u
+
+Revision ID: 015
+Revises: 014
+Create Date: 2024-01-01
+
+Petnaesta migracija - kolona vrsta (karta / kampanja) u email_outbox.
+Samo poslata karta označava prijavu kao email_poslat; neuspele poruke
+kampanja koje su zapamćene ranije nemaju QR kod, po tome se prepoznaju.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'email_outbox',
+        sa.Column('vrsta', sa.String(20), nullable=False, server_default='karta')
+    )
+    op.execute("UPDATE email_outbox SET vrsta = 'kampanja' WHERE qr_kod IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('email_outbox', 'vrsta')
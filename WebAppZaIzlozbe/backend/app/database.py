@@ -2,32 +2,102 @@
 Konfiguracija baze podataka
 SQLAlchemy engine i sesija
 """
+from fastapi import Request, Response
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import (
+    AsyncAttrs, AsyncSession, async_sessionmaker, create_async_engine
+)
+from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.config import settings
 
-# Kreiranje database engine-a
+
+def to_async_url(url: str) -> str:
+    """Pretvara postgresql:// URL u asyncpg varijantu"""
+    for prefix in ("postgresql+psycopg2://", "postgresql+psycopg://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# Asinhroni engine koji koriste API rute
+async_engine = create_async_engine(
+    to_async_url(settings.DATABASE_URL),
+    pool_pre_ping=True,  # Provera konekcije pre korišćenja
+    pool_size=5,
+    max_overflow=10
+)
+
+# Asinhrona sesija - objekti ostaju čitljivi posle commit-a
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Opciona replika za čitanje sa sopstvenim pool-om
+read_engine = create_async_engine(
+    to_async_url(settings.READ_DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10
+) if settings.READ_DATABASE_URL else None
+
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+) if read_engine is not None else AsyncSessionLocal
+
+# Cookie kojim se klijent posle upisa vezuje za primarnu bazu (read-your-writes)
+PRIMARY_PIN_COOKIE = "primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Ključ u request.state - odgovor je pročitan sa replike (keš odgovora ga proverava)
+READ_REPLICA_STATE = "sa_replike"
+
+# Sinhroni engine za skripte (seed_data.py) i Alembic
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  # Provera konekcije pre korišćenja
+    pool_pre_ping=True,
     pool_size=5,
     max_overflow=10
 )
 
-# Kreiranje sesije
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
 # Bazna klasa za modele
-Base = declarative_base()
+class Base(AsyncAttrs, DeclarativeBase):
+    pass
 
 
-def get_db():
+async def get_db(request: Request, response: Response):
     """
-    Dependency za dobijanje database sesije.
+    Dependency za dobijanje asinhrone database sesije (primarna baza).
     Koristi se u FastAPI endpointima.
     """
-    db = SessionLocal()
-    try:
+    if read_engine is not None and request.method not in SAFE_METHODS:
+        # Posle upisa klijent neko vreme čita sa primarne baze
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE, "1",
+            max_age=settings.READ_REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite="lax"
+        )
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """
+    Dependency za javne rute koje samo čitaju.
+    Koristi repliku ako je podešena, osim za klijente koji su upravo nešto upisali.
+    """
+    if read_engine is None or request.cookies.get(PRIMARY_PIN_COOKIE):
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = ReadSessionLocal
+        setattr(request.state, READ_REPLICA_STATE, True)
+    async with session_factory() as db:
         yield db
-    finally:
-        db.close()
@@ -8,8 +8,19 @@ from contextlib import asynccontextmanager
 import logging
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import async_engine, read_engine, Base
 from app.routers import auth, korisnici, lokacije, izlozbe, slike, prijave
+from app.services.qr_service import start_qr_pool, stop_qr_pool, qr_pool_stats
+from app.services.outbox_service import start_outbox_worker, stop_outbox_worker
+from app.services.kampanja_service import start_kampanja_worker, stop_kampanja_worker
+from app.services.smtp_pool import close_smtp_pool
+from app.services.artic_cache import start_artic_cache, stop_artic_cache, artic_cache_stats
+from app.services.artic_service import start_artic_client, stop_artic_client, artic_client_stats
+from app.services.token_service import start_opozivi_sync, stop_opozivi_sync, opozivi_stats
+from app.services.invalidacija_service import start_invalidacija, stop_invalidacija, invalidacija_stats
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.response_cache import ResponseCacheMiddleware, response_cache_stats
+from app.utils.security import start_hash_pool, stop_hash_pool, hash_pool_stats
 from fastapi.staticfiles import StaticFiles
 import os
 
@@ -32,13 +43,37 @@ async def lifespan(app: FastAPI):
     
     # Kreiranje tabela (za development)
     # U produkciji koristiti Alembic migracije
-    Base.metadata.create_all(bind=engine)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     logger.info("Baza podataka inicijalizovana")
     
+    await start_opozivi_sync()
+    start_invalidacija()
+    start_hash_pool()
+    start_qr_pool()
+    start_artic_cache()
+    start_artic_client()
+    if settings.EMAIL_OUTBOX_WORKER:
+        start_outbox_worker()
+    if settings.KAMPANJE_WORKER:
+        start_kampanja_worker()
+    
     yield
     
     # Shutdown
     logger.info("Gašenje aplikacije...")
+    await stop_kampanja_worker()
+    await stop_outbox_worker()
+    await close_smtp_pool()
+    await stop_artic_cache()
+    await stop_artic_client()
+    stop_qr_pool()
+    stop_hash_pool()
+    await stop_invalidacija()
+    await stop_opozivi_sync()
+    await async_engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
 
 
 # Kreiranje FastAPI instance
@@ -53,6 +88,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Keš javnih odgovora - unutar CORS-a, da i keširani odgovori dobiju CORS zaglavlja
+app.add_middleware(ResponseCacheMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -60,6 +98,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Registracija ruta
@@ -93,4 +132,13 @@ async def health_check():
     """
     Health check endpoint za monitoring.
     """
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "qr_pool": qr_pool_stats(),
+        "hash_pool": hash_pool_stats(),
+        "opozvani_tokeni": opozivi_stats(),
+        "kes_odgovora": response_cache_stats(),
+        "invalidacija": invalidacija_stats(),
+        "artic_kes": artic_cache_stats(),
+        "artic_api": artic_client_stats(),
+    }
@@ -6,5 +6,11 @@ from app.models.lokacija import Lokacija
 from app.models.slika import Slika
 from app.models.izlozba import Izlozba
 from app.models.prijava import Prijava
+from app.models.email_outbox import EmailOutbox
+from app.models.kampanja import Kampanja
+from app.models.refresh_token import RefreshToken
+from app.models.opozvan_token import OpozvanToken
+from app.models.rate_limit import RateLimitBrojac
 
-__all__ = ["Korisnik", "Lokacija", "Slika", "Izlozba", "Prijava"]
+__all__ = ["Korisnik", "Lokacija", "Slika", "Izlozba", "Prijava", "EmailOutbox", "Kampanja",
+           "RefreshToken", "OpozvanToken", "RateLimitBrojac"]
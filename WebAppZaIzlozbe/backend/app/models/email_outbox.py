@@ -0,0 +1,76 @@
+"""
+Model EmailOutbox
+Red poruka za slanje - upisuje se u istoj transakciji kao i prijava,
+a šalje ga pozadinski worker (app/services/outbox_service.py)
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+# Vrste poruka - samo poslata karta menja email_poslat na prijavi
+KARTA = "karta"
+KAMPANJA = "kampanja"
+
+# Statusi poruke
+NA_CEKANJU = "na_cekanju"
+U_SLANJU = "u_slanju"  # zauzeta od strane worker-a do zakljucano_do
+POSLATO = "poslato"
+NEUSPELO = "neuspelo"  # dead letter - iscrpljeni pokušaji
+OTKAZANO = "otkazano"  # karta je ponovo izdata, stari QR ne važi
+
+
+class EmailOutbox(Base):
+    """
+    Model poruke u redu za slanje.
+    
+    Atributi:
+        - id_email: Primarni ključ
+        - id_prijava: FK ka prijavi (poruka se briše sa prijavom)
+        - vrsta: karta / kampanja
+        - primalac: Email adresa
+        - naslov: Naslov poruke
+        - sadrzaj: Gotov HTML poruke
+        - qr_kod: Sadržaj karte - slika se crta pri slanju
+        - status: na_cekanju / u_slanju / poslato / neuspelo / otkazano
+        - pokusaja: Broj neuspelih pokušaja
+        - sledeci_pokusaj: Kada poruka ponovo može da se pošalje
+        - zakljucano_do: Do kada je poruka zauzeta od strane worker-a
+        - poslednja_greska: Poruka poslednje greške
+        - datum_kreiranja: Kada je poruka upisana
+        - datum_slanja: Kada je poruka poslata
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Worker bira samo poruke koje čekaju, po vremenu sledećeg pokušaja
+        Index(
+            "ix_email_outbox_na_cekanju", "sledeci_pokusaj",
+            postgresql_where=text("status = 'na_cekanju'")
+        ),
+        # Zauzete poruke čiji je worker prestao da radi
+        Index(
+            "ix_email_outbox_u_slanju", "zakljucano_do",
+            postgresql_where=text("status = 'u_slanju'")
+        ),
+    )
+    
+    id_email: Mapped[int] = mapped_column(primary_key=True)
+    id_prijava: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("prijave.id_prijava", ondelete="CASCADE"), nullable=True, index=True
+    )
+    vrsta: Mapped[str] = mapped_column(String(20), default=KARTA, server_default=KARTA)
+    primalac: Mapped[str] = mapped_column(String(255))
+    naslov: Mapped[str] = mapped_column(String(255))
+    sadrzaj: Mapped[str] = mapped_column(Text)
+    qr_kod: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default=NA_CEKANJU, server_default=NA_CEKANJU)
+    pokusaja: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    sledeci_pokusaj: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    zakljucano_do: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    poslednja_greska: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    datum_kreiranja: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    datum_slanja: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<EmailOutbox(id={self.id_email}, primalac='{self.primalac}', status='{self.status}')>"
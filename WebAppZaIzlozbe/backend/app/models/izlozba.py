@@ -4,9 +4,13 @@ Predstavlja izložbu fotografija
 """
 from datetime import datetime, date
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import String, Text, Boolean, Integer, Date, DateTime, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    String, Text, Boolean, Integer, Date, DateTime, ForeignKey, Computed, Index, event
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload
 from app.database import Base
+from app.utils.search import SEARCH_DDL, SEARCH_VECTOR_SQL
 
 if TYPE_CHECKING:
     from app.models.lokacija import Lokacija
@@ -28,14 +32,19 @@ class Izlozba(Base):
         - datum_zavrsetka: Datum završetka
         - id_lokacija: FK ka lokaciji
         - kapacitet: Maksimalni broj posetilaca
+        - rezervisano: Broj rezervisanih mesta (održava se pri prijavi/otkazivanju)
         - thumbnail: URL do thumbnail-a
         - osmislio: Ko je osmislio izložbu
         - aktivan: Da li je izložba aktivna
         - objavljeno: Da li je izložba objavljena
         - datum_kreiranja: Datum kreiranja zapisa
         - datum_izmene: Datum poslednje izmene
+        - search_vector: Generisani tsvector za full-text pretragu
     """
     __tablename__ = "izlozbe"
+    __table_args__ = (
+        Index("ix_izlozbe_search_vector", "search_vector", postgresql_using="gin"),
+    )
     
     id_izlozba: Mapped[int] = mapped_column(primary_key=True, index=True)
     slug: Mapped[str] = mapped_column(String(310), unique=True, index=True)
@@ -51,6 +60,7 @@ class Izlozba(Base):
         ForeignKey("lokacije.id_lokacija")
     )
     kapacitet: Mapped[int] = mapped_column(Integer, default=100)
+    rezervisano: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     thumbnail: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     osmislio: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     aktivan: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -61,6 +71,9 @@ class Izlozba(Base):
     datum_izmene: Mapped[Optional[datetime]] = mapped_column(
         DateTime, nullable=True, onupdate=datetime.utcnow
     )
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True), deferred=True
+    )
     
     # Relacije
     lokacija: Mapped["Lokacija"] = relationship(
@@ -93,8 +106,7 @@ class Izlozba(Base):
     @property
     def preostali_kapacitet(self) -> int:
         """Izračunava preostali kapacitet"""
-        ukupno_prijava = sum(p.broj_karata for p in self.prijave)
-        return max(0, self.kapacitet - ukupno_prijava)
+        return max(0, self.kapacitet - (self.rezervisano or 0))
     
     @property
     def is_active(self) -> bool:
@@ -105,3 +117,29 @@ class Izlozba(Base):
             self.objavljeno and 
             self.datum_pocetka <= today <= self.datum_zavrsetka
         )
+
+
+# Javna lista: WHERE objavljeno ORDER BY datum_pocetka DESC, id DESC (migracija 006)
+Index(
+    "ix_izlozbe_objavljeno_datum",
+    Izlozba.datum_pocetka.desc(),
+    Izlozba.id_izlozba.desc(),
+    postgresql_where=Izlozba.objavljeno,
+    postgresql_include=["aktivan"]
+)
+
+# Funkcija izlozbe_fold mora postojati pre generisane kolone
+for ddl in SEARCH_DDL:
+    event.listen(Izlozba.__table__, "before_create", ddl)
+
+
+def izlozba_response_options() -> tuple:
+    """
+    Eager loading opcije potrebne za serijalizaciju IzlozbaResponse.
+    Async sesija ne dozvoljava lenjo učitavanje relacija.
+    """
+    return (
+        selectinload(Izlozba.lokacija),
+        selectinload(Izlozba.slika_naslovna),
+        selectinload(Izlozba.slike),
+    )
@@ -0,0 +1,58 @@
+"""
+Model Kampanja
+Masovno obaveštenje registrovanih posetilaca jedne izložbe
+(izmena datuma/lokacije ili podsetnik dan pred početak)
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Text, Integer, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+# Vrste kampanja
+IZMENA = "izmena"
+PODSETNIK = "podsetnik"
+
+# Statusi kampanje
+NA_CEKANJU = "na_cekanju"
+U_TOKU = "u_toku"
+ZAVRSENA = "zavrsena"
+
+
+class Kampanja(Base):
+    """
+    Model kampanje.
+    
+    Atributi:
+        - id_kampanja: Primarni ključ
+        - id_izlozba: FK ka izložbi
+        - vrsta: izmena / podsetnik
+        - kljuc: Jedinstveni ključ (npr. jedan podsetnik po datumu početka)
+        - poruka: Dodatni tekst (opis izmene)
+        - status: na_cekanju / u_toku / zavrsena
+        - poslednja_prijava: Checkpoint - id poslednje obrađene prijave
+        - poslato: Broj poslatih poruka
+        - neuspelo: Broj poruka prebačenih u email outbox zbog greške
+        - zakljucano_do: Do kada je kampanja zauzeta od strane worker-a
+        - datum_kreiranja: Kada je kampanja napravljena
+        - datum_zavrsetka: Kada je kampanja završena
+    """
+    __tablename__ = "kampanje"
+    
+    id_kampanja: Mapped[int] = mapped_column(primary_key=True)
+    id_izlozba: Mapped[int] = mapped_column(
+        ForeignKey("izlozbe.id_izlozba", ondelete="CASCADE"), index=True
+    )
+    vrsta: Mapped[str] = mapped_column(String(20))
+    kljuc: Mapped[Optional[str]] = mapped_column(String(100), unique=True, nullable=True)
+    poruka: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default=NA_CEKANJU, server_default=NA_CEKANJU)
+    poslednja_prijava: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    poslato: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    neuspelo: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    zakljucano_do: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    datum_kreiranja: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    datum_zavrsetka: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<Kampanja(id={self.id_kampanja}, izlozba={self.id_izlozba}, vrsta='{self.vrsta}')>"
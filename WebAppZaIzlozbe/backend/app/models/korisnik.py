@@ -4,7 +4,7 @@ Predstavlja korisnika sistema sa informacijama o profilu i privilegijama
 """
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import String, Boolean, DateTime, Text
+from sqlalchemy import String, Boolean, DateTime, Text, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -30,6 +30,11 @@ class Korisnik(Base):
         - poslednja_prijava: Datum poslednje prijave
     """
     __tablename__ = "korisnici"
+    __table_args__ = (
+        # Korisničko ime i email su jedinstveni bez obzira na velika/mala slova
+        Index("ix_korisnici_username_lower", text("lower(username)"), unique=True),
+        Index("ix_korisnici_email_lower", text("lower(email)"), unique=True),
+    )
     
     id_korisnik: Mapped[int] = mapped_column(primary_key=True, index=True)
     username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
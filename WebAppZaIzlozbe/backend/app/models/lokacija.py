@@ -3,9 +3,10 @@ Model Lokacija (Location)
 Predstavlja lokaciju gde se održava izložba
 """
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import String, Text, Float
+from sqlalchemy import String, Text, Float, Index, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.utils.search import TRIGRAM_DDL
 
 if TYPE_CHECKING:
     from app.models.izlozba import Izlozba
@@ -25,6 +26,14 @@ class Lokacija(Base):
         - grad: Grad u kojem se nalazi
     """
     __tablename__ = "lokacije"
+    __table_args__ = (
+        # Trigram indeks za ILIKE '%grad%' filtere
+        Index(
+            "ix_lokacije_grad_trgm", "grad",
+            postgresql_using="gin",
+            postgresql_ops={"grad": "gin_trgm_ops"}
+        ),
+    )
     
     id_lokacija: Mapped[int] = mapped_column(primary_key=True, index=True)
     naziv: Mapped[str] = mapped_column(String(200))
@@ -43,3 +52,6 @@ class Lokacija(Base):
     
     def __repr__(self) -> str:
         return f"<Lokacija(id={self.id_lokacija}, naziv='{self.naziv}')>"
+
+
+event.listen(Lokacija.__table__, "before_create", TRIGRAM_DDL)
@@ -0,0 +1,36 @@
+"""
+Model OpozvanToken
+Lista opozvanih access tokena; drži se u memoriji svakog procesa
+(app/services/token_service.py)
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class OpozvanToken(Base):
+    """
+    Model opoziva access tokena.
+    
+    Red sa jti opoziva jedan token (odjava). Red bez jti opoziva sve
+    tokene korisnika izdate pre datum_opoziva (deaktivacija, brisanje).
+    
+    Atributi:
+        - id_opoziv: Primarni ključ
+        - jti: Oznaka opozvanog tokena
+        - id_korisnik: Korisnik čiji se tokeni opozivaju
+        - datum_opoziva: Vreme opoziva
+        - istice: Posle ovog vremena opozvani tokeni su ionako istekli
+    """
+    __tablename__ = "opozvani_tokeni"
+    
+    id_opoziv: Mapped[int] = mapped_column(primary_key=True)
+    jti: Mapped[Optional[str]] = mapped_column(String(32), nullable=True, unique=True)
+    id_korisnik: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    datum_opoziva: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    istice: Mapped[datetime] = mapped_column(DateTime, index=True)
+    
+    def __repr__(self) -> str:
+        return f"<OpozvanToken(id={self.id_opoziv}, jti='{self.jti}', korisnik={self.id_korisnik})>"
@@ -4,9 +4,10 @@ Predstavlja prijavu korisnika na izložbu
 """
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import String, Boolean, Integer, DateTime, ForeignKey, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Boolean, Integer, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload
 from app.database import Base
+from app.models.izlozba import izlozba_response_options
 
 if TYPE_CHECKING:
     from app.models.korisnik import Korisnik
@@ -24,15 +25,21 @@ class Prijava(Base):
         - id_izlozba: FK ka izložbi
         - id_slika: FK ka slici (opciono, za QR)
         - broj_karata: Broj rezervisanih karata
-        - qr_kod: Sadržaj QR koda (JSON string)
+        - qr_kod: Sadržaj QR koda (potpisana karta "IZ:...", stare karte JSON)
         - validirano: Da li je karta validirana
         - datum_registracije: Datum prijave
-        - slika_qr: Base64 encoded QR kod slika
+        - slika_qr: Zastarelo - slika se crta iz qr_kod (GET /api/prijave/{id}/qr.png)
         - verifikovan_email: Da li je email verifikovan
         - email_poslat: Da li je email sa kartom poslat
         - datum_slanja_emaila: Kada je email poslat
     """
     __tablename__ = "prijave"
+    __table_args__ = (
+        # Korisnik se na izložbu može prijaviti samo jednom
+        Index("ix_prijave_korisnik_izlozba", "id_korisnik", "id_izlozba", unique=True),
+        # Validacija na ulazu traži prijavu po skeniranom kodu
+        Index("ix_prijave_qr_kod", "qr_kod", unique=True),
+    )
     
     id_prijava: Mapped[int] = mapped_column(primary_key=True, index=True)
     id_korisnik: Mapped[int] = mapped_column(
@@ -50,7 +57,7 @@ class Prijava(Base):
     datum_registracije: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow
     )
-    slika_qr: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Base64
+    slika_qr: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
     verifikovan_email: Mapped[bool] = mapped_column(Boolean, default=False)
     email_poslat: Mapped[bool] = mapped_column(Boolean, default=False)
     datum_slanja_emaila: Mapped[Optional[datetime]] = mapped_column(
@@ -76,3 +83,31 @@ class Prijava(Base):
     
     def __repr__(self) -> str:
         return f"<Prijava(id={self.id_prijava}, korisnik={self.id_korisnik}, izlozba={self.id_izlozba})>"
+
+
+
+# Indeksi za liste prijava (migracija 006)
+Index(
+    "ix_prijave_korisnik_datum",
+    Prijava.id_korisnik,
+    Prijava.datum_registracije.desc(),
+    Prijava.id_prijava.desc()
+)
+Index(
+    "ix_prijave_izlozba_datum",
+    Prijava.id_izlozba,
+    Prijava.datum_registracije.desc(),
+    Prijava.id_prijava.desc()
+)
+Index(
+    "ix_prijave_datum",
+    Prijava.datum_registracije.desc(),
+    Prijava.id_prijava.desc()
+)
+
+
+def prijava_response_options() -> tuple:
+    """Eager loading opcije potrebne za serijalizaciju PrijavaResponse"""
+    return (
+        selectinload(Prijava.izlozba).options(*izlozba_response_options()),
+    )
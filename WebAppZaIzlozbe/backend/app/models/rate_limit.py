@@ -0,0 +1,30 @@
+"""
+Model RateLimitBrojac
+Brojači zahteva po ključu i vremenskom prozoru - deljeni backend
+rate limiter-a kada radi više worker-a (RATE_LIMIT_BACKEND=postgres)
+"""
+from sqlalchemy import String, Integer, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class RateLimitBrojac(Base):
+    """
+    Model brojača zahteva.
+    Tabela je UNLOGGED - brojači ne moraju da prežive pad baze,
+    a upis je brži jer ne ide u WAL.
+    
+    Atributi:
+        - kljuc: Vrsta i heš vrednosti, npr. "login:ip:<sha256[:32]>"
+        - prozor: Redni broj prozora (unix vreme // dužina prozora)
+        - broj: Broj zahteva u prozoru
+    """
+    __tablename__ = "rate_limit_brojaci"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+    
+    kljuc: Mapped[str] = mapped_column(String(200), primary_key=True)
+    prozor: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    broj: Mapped[int] = mapped_column(Integer, default=1)
+    
+    def __repr__(self) -> str:
+        return f"<RateLimitBrojac(kljuc='{self.kljuc}', prozor={self.prozor}, broj={self.broj})>"
@@ -0,0 +1,38 @@
+"""
+Model RefreshToken
+Refresh tokeni se čuvaju samo kao SHA-256 heš i rotiraju se pri svakoj upotrebi
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class RefreshToken(Base):
+    """
+    Model refresh tokena.
+    
+    Atributi:
+        - id_token: Primarni ključ
+        - id_korisnik: FK ka korisniku (tokeni se brišu sa korisnikom)
+        - token_hash: SHA-256 heš tokena (sam token se ne čuva)
+        - porodica: Zajednička oznaka svih rotacija jedne prijave
+        - istice: Vreme isteka
+        - datum_kreiranja: Kada je token izdat
+        - datum_opoziva: Kada je token iskorišćen ili opozvan
+    """
+    __tablename__ = "refresh_tokeni"
+    
+    id_token: Mapped[int] = mapped_column(primary_key=True)
+    id_korisnik: Mapped[int] = mapped_column(
+        ForeignKey("korisnici.id_korisnik", ondelete="CASCADE"), index=True
+    )
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    porodica: Mapped[str] = mapped_column(String(32), index=True)
+    istice: Mapped[datetime] = mapped_column(DateTime)
+    datum_kreiranja: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    datum_opoziva: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<RefreshToken(id={self.id_token}, korisnik={self.id_korisnik})>"
@@ -4,7 +4,7 @@ Predstavlja fotografiju u izložbi - čuva se kao URL link
 """
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
-from sqlalchemy import String, Text, Boolean, Integer, DateTime, ForeignKey
+from sqlalchemy import String, Text, Boolean, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -70,3 +70,13 @@ class Slika(Base):
     
     def __repr__(self) -> str:
         return f"<Slika(id={self.id_slika}, naslov='{self.naslov}')>"
+
+
+# Lista slika: ORDER BY redosled, id, opciono samo istaknute (migracija 006)
+Index("ix_slike_redosled", Slika.redosled, Slika.id_slika)
+Index(
+    "ix_slike_istaknuta_redosled",
+    Slika.redosled,
+    Slika.id_slika,
+    postgresql_where=Slika.istaknuta
+)
@@ -5,23 +5,57 @@ Login, Register, Logout, Get Current User
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.korisnik import Korisnik
 from app.schemas.korisnik import KorisnikCreate, KorisnikResponse, KorisnikLogin
-from app.schemas.token import Token
-from app.utils.security import verify_password, get_password_hash, create_access_token
-from app.utils.dependencies import get_current_user, get_current_user_required
+from app.schemas.token import Token, RefreshTokenRequest, LoginForm
+from app.utils.security import (
+    verify_and_update_password, hash_password_async, create_access_token, decode_access_token
+)
+from app.utils.dependencies import get_current_user, get_current_user_required, oauth2_scheme
+from app.utils.rate_limit import ogranici_prijavu, ogranici_registraciju
+from app.services.token_service import (
+    izdaj_refresh_token, rotiraj_refresh_token, opozovi_token, opozovi_refresh_token
+)
 from app.config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Autentifikacija"])
 
 
-@router.post("/register", response_model=KorisnikResponse, status_code=status.HTTP_201_CREATED)
+def _naziv_ogranicenja(e: IntegrityError) -> str:
+    """Naziv narušenog ograničenja (asyncpg ga nosi u __cause__, psycopg2 u diag)"""
+    orig = e.orig
+    naziv = getattr(orig.__cause__, "constraint_name", None)
+    if naziv is None and getattr(orig, "diag", None) is not None:
+        naziv = orig.diag.constraint_name
+    return naziv or ""
+
+
+def _tokeni(user: Korisnik, refresh_token: str) -> Token:
+    """Par tokena; access token nosi ulogu, pa klijent ne mora da pita /me"""
+    access_token = create_access_token(
+        data={"sub": user.username, "user_id": user.id_korisnik, "admin": user.super_korisnik}
+    )
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=refresh_token,
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+
+
+@router.post(
+    "/register",
+    response_model=KorisnikResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(ogranici_registraciju)]
+)
 async def register(
     korisnik: KorisnikCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Registracija novog korisnika.
@@ -32,29 +66,12 @@ async def register(
     - **ime**: Ime korisnika
     - **prezime**: Prezime korisnika
     """
-    # Provera da li username već postoji
-    existing_username = db.query(Korisnik).filter(
-        Korisnik.username.ilike(korisnik.username)
-    ).first()
-    if existing_username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Korisničko ime '{korisnik.username}' je već zauzeto. Molimo odaberite drugo."
-        )
+    # Heširanje van try bloka - 503 pri preopterećenju ne postaje 500
+    hashed_password = await hash_password_async(korisnik.lozinka)
     
-    # Provera da li email već postoji
-    existing_email = db.query(Korisnik).filter(
-        Korisnik.email.ilike(korisnik.email)
-    ).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Email adresa '{korisnik.email}' je već registrovana. Pokušajte da se prijavite."
-        )
-    
-    # Kreiranje novog korisnika
+    # Kreiranje novog korisnika - jedan INSERT; zauzeto korisničko ime ili
+    # email (bez obzira na velika/mala slova) prijavljuju jedinstveni indeksi
     try:
-        hashed_password = get_password_hash(korisnik.lozinka)
         db_korisnik = Korisnik(
             username=korisnik.username,
             email=korisnik.email,
@@ -69,13 +86,31 @@ async def register(
         )
         
         db.add(db_korisnik)
-        db.commit()
-        db.refresh(db_korisnik)
+        await db.commit()
         
         return db_korisnik
+    
+    except IntegrityError as e:
+        await db.rollback()
+        
+        ogranicenje = _naziv_ogranicenja(e)
+        if "username" in ogranicenje:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Korisničko ime '{korisnik.username}' je već zauzeto. Molimo odaberite drugo."
+            )
+        if "email" in ogranicenje:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Email adresa '{korisnik.email}' je već registrovana. Pokušajte da se prijavite."
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Greška servera: {str(e)}"
+        )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         
         print(f"Registration error: {str(e)}")
         raise HTTPException(
@@ -84,23 +119,25 @@ async def register(
         )
 
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(ogranici_prijavu)])
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    form_data: LoginForm = Depends(),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Prijava korisnika. Vraća JWT token.
+    Prijava korisnika. Vraća kratkotrajan JWT access token i refresh token.
     
     - **username**: Korisničko ime
     - **password**: Lozinka
     """
     # Pronalaženje korisnika
-    user = db.query(Korisnik).filter(
-        Korisnik.username == form_data.username
-    ).first()
+    user = await db.scalar(
+        select(Korisnik).filter(Korisnik.username == form_data.username)
+    )
     
-    if not user or not verify_password(form_data.password, user.lozinka):
+    if user:
+        lozinka_ok, novi_hes = await verify_and_update_password(form_data.password, user.lozinka)
+    if not user or not lozinka_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Pogrešno korisničko ime ili lozinka",
@@ -113,27 +150,60 @@ async def login(
             detail="Korisnički nalog je deaktiviran"
         )
     
+    # Heš stare šeme ili slabije cene se zamenjuje novim
+    if novi_hes is not None:
+        user.lozinka = novi_hes
+    
     # Ažuriranje poslednje prijave
     user.poslednja_prijava = datetime.utcnow()
-    db.commit()
+    refresh_token = izdaj_refresh_token(db, user.id_korisnik)
+    await db.commit()
     
-    # Kreiranje tokena
-    access_token = create_access_token(
-        data={"sub": user.username, "user_id": user.id_korisnik}
-    )
+    return _tokeni(user, refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    data: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Izdaje novi par tokena. Poslati refresh token se troši i više ne važi.
+    """
+    rezultat = await rotiraj_refresh_token(db, data.refresh_token)
+    await db.commit()
+    
+    if rezultat is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sesija je istekla, prijavite se ponovo",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
-    return Token(access_token=access_token, token_type="bearer")
+    user, refresh_token = rezultat
+    return _tokeni(user, refresh_token)
 
 
 @router.post("/logout")
 async def logout(
+    data: Optional[RefreshTokenRequest] = None,
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_user_required)
 ):
     """
     Odjava korisnika.
     
-    Klijent treba da obriše token sa svoje strane.
+    Access token se odmah opoziva, a uz prosleđen refresh token
+    i cela sesija kojoj pripada.
     """
+    payload = decode_access_token(token)
+    if payload is not None:
+        await opozovi_token(db, payload)
+    if data is not None:
+        await opozovi_refresh_token(db, data.refresh_token, current_user.id_korisnik)
+    await db.commit()
+    
     return {"message": "Uspešno ste se odjavili"}
 
 
@@ -1,23 +1,159 @@
+from collections import defaultdict
 from typing import List, Optional
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Form, File, UploadFile
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
-from app.database import get_db
-from app.models.izlozba import Izlozba
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+from app.database import get_db, get_read_db
+from app.models.izlozba import Izlozba, izlozba_response_options
 from app.models.lokacija import Lokacija
+from app.models.slika import Slika
 from app.models.korisnik import Korisnik
+from app.models.kampanja import IZMENA
 from app.schemas.izlozba import (
     IzlozbaCreate, IzlozbaUpdate, IzlozbaResponse, IzlozbaListResponse
 )
 from app.utils.dependencies import get_current_admin
 from app.utils.file_upload import save_upload_file, save_upload_files
+from app.utils.pagination import Keyset
+from app.utils.response_cache import IZLOZBE
+from app.services.invalidacija_service import zabelezi_izmenu
+from app.utils.search import search_tsquery
+from app.services.kampanja_service import zakazi_kampanju, probudi_kampanje
 
 
 router = APIRouter(prefix="/api/izlozbe", tags=["Izložbe"])
 
+IZLOZBE_KEYSET = Keyset(
+    "izlozbe", Izlozba.datum_pocetka, Izlozba.id_izlozba, descending=True
+)
+
+_naslovna = aliased(Slika)
+
+# Polja stavke liste (?fields=) i izrazi kojima se čitaju iz baze
+IZLOZBA_POLJA = {
+    "id_izlozba": Izlozba.id_izlozba,
+    "slug": Izlozba.slug,
+    "naslov": Izlozba.naslov,
+    "kratak_opis": Izlozba.kratak_opis,
+    "opis": Izlozba.opis,
+    "datum_pocetka": Izlozba.datum_pocetka,
+    "datum_zavrsetka": Izlozba.datum_zavrsetka,
+    # Bez sopstvenog thumbnail-a koristi se thumbnail naslovne slike
+    "thumbnail": func.coalesce(func.nullif(func.trim(Izlozba.thumbnail), ""), _naslovna.thumbnail),
+    "osmislio": Izlozba.osmislio,
+    "aktivan": Izlozba.aktivan,
+    "objavljeno": Izlozba.objavljeno,
+    "kapacitet": Izlozba.kapacitet,
+    "preostali_kapacitet": func.greatest(Izlozba.kapacitet - func.coalesce(Izlozba.rezervisano, 0), 0),
+    "id_lokacija": Izlozba.id_lokacija,
+    "naziv_lokacije": Lokacija.naziv,
+    "grad": Lokacija.grad,
+    "datum_kreiranja": Izlozba.datum_kreiranja,
+    "datum_izmene": Izlozba.datum_izmene,
+}
+
+# Podrazumevana polja - ono što prikazuje kartica izložbe
+SAZETAK_POLJA = (
+    "id_izlozba", "slug", "naslov", "kratak_opis", "datum_pocetka", "datum_zavrsetka",
+    "thumbnail", "osmislio", "aktivan", "objavljeno", "kapacitet", "preostali_kapacitet",
+    "naziv_lokacije", "grad",
+)
+
+# Relacije koje se dodaju sa ?include=
+IZLOZBA_RELACIJE = ("lokacija", "slika_naslovna", "slike")
+
+
+def _lista_parametra(vrednost: Optional[str], dozvoljeno, naziv: str) -> Optional[list]:
+    """Parsira listu odvojenu zarezima i odbija nepoznate vrednosti"""
+    if vrednost is None:
+        return None
+    stavke = [s.strip() for s in vrednost.split(",") if s.strip()]
+    nepoznate = [s for s in stavke if s not in dozvoljeno]
+    if nepoznate:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Nepoznate vrednosti za {naziv}: {', '.join(nepoznate)}. "
+                   f"Dozvoljeno: {', '.join(dozvoljeno)}"
+        )
+    return stavke
+
+
+async def _load_sazetke(db: AsyncSession, ids: List[int], polja: List[str], include: List[str]) -> List[dict]:
+    """
+    Učitava stavke liste za date id-jeve, istim redom.
+    Izložba obrisana posle upita za id-jeve strane se izostavlja.
+    Skalarna polja dolaze jednim upitom sa samo traženim kolonama, a svaka
+    tražena relacija jednim batch upitom - bez tražene relacije nema ni upita.
+    """
+    kolone = [IZLOZBA_POLJA[polje].label(polje) for polje in polja]
+    query = select(
+        Izlozba.id_izlozba.label("_id"),
+        Izlozba.id_lokacija.label("_id_lokacija"),
+        Izlozba.id_slika.label("_id_slika"),
+        *kolone
+    )
+    if {"naziv_lokacije", "grad"} & set(polja):
+        query = query.outerjoin(Lokacija, Lokacija.id_lokacija == Izlozba.id_lokacija)
+    if "thumbnail" in polja:
+        query = query.outerjoin(_naslovna, _naslovna.id_slika == Izlozba.id_slika)
+    redovi = {
+        red["_id"]: red
+        for red in (await db.execute(query.filter(Izlozba.id_izlozba.in_(ids)))).mappings()
+    }
+    
+    items = []
+    for izlozba_id in ids:
+        if izlozba_id not in redovi:
+            continue
+        item = {polje: redovi[izlozba_id][polje] for polje in polja}
+        item["id_izlozba"] = izlozba_id
+        items.append(item)
+    
+    if "lokacija" in include:
+        lokacija_ids = {red["_id_lokacija"] for red in redovi.values()} - {None}
+        lokacije = {
+            lokacija.id_lokacija: lokacija
+            for lokacija in await db.scalars(select(Lokacija).filter(Lokacija.id_lokacija.in_(lokacija_ids)))
+        } if lokacija_ids else {}
+        for item in items:
+            item["lokacija"] = lokacije.get(redovi[item["id_izlozba"]]["_id_lokacija"])
+    
+    if "slika_naslovna" in include:
+        slika_ids = {red["_id_slika"] for red in redovi.values()} - {None}
+        naslovne = {
+            slika.id_slika: slika
+            for slika in await db.scalars(select(Slika).filter(Slika.id_slika.in_(slika_ids)))
+        } if slika_ids else {}
+        for item in items:
+            item["slika_naslovna"] = naslovne.get(redovi[item["id_izlozba"]]["_id_slika"])
+    
+    if "slike" in include:
+        slike = defaultdict(list)
+        for slika in await db.scalars(
+            select(Slika)
+            .filter(Slika.id_izlozba.in_(ids))
+            .order_by(Slika.redosled, Slika.id_slika)
+        ):
+            slike[slika.id_izlozba].append(slika)
+        for item in items:
+            item["slike"] = slike[item["id_izlozba"]]
+    
+    return items
+
+
+async def _load_izlozba(db: AsyncSession, izlozba_id: int) -> Izlozba:
+    """Ponovo učitava izložbu sa svim relacijama potrebnim za odgovor"""
+    return await db.scalar(
+        select(Izlozba)
+        .options(*izlozba_response_options())
+        .filter(Izlozba.id_izlozba == izlozba_id)
+        .execution_options(populate_existing=True)
+    )
+
 
-@router.get("/", response_model=IzlozbaListResponse)
+@router.get("/", response_model=IzlozbaListResponse, response_model_exclude_unset=True)
 async def list_izlozbe(
     page: int = Query(1, ge=1),
     per_page: int = Query(12, ge=1, le=50),
@@ -27,22 +163,27 @@ async def list_izlozbe(
     objavljeno: Optional[bool] = True,
     od_datuma: Optional[date] = None,
     do_datuma: Optional[date] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(
+        None, description="Keyset paginacija: prazan string za prvu stranu, zatim next_cursor"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Polja stavke odvojena zarezima (podrazumevano polja kartice)"
+    ),
+    include: Optional[str] = Query(
+        None, description="Relacije koje se dodaju: lokacija, slika_naslovna, slike"
+    ),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Izlozba).options(
-        joinedload(Izlozba.lokacija),
-        joinedload(Izlozba.slika_naslovna),
-        joinedload(Izlozba.slike)
-    )
+    polja = _lista_parametra(fields, tuple(IZLOZBA_POLJA), "fields") or list(SAZETAK_POLJA)
+    relacije = _lista_parametra(include, IZLOZBA_RELACIJE, "include") or []
     
-    if search:
-        query = query.filter(
-            or_(
-                Izlozba.naslov.ilike(f"%{search}%"),
-                Izlozba.opis.ilike(f"%{search}%"),
-                Izlozba.kratak_opis.ilike(f"%{search}%")
-            )
-        )
+    # Stranica se bira nad samim id-jevima, relacije se učitavaju posle
+    query = select(Izlozba.id_izlozba, Izlozba.datum_pocetka)
+    
+    # Full-text pretraga preko GIN indeksa (bez dijakritika, ćirilica = latinica)
+    tsquery = search_tsquery(search) if search else None
+    if tsquery is not None:
+        query = query.filter(Izlozba.search_vector.op("@@")(tsquery))
     
     if grad:
         query = query.join(Lokacija).filter(Lokacija.grad.ilike(f"%{grad}%"))
@@ -59,36 +200,64 @@ async def list_izlozbe(
     if do_datuma:
         query = query.filter(Izlozba.datum_zavrsetka <= do_datuma)
     
-    total = query.count()
+    next_cursor = None
+    total = None
     
-    skip = (page - 1) * per_page
-    izlozbe = query.order_by(Izlozba.datum_pocetka.desc()).offset(skip).limit(per_page).all()
+    if cursor is not None:
+        # Keyset režim - cena strane ne zavisi od dubine, ukupan broj se ne računa
+        rows = (await db.execute(IZLOZBE_KEYSET.apply(query, cursor, per_page))).all()
+        rows, next_cursor = IZLOZBE_KEYSET.page(rows, per_page)
+    else:
+        # Ukupan broj daje window funkcija u istom upitu
+        order_by = IZLOZBE_KEYSET.order_by()
+        if tsquery is not None:
+            # Pri pretrazi se prvo sortira po relevantnosti
+            order_by.insert(0, func.ts_rank_cd(Izlozba.search_vector, tsquery).desc())
+        
+        skip = (page - 1) * per_page
+        rows = (await db.execute(
+            query
+            .add_columns(func.count().over().label("ukupno"))
+            .order_by(*order_by)
+            .offset(skip)
+            .limit(per_page)
+        )).all()
+        
+        if rows:
+            total = rows[0].ukupno
+        elif skip:
+            # Stranica posle poslednje - broj se računa posebno
+            total = await db.scalar(
+                select(func.count()).select_from(query.subquery())
+            )
+        else:
+            total = 0
     
-    items = []
-    for izlozba in izlozbe:
-        izlozba_dict = IzlozbaResponse.model_validate(izlozba).model_dump()
-        izlozba_dict["preostali_kapacitet"] = izlozba.preostali_kapacitet
-        items.append(IzlozbaResponse(**izlozba_dict))
-    
-    return IzlozbaListResponse(
-        items=items,
-        total=total,
-        page=page,
-        per_page=per_page,
-        pages=(total + per_page - 1) // per_page
-    )
+    # Učitavaju se samo tražena polja i relacije; stavke idu direktno
+    # u response_model, a netražena polja se ne serijalizuju
+    ids = [row.id_izlozba for row in rows]
+    items = await _load_sazetke(db, ids, polja, relacije) if ids else []
+    
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page if total is not None else None,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/slug/{slug}", response_model=IzlozbaResponse)
 async def get_izlozba_by_slug(
     slug: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    izlozba = db.query(Izlozba).options(
-        joinedload(Izlozba.lokacija),
-        joinedload(Izlozba.slika_naslovna),
-        joinedload(Izlozba.slike)
-    ).filter(Izlozba.slug == slug).first()
+    izlozba = await db.scalar(
+        select(Izlozba)
+        .options(*izlozba_response_options())
+        .filter(Izlozba.slug == slug)
+    )
     
     if not izlozba:
         raise HTTPException(
@@ -96,22 +265,18 @@ async def get_izlozba_by_slug(
             detail="Izložba nije pronađena"
         )
     
-    response = IzlozbaResponse.model_validate(izlozba)
-    response_dict = response.model_dump()
-    response_dict["preostali_kapacitet"] = izlozba.preostali_kapacitet
-    
-    return IzlozbaResponse(**response_dict)
+    return izlozba
     
 @router.get("/{izlozba_id}", response_model=IzlozbaResponse)
 async def get_izlozba(
     izlozba_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    izlozba = db.query(Izlozba).options(
-        joinedload(Izlozba.lokacija),
-        joinedload(Izlozba.slika_naslovna),
-        joinedload(Izlozba.slike)
-    ).filter(Izlozba.id_izlozba == izlozba_id).first()
+    izlozba = await db.scalar(
+        select(Izlozba)
+        .options(*izlozba_response_options())
+        .filter(Izlozba.id_izlozba == izlozba_id)
+    )
     
     if not izlozba:
         raise HTTPException(
@@ -119,11 +284,7 @@ async def get_izlozba(
             detail="Izložba nije pronađena"
         )
     
-    response = IzlozbaResponse.model_validate(izlozba)
-    response_dict = response.model_dump()
-    response_dict["preostali_kapacitet"] = izlozba.preostali_kapacitet
-    
-    return IzlozbaResponse(**response_dict)
+    return izlozba
 
 
 @router.post("/", response_model=IzlozbaResponse, status_code=status.HTTP_201_CREATED)
@@ -141,12 +302,10 @@ async def create_izlozba(
     objavljeno: bool = Form(False),
     thumbnail_file: UploadFile = File(...),
     slike_files: List[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    lokacija = db.query(Lokacija).filter(
-        Lokacija.id_lokacija == id_lokacija
-    ).first()
+    lokacija = await db.get(Lokacija, id_lokacija)
     
     if not lokacija:
         raise HTTPException(
@@ -154,7 +313,7 @@ async def create_izlozba(
             detail="Lokacija ne postoji"
         )
     
-    existing_slug = db.query(Izlozba).filter(Izlozba.slug == slug).first()
+    existing_slug = await db.scalar(select(Izlozba.id_izlozba).filter(Izlozba.slug == slug))
     if existing_slug:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -178,8 +337,8 @@ async def create_izlozba(
         thumbnail=thumbnail_path
     )
     db.add(db_izlozba)
-    db.commit()
-    db.refresh(db_izlozba)
+    zabelezi_izmenu(db, IZLOZBE)
+    await db.commit()
     
     if slike_files:
         from app.models.slika import Slika
@@ -194,10 +353,10 @@ async def create_izlozba(
             )
             db.add(nova_slika)
         
-        db.commit()
-        db.refresh(db_izlozba)
+        zabelezi_izmenu(db, IZLOZBE)
+        await db.commit()
     
-    return db_izlozba
+    return await _load_izlozba(db, db_izlozba.id_izlozba)
 
 
 @router.put("/{izlozba_id}", response_model=IzlozbaResponse)
@@ -216,12 +375,15 @@ async def update_izlozba(
     objavljeno: Optional[bool] = Form(None),
     thumbnail_file: Optional[UploadFile] = File(None),
     slike_files: List[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    izlozba = db.query(Izlozba).filter(
-        Izlozba.id_izlozba == izlozba_id
-    ).first()
+    # Zaključavanje reda - prijave ne mogu da promene brojač tokom provere kapaciteta
+    izlozba = await db.scalar(
+        select(Izlozba)
+        .filter(Izlozba.id_izlozba == izlozba_id)
+        .with_for_update()
+    )
     
     if not izlozba:
         raise HTTPException(
@@ -230,7 +392,7 @@ async def update_izlozba(
         )
     
     if slug and slug != izlozba.slug:
-        existing_slug = db.query(Izlozba).filter(Izlozba.slug == slug).first()
+        existing_slug = await db.scalar(select(Izlozba.id_izlozba).filter(Izlozba.slug == slug))
         if existing_slug:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -238,13 +400,20 @@ async def update_izlozba(
             )
             
     if kapacitet is not None:
-        ukupno_prijava = sum(p.broj_karata for p in izlozba.prijave)
-        if kapacitet < ukupno_prijava:
+        if kapacitet < izlozba.rezervisano:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Kapacitet ne može biti manji od broja prijava ({ukupno_prijava})"
+                detail=f"Kapacitet ne može biti manji od broja prijava ({izlozba.rezervisano})"
             )
 
+    # Promena datuma ili lokacije se javlja svim prijavljenima
+    izmene = []
+    if (datum_pocetka and datum_pocetka != izlozba.datum_pocetka) or \
+            (datum_zavrsetka and datum_zavrsetka != izlozba.datum_zavrsetka):
+        izmene.append("datum održavanja")
+    if id_lokacija and id_lokacija != izlozba.id_lokacija:
+        izmene.append("lokacija")
+
     if naslov: izlozba.naslov = naslov
     if slug: izlozba.slug = slug
     if id_lokacija: izlozba.id_lokacija = id_lokacija
@@ -273,21 +442,24 @@ async def update_izlozba(
             )
             db.add(nova_slika)
 
-    db.commit()
-    db.refresh(izlozba)
+    if izmene and izlozba.objavljeno:
+        zakazi_kampanju(db, izlozba_id, IZMENA, poruka=f"Promenjeno: {', '.join(izmene)}.")
+
+    zabelezi_izmenu(db, IZLOZBE)
+    await db.commit()
+    if izmene:
+        probudi_kampanje()
     
-    return izlozba
+    return await _load_izlozba(db, izlozba_id)
 
 
 @router.delete("/{izlozba_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_izlozba(
     izlozba_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    izlozba = db.query(Izlozba).filter(
-        Izlozba.id_izlozba == izlozba_id
-    ).first()
+    izlozba = await db.get(Izlozba, izlozba_id)
     
     if not izlozba:
         raise HTTPException(
@@ -295,7 +467,8 @@ async def delete_izlozba(
             detail="Izložba nije pronađena"
         )
     
-    db.delete(izlozba)
-    db.commit()
+    await db.delete(izlozba)
+    zabelezi_izmenu(db, IZLOZBE)
+    await db.commit()
     
     return None
@@ -3,23 +3,35 @@ Korisnici Router - Upravljanje korisnicima
 CRUD operacije za korisnike (admin pristup)
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.korisnik import Korisnik
 from app.schemas.korisnik import KorisnikResponse, KorisnikUpdate
-from app.utils.dependencies import get_current_admin, get_current_user_required
+from app.utils.dependencies import get_current_admin, get_current_user_required, KORISNIK
 from app.utils.security import get_password_hash
+from app.services.kapacitet_service import oslobodi_mesta_korisnika
+from app.services.token_service import opozovi_korisnika
+from app.utils.pagination import Keyset, NEXT_CURSOR_HEADER
+from app.utils.response_cache import IZLOZBE
+from app.services.invalidacija_service import zabelezi_izmenu
 
 router = APIRouter(prefix="/api/korisnici", tags=["Korisnici"])
 
+KORISNICI_KEYSET = Keyset("korisnici", Korisnik.id_korisnik)
+
 
 @router.get("/", response_model=List[KorisnikResponse])
 async def list_korisnici(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     aktivan: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Keyset paginacija: prazan string za prvu stranu, zatim X-Next-Cursor header"
+    ),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
     """
@@ -28,20 +40,30 @@ async def list_korisnici(
     - **skip**: Broj preskočenih rezultata
     - **limit**: Maksimalni broj rezultata
     - **aktivan**: Filter po aktivnosti
+    - **cursor**: Keyset paginacija umesto skip
     """
-    query = db.query(Korisnik)
+    query = select(Korisnik)
     
     if aktivan is not None:
         query = query.filter(Korisnik.aktivan == aktivan)
     
-    korisnici = query.offset(skip).limit(limit).all()
-    return korisnici
+    if cursor is not None:
+        korisnici = await db.scalars(KORISNICI_KEYSET.apply(query, cursor, limit))
+        korisnici, next_cursor = KORISNICI_KEYSET.page(korisnici.all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return korisnici
+    
+    korisnici = await db.scalars(
+        query.order_by(*KORISNICI_KEYSET.order_by()).offset(skip).limit(limit)
+    )
+    return korisnici.all()
 
 
 @router.get("/{korisnik_id}", response_model=KorisnikResponse)
 async def get_korisnik(
     korisnik_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_user_required)
 ):
     """
@@ -56,9 +78,7 @@ async def get_korisnik(
             detail="Nemate pravo pristupa podacima ovog korisnika"
         )
     
-    korisnik = db.query(Korisnik).filter(
-        Korisnik.id_korisnik == korisnik_id
-    ).first()
+    korisnik = await db.get(Korisnik, korisnik_id)
     
     if not korisnik:
         raise HTTPException(
@@ -73,7 +93,7 @@ async def get_korisnik(
 async def update_korisnik(
     korisnik_id: int,
     korisnik_update: KorisnikUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_user_required)
 ):
     """
@@ -82,9 +102,7 @@ async def update_korisnik(
     Korisnik može ažurirati samo svoje podatke (osim super_korisnik).
     Admin može ažurirati sve podatke.
     """
-    korisnik = db.query(Korisnik).filter(
-        Korisnik.id_korisnik == korisnik_id
-    ).first()
+    korisnik = await db.get(Korisnik, korisnik_id)
     
     if not korisnik:
         raise HTTPException(
@@ -115,11 +133,16 @@ async def update_korisnik(
         update_data.pop("email", None)
         update_data.pop("username", None)
     
+    # Deaktiviran nalog gubi sve izdate tokene
+    if korisnik.aktivan and update_data.get("aktivan") is False:
+        await opozovi_korisnika(db, korisnik_id)
+    
     for field, value in update_data.items():
         setattr(korisnik, field, value)
     
-    db.commit()
-    db.refresh(korisnik)
+    zabelezi_izmenu(db, KORISNIK, korisnik_id)
+    await db.commit()
+    await db.refresh(korisnik)
     
     return korisnik
 
@@ -127,15 +150,13 @@ async def update_korisnik(
 @router.delete("/{korisnik_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_korisnik(
     korisnik_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
     """
     Briše korisnika (samo admin).
     """
-    korisnik = db.query(Korisnik).filter(
-        Korisnik.id_korisnik == korisnik_id
-    ).first()
+    korisnik = await db.get(Korisnik, korisnik_id)
     
     if not korisnik:
         raise HTTPException(
@@ -150,7 +171,12 @@ async def delete_korisnik(
             detail="Ne možete obrisati svoj nalog"
         )
     
-    db.delete(korisnik)
-    db.commit()
+    await oslobodi_mesta_korisnika(db, korisnik_id)
+    await opozovi_korisnika(db, korisnik_id)
+    await db.delete(korisnik)
+    zabelezi_izmenu(db, KORISNIK, korisnik_id)
+    # Menja se i preostali kapacitet u odgovorima izložbi
+    zabelezi_izmenu(db, IZLOZBE)
+    await db.commit()
     
     return None
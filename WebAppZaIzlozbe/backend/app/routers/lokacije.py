@@ -1,39 +1,56 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
 from app.models.lokacija import Lokacija
 from app.models.korisnik import Korisnik
 from app.schemas.lokacija import LokacijaCreate, LokacijaUpdate, LokacijaResponse
 from app.utils.dependencies import get_current_admin
+from app.utils.pagination import Keyset, NEXT_CURSOR_HEADER
+from app.utils.response_cache import LOKACIJE
+from app.services.invalidacija_service import zabelezi_izmenu
 
 router = APIRouter(prefix="/api/lokacije", tags=["Lokacije"])
 
+LOKACIJE_KEYSET = Keyset("lokacije", Lokacija.id_lokacija)
+
 
 @router.get("/", response_model=List[LokacijaResponse])
 async def list_lokacije(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     grad: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(
+        None, description="Keyset paginacija: prazan string za prvu stranu, zatim X-Next-Cursor header"
+    ),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Lokacija)
+    query = select(Lokacija)
     
     if grad:
         query = query.filter(Lokacija.grad.ilike(f"%{grad}%"))
     
-    lokacije = query.offset(skip).limit(limit).all()
-    return lokacije
+    if cursor is not None:
+        lokacije = await db.scalars(LOKACIJE_KEYSET.apply(query, cursor, limit))
+        lokacije, next_cursor = LOKACIJE_KEYSET.page(lokacije.all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return lokacije
+    
+    lokacije = await db.scalars(
+        query.order_by(*LOKACIJE_KEYSET.order_by()).offset(skip).limit(limit)
+    )
+    return lokacije.all()
 
 
 @router.get("/{lokacija_id}", response_model=LokacijaResponse)
 async def get_lokacija(
     lokacija_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    lokacija = db.query(Lokacija).filter(
-        Lokacija.id_lokacija == lokacija_id
-    ).first()
+    lokacija = await db.get(Lokacija, lokacija_id)
     
     if not lokacija:
         raise HTTPException(
@@ -47,14 +64,15 @@ async def get_lokacija(
 @router.post("/", response_model=LokacijaResponse, status_code=status.HTTP_201_CREATED)
 async def create_lokacija(
     lokacija: LokacijaCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
     db_lokacija = Lokacija(**lokacija.model_dump())
     
     db.add(db_lokacija)
-    db.commit()
-    db.refresh(db_lokacija)
+    zabelezi_izmenu(db, LOKACIJE)
+    await db.commit()
+    await db.refresh(db_lokacija)
     
     return db_lokacija
 
@@ -63,12 +81,10 @@ async def create_lokacija(
 async def update_lokacija(
     lokacija_id: int,
     lokacija_update: LokacijaUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    lokacija = db.query(Lokacija).filter(
-        Lokacija.id_lokacija == lokacija_id
-    ).first()
+    lokacija = await db.get(Lokacija, lokacija_id)
     
     if not lokacija:
         raise HTTPException(
@@ -81,8 +97,9 @@ async def update_lokacija(
     for field, value in update_data.items():
         setattr(lokacija, field, value)
     
-    db.commit()
-    db.refresh(lokacija)
+    zabelezi_izmenu(db, LOKACIJE)
+    await db.commit()
+    await db.refresh(lokacija)
     
     return lokacija
 
@@ -90,12 +107,10 @@ async def update_lokacija(
 @router.delete("/{lokacija_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_lokacija(
     lokacija_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    lokacija = db.query(Lokacija).filter(
-        Lokacija.id_lokacija == lokacija_id
-    ).first()
+    lokacija = await db.get(Lokacija, lokacija_id)
     
     if not lokacija:
         raise HTTPException(
@@ -103,13 +118,14 @@ async def delete_lokacija(
             detail="Lokacija nije pronađena"
         )
     
-    if lokacija.izlozbe:
+    if await lokacija.awaitable_attrs.izlozbe:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Ne možete obrisati lokaciju koja ima izložbe"
         )
     
-    db.delete(lokacija)
-    db.commit()
+    await db.delete(lokacija)
+    zabelezi_izmenu(db, LOKACIJE)
+    await db.commit()
     
     return None
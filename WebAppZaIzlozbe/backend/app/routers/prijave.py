@@ -1,61 +1,103 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.database import get_db
-from app.models.prijava import Prijava
+from app.models.prijava import Prijava, prijava_response_options
 from app.models.izlozba import Izlozba
 from app.models.korisnik import Korisnik
-from app.schemas.prijava import PrijavaCreate, PrijavaUpdate, PrijavaResponse
+from app.schemas.prijava import (
+    PrijavaCreate, PrijavaUpdate, PrijavaResponse,
+    PrijavaValidate, PrijavaValidateBatch, ValidacijaResponse, ValidacijaStavka,
+    PrijavaReissue
+)
 from app.utils.dependencies import get_current_user_required, get_current_admin
-from app.services.qr_service import generate_qr_code
-from app.services.email_service import send_registration_email
+from app.services.qr_service import (
+    generate_qr_data, render_qr, render_qr_batch, qr_etag
+)
+from app.services.outbox_service import zakazi_kartu, otkazi_karte, probudi_worker
+from app.services.kapacitet_service import rezervisi_mesta, oslobodi_mesta
+from app.services.validacija_service import (
+    validiraj_kartu, validiraj_karte, VALIDIRANO, VEC_VALIDIRANO
+)
+from app.utils.pagination import Keyset, NEXT_CURSOR_HEADER
+from app.utils.response_cache import IZLOZBE
+from app.services.invalidacija_service import zabelezi_izmenu
 
 router = APIRouter(prefix="/api/prijave", tags=["Prijave"])
 
+# Format slike -> MIME tip
+QR_FORMATI = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+PRIJAVE_KEYSET = Keyset(
+    "prijave", Prijava.datum_registracije, Prijava.id_prijava, descending=True
+)
+
 
 @router.get("/", response_model=List[PrijavaResponse])
 async def list_prijave(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     id_izlozba: Optional[int] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Keyset paginacija: prazan string za prvu stranu, zatim X-Next-Cursor header"
+    ),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    query = db.query(Prijava).options(joinedload(Prijava.izlozba))
+    query = select(Prijava).options(*prijava_response_options())
     
     if id_izlozba:
         query = query.filter(Prijava.id_izlozba == id_izlozba)
     
 
     
-    prijave = query.order_by(Prijava.datum_registracije.desc()).offset(skip).limit(limit).all()
-    return prijave
+    if cursor is not None:
+        prijave = await db.scalars(PRIJAVE_KEYSET.apply(query, cursor, limit))
+        prijave, next_cursor = PRIJAVE_KEYSET.page(prijave.all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return prijave
+    
+    prijave = await db.scalars(
+        query.order_by(*PRIJAVE_KEYSET.order_by()).offset(skip).limit(limit)
+    )
+    return prijave.all()
 
 
 @router.get("/moje", response_model=List[PrijavaResponse])
 async def list_moje_prijave(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_user_required)
 ):
-    prijave = db.query(Prijava).options(
-        joinedload(Prijava.izlozba).joinedload(Izlozba.lokacija)
-    ).filter(
-        Prijava.id_korisnik == current_user.id_korisnik
-    ).order_by(Prijava.datum_registracije.desc()).all()
+    prijave = await db.scalars(
+        select(Prijava)
+        .options(*prijava_response_options())
+        .filter(Prijava.id_korisnik == current_user.id_korisnik)
+        .order_by(Prijava.datum_registracije.desc())
+    )
     
-    return prijave
+    return prijave.all()
 
 
 @router.get("/{prijava_id}", response_model=PrijavaResponse)
 async def get_prijava(
     prijava_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_user_required)
 ):
-    prijava = db.query(Prijava).options(
-        joinedload(Prijava.izlozba).joinedload(Izlozba.lokacija)
-    ).filter(Prijava.id_prijava == prijava_id).first()
+    prijava = await db.scalar(
+        select(Prijava)
+        .options(*prijava_response_options())
+        .filter(Prijava.id_prijava == prijava_id)
+    )
     
     if not prijava:
         raise HTTPException(
@@ -75,15 +117,82 @@ async def get_prijava(
     return prijava
 
 
+async def _qr_response(
+    prijava_id: int,
+    format: str,
+    request: Request,
+    db: AsyncSession,
+    current_user: Korisnik
+) -> Response:
+    row = (await db.execute(
+        select(Prijava.id_korisnik, Prijava.qr_kod)
+        .filter(Prijava.id_prijava == prijava_id)
+    )).first()
+    
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prijava nije pronađena"
+        )
+    
+    if row.id_korisnik != current_user.id_korisnik and not current_user.super_korisnik:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Nemate pravo pristupa ovoj prijavi"
+        )
+    
+    if not row.qr_kod:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="QR kod nije generisan"
+        )
+    
+    # Karta je lična - keširanje samo u pregledaču
+    headers = {
+        "ETag": qr_etag(row.qr_kod),
+        "Cache-Control": "private, max-age=86400",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(
+        content=await render_qr(row.qr_kod, format),
+        media_type=QR_FORMATI[format],
+        headers=headers
+    )
+
+
+@router.get("/{prijava_id}/qr.png", response_class=Response)
+async def get_prijava_qr_png(
+    prijava_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Korisnik = Depends(get_current_user_required)
+):
+    return await _qr_response(prijava_id, "png", request, db, current_user)
+
+
+@router.get("/{prijava_id}/qr.svg", response_class=Response)
+async def get_prijava_qr_svg(
+    prijava_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: Korisnik = Depends(get_current_user_required)
+):
+    return await _qr_response(prijava_id, "svg", request, db, current_user)
+
+
 @router.post("/", response_model=PrijavaResponse, status_code=status.HTTP_201_CREATED)
 async def create_prijava(
     prijava: PrijavaCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_user_required)
 ):
-    izlozba = db.query(Izlozba).options(
-        joinedload(Izlozba.lokacija)
-    ).filter(Izlozba.id_izlozba == prijava.id_izlozba).first()
+    izlozba = await db.scalar(
+        select(Izlozba)
+        .options(selectinload(Izlozba.lokacija))
+        .filter(Izlozba.id_izlozba == prijava.id_izlozba)
+    )
     
     if not izlozba:
         raise HTTPException(
@@ -97,16 +206,12 @@ async def create_prijava(
             detail="Izložba nije dostupna za prijavu"
         )
     
-    if prijava.broj_karata > izlozba.preostali_kapacitet:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Nema dovoljno mesta. Preostalo: {izlozba.preostali_kapacitet}"
+    existing = await db.scalar(
+        select(Prijava.id_prijava).filter(
+            Prijava.id_korisnik == current_user.id_korisnik,
+            Prijava.id_izlozba == prijava.id_izlozba
         )
-    
-    existing = db.query(Prijava).filter(
-        Prijava.id_korisnik == current_user.id_korisnik,
-        Prijava.id_izlozba == prijava.id_izlozba
-    ).first()
+    )
     
     if existing:
         raise HTTPException(
@@ -114,6 +219,14 @@ async def create_prijava(
             detail="Već ste prijavljeni na ovu izložbu"
         )
     
+    # Rezervacija i prijava idu u istoj transakciji
+    if not await rezervisi_mesta(db, prijava.id_izlozba, prijava.broj_karata):
+        await db.refresh(izlozba, ["kapacitet", "rezervisano"])
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Nema dovoljno mesta. Preostalo: {izlozba.preostali_kapacitet}"
+        )
+    
     db_prijava = Prijava(
         id_korisnik=current_user.id_korisnik,
         id_izlozba=prijava.id_izlozba,
@@ -122,51 +235,133 @@ async def create_prijava(
     )
     
     db.add(db_prijava)
-    db.commit()
-    db.refresh(db_prijava)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Već ste prijavljeni na ovu izložbu"
+        )
     
-    qr_result = generate_qr_code(
+    db_prijava.qr_kod = generate_qr_data(
         prijava_id=db_prijava.id_prijava,
         korisnik_id=current_user.id_korisnik,
         izlozba_id=prijava.id_izlozba,
         broj_karata=prijava.broj_karata
     )
     
-    db_prijava.qr_kod = qr_result["qr_data"]
-    db_prijava.slika_qr = qr_result["qr_image"]
+    # Email sa kartom ide u outbox u istoj transakciji; šalje ga worker
+    zakazi_kartu(db, db_prijava, current_user, izlozba)
+    # Menja se preostali kapacitet u odgovorima izložbi
+    zabelezi_izmenu(db, IZLOZBE)
+    await db.commit()
+    probudi_worker()
     
-    email_sent = send_registration_email(
-        email=current_user.email,
-        korisnik_ime=current_user.puno_ime,
-        izlozba_naslov=izlozba.naslov,
-        qr_image=qr_result["qr_image"],
-        broj_karata=prijava.broj_karata,
-        datum_izlozbe=f"{izlozba.datum_pocetka} - {izlozba.datum_zavrsetka}",
-        lokacija=f"{izlozba.lokacija.naziv}, {izlozba.lokacija.adresa}" if izlozba.lokacija else None
+    return await db.scalar(
+        select(Prijava)
+        .options(*prijava_response_options())
+        .filter(Prijava.id_prijava == db_prijava.id_prijava)
+        .execution_options(populate_existing=True)
     )
+
+
+@router.post("/validate", response_model=ValidacijaResponse)
+async def validate_prijava(
+    data: PrijavaValidate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Korisnik = Depends(get_current_admin)
+):
+    status_karte, prijava = await validiraj_kartu(db, data.qr_kod, data.id_izlozba)
     
-    if email_sent:
-        db_prijava.email_poslat = True
-        db_prijava.datum_slanja_emaila = datetime.utcnow()
+    if status_karte == VEC_VALIDIRANO:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Karta je već validirana"
+        )
     
-    db.commit()
-    db.refresh(db_prijava)
+    if status_karte != VALIDIRANO:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Karta nije pronađena"
+        )
     
-    return db_prijava
+    return prijava
 
 
+@router.post("/validate/batch", response_model=List[ValidacijaStavka])
+async def validate_prijave_batch(
+    data: PrijavaValidateBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: Korisnik = Depends(get_current_admin)
+):
+    rezultati = await validiraj_karte(db, data.qr_kodovi, data.id_izlozba)
+    return [
+        {"qr_kod": kod, "status": status_karte, "prijava": prijava}
+        for kod, status_karte, prijava in rezultati
+    ]
 
 
+@router.post("/reissue", response_model=List[PrijavaResponse])
+async def reissue_prijave(
+    data: PrijavaReissue,
+    db: AsyncSession = Depends(get_db),
+    current_user: Korisnik = Depends(get_current_admin)
+):
+    """
+    Izdaje nove karte za nevalidirane prijave (stari QR kodovi prestaju da važe).
+    Sve slike se crtaju jednim poslom u QR pool-u, a nove karte idu mejlom.
+    """
+    prijave = (await db.scalars(
+        select(Prijava)
+        .options(
+            selectinload(Prijava.korisnik),
+            selectinload(Prijava.izlozba).selectinload(Izlozba.lokacija)
+        )
+        .filter(
+            Prijava.id_prijava.in_(data.id_prijave),
+            Prijava.validirano.is_not(True)
+        )
+    )).all()
+    
+    # Karte koje još čekaju slanje nose stari QR kod
+    if prijave:
+        await otkazi_karte(db, [prijava.id_prijava for prijava in prijave])
+    
+    for prijava in prijave:
+        prijava.qr_kod = generate_qr_data(
+            prijava_id=prijava.id_prijava,
+            korisnik_id=prijava.id_korisnik,
+            izlozba_id=prijava.id_izlozba,
+            broj_karata=prijava.broj_karata
+        )
+        zakazi_kartu(db, prijava, prijava.korisnik, prijava.izlozba, nova_karta=True)
+    
+    await render_qr_batch([prijava.qr_kod for prijava in prijave])
+    await db.commit()
+    probudi_worker()
+    
+    prijave = await db.scalars(
+        select(Prijava)
+        .options(*prijava_response_options())
+        .filter(Prijava.id_prijava.in_([prijava.id_prijava for prijava in prijave]))
+        .order_by(Prijava.id_prijava)
+        .execution_options(populate_existing=True)
+    )
+    return prijave.all()
+
 
 @router.delete("/{prijava_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_prijava(
     prijava_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_user_required)
 ):
-    prijava = db.query(Prijava).filter(
-        Prijava.id_prijava == prijava_id
-    ).first()
+    # Red se zaključava: istovremeno otkazivanje iste prijave čeka ovo,
+    # a zatim je ne nalazi - mesta se vraćaju samo jednom
+    prijava = await db.scalar(
+        select(Prijava).filter(Prijava.id_prijava == prijava_id).with_for_update()
+    )
     
     if not prijava:
         raise HTTPException(
@@ -185,7 +380,9 @@ async def delete_prijava(
     
 
     
-    db.delete(prijava)
-    db.commit()
+    await oslobodi_mesta(db, prijava.id_izlozba, prijava.broj_karata)
+    await db.delete(prijava)
+    zabelezi_izmenu(db, IZLOZBE)
+    await db.commit()
     
     return None
@@ -1,30 +1,49 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
 from app.models.slika import Slika
 from app.models.korisnik import Korisnik
 from app.schemas.slika import SlikaCreate, SlikaUpdate, SlikaResponse
 from app.utils.dependencies import get_current_admin
 from app.services import artic_service
+from app.utils.pagination import Keyset, NEXT_CURSOR_HEADER
+from app.utils.response_cache import SLIKE
+from app.services.invalidacija_service import zabelezi_izmenu
 
 router = APIRouter(prefix="/api/slike", tags=["Slike"])
 
+SLIKE_KEYSET = Keyset("slike", Slika.redosled, Slika.id_slika)
+
 
 @router.get("/", response_model=List[SlikaResponse])
 async def list_slike(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     istaknuta: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(
+        None, description="Keyset paginacija: prazan string za prvu stranu, zatim X-Next-Cursor header"
+    ),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Slika)
+    query = select(Slika)
     
     if istaknuta is not None:
         query = query.filter(Slika.istaknuta == istaknuta)
     
-    slike = query.order_by(Slika.redosled).offset(skip).limit(limit).all()
-    return slike
+    if cursor is not None:
+        slike = await db.scalars(SLIKE_KEYSET.apply(query, cursor, limit))
+        slike, next_cursor = SLIKE_KEYSET.page(slike.all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return slike
+    
+    slike = await db.scalars(
+        query.order_by(*SLIKE_KEYSET.order_by()).offset(skip).limit(limit)
+    )
+    return slike.all()
 
 
 @router.get("/artic")
@@ -57,9 +76,9 @@ async def list_artic_artworks(
 @router.get("/{slika_id}", response_model=SlikaResponse)
 async def get_slika(
     slika_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    slika = db.query(Slika).filter(Slika.id_slika == slika_id).first()
+    slika = await db.get(Slika, slika_id)
     
     if not slika:
         raise HTTPException(
@@ -73,14 +92,15 @@ async def get_slika(
 @router.post("/", response_model=SlikaResponse, status_code=status.HTTP_201_CREATED)
 async def create_slika(
     slika: SlikaCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
     db_slika = Slika(**slika.model_dump())
     
     db.add(db_slika)
-    db.commit()
-    db.refresh(db_slika)
+    zabelezi_izmenu(db, SLIKE)
+    await db.commit()
+    await db.refresh(db_slika)
     
     return db_slika
 
@@ -88,7 +108,7 @@ async def create_slika(
 @router.post("/from-artic", response_model=SlikaResponse, status_code=status.HTTP_201_CREATED)
 async def create_slika_from_artic(
     artwork_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
     artwork = await artic_service.get_artwork_by_id(artwork_id)
@@ -103,8 +123,9 @@ async def create_slika_from_artic(
     db_slika = Slika(**slika_data)
     
     db.add(db_slika)
-    db.commit()
-    db.refresh(db_slika)
+    zabelezi_izmenu(db, SLIKE)
+    await db.commit()
+    await db.refresh(db_slika)
     
     return db_slika
 
@@ -113,10 +134,10 @@ async def create_slika_from_artic(
 async def update_slika(
     slika_id: int,
     slika_update: SlikaUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    slika = db.query(Slika).filter(Slika.id_slika == slika_id).first()
+    slika = await db.get(Slika, slika_id)
     
     if not slika:
         raise HTTPException(
@@ -129,8 +150,9 @@ async def update_slika(
     for field, value in update_data.items():
         setattr(slika, field, value)
     
-    db.commit()
-    db.refresh(slika)
+    zabelezi_izmenu(db, SLIKE)
+    await db.commit()
+    await db.refresh(slika)
     
     return slika
 
@@ -138,10 +160,10 @@ async def update_slika(
 @router.delete("/{slika_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_slika(
     slika_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Korisnik = Depends(get_current_admin)
 ):
-    slika = db.query(Slika).filter(Slika.id_slika == slika_id).first()
+    slika = await db.get(Slika, slika_id)
     
     if not slika:
         raise HTTPException(
@@ -149,7 +171,8 @@ async def delete_slika(
             detail="Slika nije pronađena"
         )
     
-    db.delete(slika)
-    db.commit()
+    await db.delete(slika)
+    zabelezi_izmenu(db, SLIKE)
+    await db.commit()
     
     return None
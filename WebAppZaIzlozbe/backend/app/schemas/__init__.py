@@ -11,7 +11,7 @@ from app.schemas.slika import (
     SlikaCreate, SlikaUpdate, SlikaResponse
 )
 from app.schemas.izlozba import (
-    IzlozbaCreate, IzlozbaUpdate, IzlozbaResponse, IzlozbaListResponse
+    IzlozbaCreate, IzlozbaUpdate, IzlozbaResponse, IzlozbaSazetak, IzlozbaListResponse
 )
 from app.schemas.prijava import (
     PrijavaCreate, PrijavaUpdate, PrijavaResponse
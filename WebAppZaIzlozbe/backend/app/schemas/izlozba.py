@@ -67,10 +67,44 @@ class IzlozbaResponse(IzlozbaBase):
         from_attributes = True
 
 
+class IzlozbaSazetak(BaseModel):
+    """
+    Stavka liste izložbi. Podrazumevano sadrži samo polja kartice;
+    ?fields= bira polja, a ?include= dodaje lokaciju i slike.
+    Polja koja nisu tražena se ne šalju.
+    """
+
+    id_izlozba: int
+    slug: Optional[str] = None
+    naslov: Optional[str] = None
+    kratak_opis: Optional[str] = None
+    opis: Optional[str] = None
+    datum_pocetka: Optional[date] = None
+    datum_zavrsetka: Optional[date] = None
+    thumbnail: Optional[str] = None
+    osmislio: Optional[str] = None
+    aktivan: Optional[bool] = None
+    objavljeno: Optional[bool] = None
+    kapacitet: Optional[int] = None
+    preostali_kapacitet: Optional[int] = None
+    id_lokacija: Optional[int] = None
+    naziv_lokacije: Optional[str] = None
+    grad: Optional[str] = None
+    datum_kreiranja: Optional[datetime] = None
+    datum_izmene: Optional[datetime] = None
+    lokacija: Optional[LokacijaResponse] = None
+    slika_naslovna: Optional[SlikaResponse] = None
+    slike: Optional[List[SlikaResponse]] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class IzlozbaListResponse(BaseModel):
 
-    items: List[IzlozbaResponse]
-    total: int
+    items: List[IzlozbaSazetak]
+    total: Optional[int] = None  # None u keyset režimu
     page: int
     per_page: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
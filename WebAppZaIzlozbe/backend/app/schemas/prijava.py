@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 from app.schemas.izlozba import IzlozbaResponse
 
@@ -31,7 +31,6 @@ class PrijavaResponse(BaseModel):
     qr_kod: Optional[str] = None
     validirano: bool
     datum_registracije: datetime
-    slika_qr: Optional[str] = None
     verifikovan_email: bool
     email_poslat: bool
     datum_slanja_emaila: Optional[datetime] = None
@@ -41,6 +40,37 @@ class PrijavaResponse(BaseModel):
         from_attributes = True
 
 
+class PrijavaReissue(BaseModel):
+
+    id_prijave: List[int] = Field(..., min_length=1, max_length=500)
+
+
 class PrijavaValidate(BaseModel):
 
+    qr_kod: str = Field(..., max_length=500)
+    # Izložba na čijem se ulazu skenira (opciono)
+    id_izlozba: Optional[int] = None
+
+
+class PrijavaValidateBatch(BaseModel):
+
+    qr_kodovi: List[str] = Field(..., min_length=1, max_length=1000)
+    id_izlozba: Optional[int] = None
+
+
+class ValidacijaResponse(BaseModel):
+
+    id_prijava: int
+    id_korisnik: int
+    id_izlozba: int
+    broj_karata: int
+
+    class Config:
+        from_attributes = True
+
+
+class ValidacijaStavka(BaseModel):
+
     qr_kod: str
+    status: Literal["validirano", "vec_validirano", "nepoznato"]
+    prijava: Optional[ValidacijaResponse] = None
@@ -2,6 +2,8 @@
 Pydantic šeme za JWT Token
 """
 from typing import Optional
+from fastapi import Form
+from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
 
@@ -9,9 +11,41 @@ class Token(BaseModel):
     """Šema za JWT token odgovor"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    """Šema za osvežavanje tokena i odjavu"""
+    refresh_token: str
 
 
 class TokenData(BaseModel):
     """Šema za podatke iz tokena"""
     username: Optional[str] = None
     user_id: Optional[int] = None
+
+
+class LoginForm(OAuth2PasswordRequestForm):
+    """
+    OAuth2 forma za prijavu, sa istim ograničenjima dužine kao pri
+    registraciji - predugačak unos se odbija (422) pre bilo kakvog rada.
+    """
+
+    def __init__(
+        self,
+        username: str = Form(..., max_length=50),
+        password: str = Form(..., max_length=100),
+        grant_type: Optional[str] = Form(None, pattern="^password$"),
+        scope: str = Form(""),
+        client_id: Optional[str] = Form(None),
+        client_secret: Optional[str] = Form(None),
+    ):
+        super().__init__(
+            grant_type=grant_type,
+            username=username,
+            password=password,
+            scope=scope,
+            client_id=client_id,
+            client_secret=client_secret,
+        )
@@ -0,0 +1,181 @@
+"""
+Keš odgovora Art Institute API-ja
+Dva nivoa: LRU u memoriji i SQLite fajl na disku, koji preživljava restart.
+Istekla stavka se vraća odmah, a nova verzija se preuzima u pozadini
+(stale-while-revalidate), pa pretraga radi i dok je API nedostupan.
+Nepostojeći radovi (404) pamte se kratko, kao negativan rezultat.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Stavka(NamedTuple):
+    vrednost: Any  # None = rad ne postoji (404)
+    sveze_do: float
+    cuvati_do: float
+
+
+_memorija: "OrderedDict[str, _Stavka]" = OrderedDict()
+_baza: Optional[sqlite3.Connection] = None
+# Čitanja i upisi idu iz niti (asyncio.to_thread) - jedna konekcija, jedan lock
+_baza_lock = threading.Lock()
+_osvezavanja: Dict[str, asyncio.Task] = {}
+_statistika = {"memorija": 0, "disk": 0, "zastarelo": 0, "promasaji": 0, "greske": 0}
+
+
+def _otvori(putanja: str) -> sqlite3.Connection:
+    if os.path.dirname(putanja):
+        os.makedirs(os.path.dirname(putanja), exist_ok=True)
+    conn = sqlite3.connect(putanja, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS artic_kes ("
+        "kljuc TEXT PRIMARY KEY, vrednost TEXT, sveze_do REAL NOT NULL, cuvati_do REAL NOT NULL)"
+    )
+    conn.execute("DELETE FROM artic_kes WHERE cuvati_do <= ?", (time.time(),))
+    return conn
+
+
+def _u_memoriju(kljuc: str, stavka: _Stavka) -> None:
+    _memorija[kljuc] = stavka
+    _memorija.move_to_end(kljuc)
+    while len(_memorija) > settings.ARTIC_CACHE_SIZE:
+        _memorija.popitem(last=False)
+
+
+def _sa_diska(kljuc: str) -> Optional[_Stavka]:
+    with _baza_lock:
+        if _baza is None:
+            return None
+        red = _baza.execute(
+            "SELECT vrednost, sveze_do, cuvati_do FROM artic_kes WHERE kljuc = ?", (kljuc,)
+        ).fetchone()
+    if red is None:
+        return None
+    return _Stavka(json.loads(red[0]) if red[0] is not None else None, red[1], red[2])
+
+
+def _na_disk(kljuc: str, stavka: _Stavka) -> None:
+    vrednost = json.dumps(stavka.vrednost) if stavka.vrednost is not None else None
+    with _baza_lock:
+        if _baza is None:
+            return
+        _baza.execute(
+            "INSERT OR REPLACE INTO artic_kes (kljuc, vrednost, sveze_do, cuvati_do) VALUES (?, ?, ?, ?)",
+            (kljuc, vrednost, stavka.sveze_do, stavka.cuvati_do)
+        )
+
+
+async def _nadji(kljuc: str, sada: float) -> Optional[_Stavka]:
+    """Traži stavku u memoriji pa na disku; stavke posle cuvati_do ne važe"""
+    stavka = _memorija.get(kljuc)
+    if stavka is not None:
+        _memorija.move_to_end(kljuc)
+        izvor = "memorija"
+    else:
+        stavka = await asyncio.to_thread(_sa_diska, kljuc)
+        if stavka is None:
+            return None
+        # Dok se čitao disk, novija verzija je možda već stigla u memoriju
+        if kljuc in _memorija:
+            stavka = _memorija[kljuc]
+        else:
+            _u_memoriju(kljuc, stavka)
+        izvor = "disk"
+    if sada >= stavka.cuvati_do:
+        _memorija.pop(kljuc, None)
+        return None
+    _statistika[izvor] += 1
+    return stavka
+
+
+async def _ucitaj_i_sacuvaj(kljuc: str, ucitaj: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+    vrednost = await ucitaj()
+    sada = time.time()
+    if vrednost is None:
+        rok = sada + settings.ARTIC_CACHE_NEGATIVE_SECONDS
+        stavka = _Stavka(None, rok, rok)
+    else:
+        stavka = _Stavka(vrednost, sada + ttl, sada + ttl + settings.ARTIC_CACHE_STALE_SECONDS)
+    _u_memoriju(kljuc, stavka)
+    await asyncio.to_thread(_na_disk, kljuc, stavka)
+    return vrednost
+
+
+def _osvezi_u_pozadini(kljuc: str, ucitaj: Callable[[], Awaitable[Any]], ttl: float) -> None:
+    """Jedno osvežavanje po ključu; greška ostavlja staru kopiju"""
+    if kljuc in _osvezavanja:
+        return
+
+    async def osvezi() -> None:
+        try:
+            await _ucitaj_i_sacuvaj(kljuc, ucitaj, ttl)
+        except Exception as e:
+            _statistika["greske"] += 1
+            # Stara kopija ostaje; prekidač se već javio u logu
+            logger.info(f"Osvežavanje Artic keša ({kljuc}) nije uspelo: {e}")
+        finally:
+            _osvezavanja.pop(kljuc, None)
+
+    _osvezavanja[kljuc] = asyncio.create_task(osvezi())
+
+
+async def kesirano(
+    kljuc: str,
+    ucitaj: Callable[[], Awaitable[Any]],
+    ttl: float,
+    osvezi: bool = True
+) -> Any:
+    """
+    Vraća vrednost iz keša ili je preuzima funkcijom `ucitaj`.
+    `ucitaj` vraća None kada podatak ne postoji (404), a baca izuzetak
+    kod privremene greške - tada se ništa ne pamti i izuzetak ide pozivaocu.
+    Sa osvezi=False zastarela stavka se vraća bez osvežavanja u pozadini.
+    """
+    sada = time.time()
+    stavka = await _nadji(kljuc, sada)
+    if stavka is None:
+        _statistika["promasaji"] += 1
+        return await _ucitaj_i_sacuvaj(kljuc, ucitaj, ttl)
+    if sada >= stavka.sveze_do:
+        _statistika["zastarelo"] += 1
+        if osvezi:
+            _osvezi_u_pozadini(kljuc, ucitaj, ttl)
+    return stavka.vrednost
+
+
+def start_artic_cache() -> None:
+    """Otvara SQLite nivo i briše stavke kojima je prošao rok čuvanja"""
+    global _baza
+    if _baza is None and settings.ARTIC_CACHE_PATH:
+        try:
+            _baza = _otvori(settings.ARTIC_CACHE_PATH)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Artic keš na disku nije dostupan ({e}), koristi se samo memorija")
+
+
+async def stop_artic_cache() -> None:
+    global _baza
+    for zadatak in list(_osvezavanja.values()):
+        zadatak.cancel()
+    await asyncio.gather(*_osvezavanja.values(), return_exceptions=True)
+    _osvezavanja.clear()
+    with _baza_lock:
+        if _baza is not None:
+            _baza.close()
+            _baza = None
+
+
+def artic_cache_stats() -> dict:
+    return {"stavki_u_memoriji": len(_memorija), "sqlite": _baza is not None, **_statistika}
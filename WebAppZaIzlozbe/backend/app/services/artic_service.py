@@ -1,6 +1,11 @@
+import asyncio
+import importlib.util
+import time
+from collections import deque
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
+from app.services.artic_cache import kesirano
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,34 +13,209 @@ logger = logging.getLogger(__name__)
 IIIF_BASE_URL = "https://www.artic.edu/iiif/2"
 
 
+class ArticNedostupan(httpx.HTTPError):
+    """Prekidač je otvoren - zahtev se ne šalje"""
+
+
+class CircuitBreaker:
+    """
+    Prekidač za spoljni API. Kada među pozivima iz poslednjih `prozor`
+    sekundi udeo neuspelih dostigne `udeo` (uz bar `min_poziva`), pozivi se
+    `pauza` sekundi odbijaju odmah. Zatim jedan probni poziv odlučuje da li
+    se zatvara.
+    """
+
+    def __init__(self, min_poziva: int, udeo: float, pauza: float, prozor: float):
+        self.min_poziva = min_poziva
+        self.udeo = udeo
+        self.pauza = pauza
+        self.prozor = prozor
+        # (vreme, uspeh) za pozive u prozoru
+        self._ishodi: deque = deque()
+        self._otvoren_do = 0.0
+        self._proba = False
+
+    @property
+    def stanje(self) -> str:
+        if not self._otvoren_do:
+            return "zatvoren"
+        return "otvoren" if time.monotonic() < self._otvoren_do else "poluotvoren"
+
+    def _zabelezi(self, uspeh: bool) -> None:
+        sada = time.monotonic()
+        self._ishodi.append((sada, uspeh))
+        while self._ishodi[0][0] < sada - self.prozor:
+            self._ishodi.popleft()
+
+    def dozvoli(self) -> bool:
+        stanje = self.stanje
+        if stanje == "zatvoren":
+            return True
+        if stanje == "otvoren" or self._proba:
+            return False
+        self._proba = True
+        return True
+
+    def uspeh(self) -> None:
+        if self._otvoren_do:
+            logger.info("Artic API ponovo odgovara, prekidač zatvoren")
+            self._otvoren_do = 0.0
+            self._ishodi.clear()
+        self._proba = False
+        self._zabelezi(True)
+
+    def odustani(self) -> None:
+        """Poziv je prekinut pre odgovora - ne broji se, probno mesto se oslobađa"""
+        self._proba = False
+
+    def greska(self) -> None:
+        self._proba = False
+        if self._otvoren_do:
+            # Probni poziv nije uspeo
+            self._otvoren_do = time.monotonic() + self.pauza
+            return
+        self._zabelezi(False)
+        neuspelih = sum(1 for _, uspeh in self._ishodi if not uspeh)
+        if len(self._ishodi) >= self.min_poziva and neuspelih / len(self._ishodi) >= self.udeo:
+            self._otvoren_do = time.monotonic() + self.pauza
+            logger.warning(
+                f"Artic API: {neuspelih}/{len(self._ishodi)} neuspelih poziva, "
+                f"prekidač otvoren na {self.pauza:.0f} s"
+            )
+
+
+_client: Optional[httpx.AsyncClient] = None
+_http2 = False
+_prekidac = CircuitBreaker(
+    settings.ARTIC_BREAKER_MIN_CALLS,
+    settings.ARTIC_BREAKER_ERROR_RATE,
+    settings.ARTIC_BREAKER_OPEN_SECONDS,
+    settings.ARTIC_BREAKER_WINDOW_SECONDS
+)
+# Isti zahtevi koji su u toku: (url, parametri) -> zajednički zadatak
+_u_toku: Dict[Tuple, asyncio.Task] = {}
+
+
+def start_artic_client() -> None:
+    """Jedan klijent za ceo životni vek aplikacije - konekcije se ponovo koriste"""
+    global _client, _http2
+    if _client is not None:
+        return
+    _http2 = importlib.util.find_spec("h2") is not None
+    if not _http2:
+        logger.warning("Paket h2 nije instaliran, Artic API se poziva preko HTTP/1.1")
+    _client = httpx.AsyncClient(
+        http2=_http2,
+        timeout=httpx.Timeout(settings.ARTIC_TIMEOUT_SECONDS, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=settings.ARTIC_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.ARTIC_MAX_CONNECTIONS,
+            keepalive_expiry=60.0
+        )
+    )
+
+
+async def stop_artic_client() -> None:
+    global _client
+    for zadatak in list(_u_toku.values()):
+        zadatak.cancel()
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def artic_client_stats() -> dict:
+    return {
+        "prekidac": _prekidac.stanje,
+        "u_toku": len(_u_toku),
+        "http2": _http2,
+    }
+
+
+async def _posalji(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not _prekidac.dozvoli():
+        raise ArticNedostupan("Artic API je privremeno isključen (prekidač otvoren)")
+    if _client is None:
+        # Van aplikacije (skripte) klijent se pravi pri prvom pozivu
+        start_artic_client()
+    try:
+        response = await _client.get(url, params=params)
+    except asyncio.CancelledError:
+        # Gašenje aplikacije nije greška API-ja
+        _prekidac.odustani()
+        raise
+    except Exception:
+        _prekidac.greska()
+        raise
+    if response.status_code >= 500 or response.status_code == 429:
+        _prekidac.greska()
+    else:
+        _prekidac.uspeh()
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def _osvezavaj() -> bool:
+    """Dok je prekidač otvoren, zastarele stavke se ne osvežavaju u pozadini"""
+    return _prekidac.stanje != "otvoren"
+
+
+def _zavrsen(kljuc: Tuple, zadatak: asyncio.Task) -> None:
+    _u_toku.pop(kljuc, None)
+    if not zadatak.cancelled():
+        zadatak.exception()  # da greška bez čekalaca ne završi u logu kao nepročitana
+
+
+async def _preuzmi(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Jedan zahtev ka API-ju; None za 404, izuzetak za ostale greške.
+    Isti zahtevi koji stignu dok je prvi u toku čekaju njegov odgovor.
+    """
+    kljuc = (url, tuple(sorted(params.items())))
+    zadatak = _u_toku.get(kljuc)
+    if zadatak is None:
+        zadatak = asyncio.create_task(_posalji(url, params))
+        _u_toku[kljuc] = zadatak
+        zadatak.add_done_callback(lambda z: _zavrsen(kljuc, z))
+    # Prekid jednog čekaoca (npr. klijent zatvori vezu) ne prekida ostale
+    return await asyncio.shield(zadatak)
+
+
 async def fetch_artworks(
     page: int = 1,
     limit: int = 12,
     search: Optional[str] = None
 ) -> Dict[str, Any]:
+    params = {
+        "page": page,
+        "limit": limit,
+        "fields": "id,title,artist_display,date_display,image_id,thumbnail,description"
+    }
+    
+    if search:
+        url = f"{settings.ARTIC_API_BASE_URL}/artworks/search"
+        # Pretraga ne razlikuje velika i mala slova - isti upit, isti ključ
+        params["q"] = " ".join(search.split()).lower()
+    else:
+        url = f"{settings.ARTIC_API_BASE_URL}/artworks"
+    
+    async def ucitaj() -> Optional[Dict[str, Any]]:
+        data = await _preuzmi(url, params)
+        # Čuva se samo ono što ruta koristi
+        return {"data": data.get("data", []), "pagination": data.get("pagination", {})} if data else None
+    
+    kljuc = f"artworks:{page}:{limit}:{params.get('q', '')}"
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            params = {
-                "page": page,
-                "limit": limit,
-                "fields": "id,title,artist_display,date_display,image_id,thumbnail,description"
-            }
-            
-            if search:
-                url = f"{settings.ARTIC_API_BASE_URL}/artworks/search"
-                params["q"] = search
-            else:
-                url = f"{settings.ARTIC_API_BASE_URL}/artworks"
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            return data
-            
+        data = await kesirano(kljuc, ucitaj, settings.ARTIC_CACHE_TTL_SECONDS, _osvezavaj())
+    except ArticNedostupan:
+        return {"data": [], "pagination": {}}
     except httpx.HTTPError as e:
         logger.error(f"Greška pri dohvatanju sa Artic API: {str(e)}")
         return {"data": [], "pagination": {}}
+    
+    return data or {"data": [], "pagination": {}}
 
 
 def get_image_url(image_id: str, size: str = "843,") -> str:
@@ -51,19 +231,21 @@ def get_thumbnail_url(image_id: str) -> str:
 
 
 async def get_artwork_by_id(artwork_id: int) -> Optional[Dict[str, Any]]:
+    url = f"{settings.ARTIC_API_BASE_URL}/artworks/{artwork_id}"
+    params = {
+        "fields": "id,title,artist_display,date_display,image_id,thumbnail,description,dimensions,medium_display"
+    }
+    
+    async def ucitaj() -> Optional[Dict[str, Any]]:
+        data = await _preuzmi(url, params)
+        return data.get("data") if data else None
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            url = f"{settings.ARTIC_API_BASE_URL}/artworks/{artwork_id}"
-            params = {
-                "fields": "id,title,artist_display,date_display,image_id,thumbnail,description,dimensions,medium_display"
-            }
-            
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            return data.get("data")
-            
+        return await kesirano(
+            f"artwork:{artwork_id}", ucitaj, settings.ARTIC_CACHE_ARTWORK_TTL_SECONDS, _osvezavaj()
+        )
+    except ArticNedostupan:
+        return None
     except httpx.HTTPError as e:
         logger.error(f"Greška pri dohvatanju umetničkog rada {artwork_id}: {str(e)}")
         return None
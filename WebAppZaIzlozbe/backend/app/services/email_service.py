@@ -1,86 +1,107 @@
 import logging
-import smtplib
-import base64
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
-from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
 from app.config import settings
+from app.services.smtp_pool import get_smtp_pool, smtp_podesen
 
 logger = logging.getLogger(__name__)
 
 
-def send_email_smtp(to_email: str, subject: str, body_html: str, image_data: Optional[str] = None) -> bool:
+def build_message(
+    to_email: str,
+    subject: str,
+    body_html: str,
+    image_bytes: Optional[bytes] = None
+) -> MIMEMultipart:
+    """Sastavlja MIME poruku; QR kod ide kao inline slika (cid:qr_code)"""
+    msg = MIMEMultipart("related")
+    msg["From"] = settings.SMTP_FROM_EMAIL
+    msg["To"] = to_email
+    msg["Subject"] = subject
+
+    msg_alternative = MIMEMultipart("alternative")
+    msg.attach(msg_alternative)
+
+    # Tekst poruke
+    msg_text = MIMEText(body_html, "html", "utf-8")
+    msg_alternative.attach(msg_text)
+
+    # Dodavanje QR koda ako postoji
+    if image_bytes:
+        img = MIMEImage(image_bytes)
+        img.add_header("Content-ID", "<qr_code>")
+        img.add_header("Content-Disposition", "inline", filename="qr_ticket.png")
+        msg.attach(img)
+
+    return msg
+
+
+async def deliver_email(
+    to_email: str,
+    subject: str,
+    body_html: str,
+    image_bytes: Optional[bytes] = None
+) -> None:
     """
-    Pomoćna funkcija za slanje emaila putem SMTP-a
+    Šalje poruku kroz pool SMTP konekcija.
+    Baca izuzetak ako slanje ne uspe.
     """
-    try:
-        # Kreiranje poruke
-        msg = MIMEMultipart("related")
-        msg["From"] = settings.SMTP_FROM_EMAIL
-        msg["To"] = to_email
-        msg["Subject"] = subject
-
-        msg_alternative = MIMEMultipart("alternative")
-        msg.attach(msg_alternative)
-
-        # Tekst poruke
-        msg_text = MIMEText(body_html, "html", "utf-8")
-        msg_alternative.attach(msg_text)
-
-        # Dodavanje QR koda ako postoji
-        if image_data:
-            # Ukloni header ako postoji (data:image/png;base64,)
-            if "base64," in image_data:
-                image_data = image_data.split("base64,")[1]
-            
-            img_bytes = base64.b64decode(image_data)
-            img = MIMEImage(img_bytes)
-            img.add_header("Content-ID", "<qr_code>")
-            img.add_header("Content-Disposition", "inline", filename="qr_ticket.png")
-            msg.attach(img)
-
-        # Slanje
-        if settings.SMTP_USER == "your_email@gmail.com":
-            # Ako nisu podešeni pravi kredencijali, samo loguj
-            logger.warning("SMTP kredencijali nisu podešeni. Email se ne šalje, samo loguje.")
-            return True
-
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-            
-        return True
+    msg = build_message(to_email, subject, body_html, image_bytes)
+
+    if not smtp_podesen():
+        # Ako nisu podešeni pravi kredencijali, samo loguj
+        logger.warning("SMTP kredencijali nisu podešeni. Email se ne šalje, samo loguje.")
+        return
+
+    await get_smtp_pool().send(msg)
+
+
+async def deliver_many(
+    poruke: List[Tuple[str, str, str, Optional[bytes]]]
+) -> List[Optional[Exception]]:
+    """
+    Šalje više poruka (primalac, naslov, HTML, slika) kroz pool.
+    Vraća grešku (ili None) za svaku poruku, istim redom.
+    """
+    if not smtp_podesen():
+        logger.warning(
+            f"SMTP kredencijali nisu podešeni. Email se ne šalje, samo loguje ({len(poruke)} poruka)."
+        )
+        return [None] * len(poruke)
 
-    except Exception as e:
-        logger.error(f"Greška pri slanju emaila putem SMTP-a: {str(e)}")
-        # Ne vraćamo False odmah ako je greška u konekciji da ne bi blokiralo user flow, 
-        # ali u ovom slučaju funkcija očekuje bool za uspeh.
-        return False
+    return await get_smtp_pool().send_many(
+        [build_message(*poruka) for poruka in poruke]
+    )
 
 
-def send_registration_email(
-    email: str,
+def render_registration_email(
     korisnik_ime: str,
     izlozba_naslov: str,
-    qr_image: str,
     broj_karata: int,
     datum_izlozbe: Optional[str] = None,
-    lokacija: Optional[str] = None
-) -> bool:
-    try:
-        logger.info("=" * 60)
-        logger.info(f"Slanje karte na email: {email}")
-        
-        # HTML template za email
-        html_content = f"""
+    lokacija: Optional[str] = None,
+    nova_karta: bool = False
+) -> Tuple[str, str]:
+    """
+    Vraća (naslov, HTML) poruke sa kartom.
+    Slika QR koda se dodaje pri slanju (cid:qr_code).
+    """
+    uvod = (
+        f"Izdata vam je nova karta za izložbu: <strong>{izlozba_naslov}</strong>. "
+        "Prethodni QR kod više ne važi."
+        if nova_karta else
+        f"Uspešno ste se prijavili za izložbu: <strong>{izlozba_naslov}</strong>"
+    )
+    
+    # HTML template za email
+    html_content = f"""
         <html>
           <body>
             <h2>Potvrda prijave - {izlozba_naslov}</h2>
             <p>Poštovani/a {korisnik_ime},</p>
-            <p>Uspešno ste se prijavili za izložbu: <strong>{izlozba_naslov}</strong></p>
+            <p>{uvod}</p>
             <p><strong>Broj karata:</strong> {broj_karata}</p>
             {f'<p><strong>Datum:</strong> {datum_izlozbe}</p>' if datum_izlozbe else ''}
             {f'<p><strong>Lokacija:</strong> {lokacija}</p>' if lokacija else ''}
@@ -94,24 +115,5 @@ def send_registration_email(
         </html>
         """
 
-        success = send_email_smtp(
-            to_email=email,
-            subject=f"Vaša karta za izložbu: {izlozba_naslov}",
-            body_html=html_content,
-            image_data=qr_image
-        )
-
-        if success:
-            logger.info("Email uspešno poslat.")
-        else:
-            logger.warning("Email NIJE poslat (proverite logove).")
-            
-        logger.info("=" * 60)
-        return success
-        
-    except Exception as e:
-        logger.error(f"Greška u send_registration_email: {str(e)}")
-        return False
-
-
-
+    naslov = "Nova karta" if nova_karta else "Vaša karta"
+    return f"{naslov} za izložbu: {izlozba_naslov}", html_content
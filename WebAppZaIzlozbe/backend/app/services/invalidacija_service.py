@@ -0,0 +1,157 @@
+"""
+Invalidacija keševa između procesa (Postgres LISTEN/NOTIFY)
+Upis beleži izmenu u sesiji; pri commit-u se u istoj transakciji šalje
+NOTIFY (stiže samo ako commit uspe), a lokalni keš se čisti odmah posle
+commit-a. Svaki proces sluša kanal na posebnoj konekciji i primenjuje
+tuđe izmene. Posle prekida veze keševi se prazne cele, jer su poruke
+poslate u međuvremenu izgubljene.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import to_async_url
+
+logger = logging.getLogger(__name__)
+
+KANAL = "invalidacija_keseva"
+
+# NOTIFY prima najviše 8000 bajtova; duža lista izmena zamenjuje se praznjenjem
+_NAJVECA_PORUKA = 7500
+
+# Sopstvene poruke se preskaču - primenjene su već posle commit-a
+_PROCES = uuid.uuid4().hex[:12]
+
+# tip izmene -> obrada (prima vrednost iz poruke); funkcije za potpuno praznjenje
+_obrade: Dict[str, Callable[[Any], None]] = {}
+_praznjenja: List[Callable[[], None]] = []
+
+_slusalac: Optional[asyncio.Task] = None
+_statistika = {"povezan": False, "primljeno": 0, "povezivanja": 0}
+
+
+def registruj_obradu(tip: str, obrada: Callable[[Any], None], isprazni: Optional[Callable[[], None]] = None) -> None:
+    """Modul sa kešom prijavljuje kako se primenjuje izmena i kako se keš prazni"""
+    _obrade[tip] = obrada
+    if isprazni is not None and isprazni not in _praznjenja:
+        _praznjenja.append(isprazni)
+
+
+def zabelezi_izmenu(db: AsyncSession, tip: str, vrednost: Any = None) -> None:
+    """
+    Beleži izmenu u transakciji pozivaoca (bez commit-a).
+    Vrednost mora da se serijalizuje u JSON (npr. id).
+    """
+    izmene = db.info.setdefault("izmene_keseva", [])
+    if [tip, vrednost] not in izmene:
+        izmene.append([tip, vrednost])
+
+
+def _primeni(izmene: list) -> None:
+    for tip, vrednost in izmene:
+        obrada = _obrade.get(tip)
+        if obrada is not None:
+            obrada(vrednost)
+
+
+def _isprazni_sve() -> None:
+    for isprazni in _praznjenja:
+        isprazni()
+
+
+@event.listens_for(Session, "before_commit")
+def _posalji_notify(session: Session) -> None:
+    izmene = session.info.get("izmene_keseva")
+    if not izmene or not settings.INVALIDATION_BUS:
+        return
+    poruka = json.dumps({"p": _PROCES, "i": izmene}, separators=(",", ":"))
+    if len(poruka.encode()) > _NAJVECA_PORUKA:
+        poruka = json.dumps({"p": _PROCES, "sve": True})
+    session.execute(select(func.pg_notify(KANAL, poruka)))
+
+
+@event.listens_for(Session, "after_commit")
+def _posle_commit(session: Session) -> None:
+    _primeni(session.info.pop("izmene_keseva", []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _posle_rollback(session: Session) -> None:
+    session.info.pop("izmene_keseva", None)
+
+
+def _primi(conn, pid: int, kanal: str, payload: str) -> None:
+    try:
+        poruka = json.loads(payload)
+    except ValueError:
+        logger.warning(f"Neispravna poruka na kanalu {kanal}: {payload[:100]}")
+        return
+    if poruka.get("p") == _PROCES:
+        return
+    _statistika["primljeno"] += 1
+    if poruka.get("sve"):
+        _isprazni_sve()
+    else:
+        _primeni(poruka.get("i", []))
+
+
+async def _slusaj() -> None:
+    """Drži LISTEN konekciju; posle prekida se ponovo povezuje uz rastuću pauzu"""
+    dsn = to_async_url(settings.DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://", 1)
+    pauza = 1.0
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            prekinuta = asyncio.Event()
+            conn.add_termination_listener(lambda c: prekinuta.set())
+            await conn.add_listener(KANAL, _primi)
+            # Šta je stiglo dok veza nije postojala - ne zna se
+            _isprazni_sve()
+            _statistika["povezan"] = True
+            _statistika["povezivanja"] += 1
+            pauza = 1.0
+            logger.info(f"Slušanje kanala {KANAL} pokrenuto")
+            while not prekinuta.is_set():
+                try:
+                    await asyncio.wait_for(prekinuta.wait(), settings.INVALIDATION_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    # Bez saobraćaja se prekinuta TCP veza ne bi primetila
+                    await conn.fetchval("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Veza za invalidaciju keševa prekinuta: {e}")
+        finally:
+            _statistika["povezan"] = False
+            if conn is not None and not conn.is_closed():
+                conn.terminate()
+        await asyncio.sleep(pauza)
+        pauza = min(pauza * 2, 30.0)
+
+
+def start_invalidacija() -> None:
+    global _slusalac
+    if settings.INVALIDATION_BUS and _slusalac is None:
+        _slusalac = asyncio.create_task(_slusaj())
+
+
+async def stop_invalidacija() -> None:
+    global _slusalac
+    if _slusalac is not None:
+        _slusalac.cancel()
+        try:
+            await _slusalac
+        except asyncio.CancelledError:
+            pass
+        _slusalac = None
+
+
+def invalidacija_stats() -> dict:
+    return dict(_statistika)
@@ -0,0 +1,301 @@
+"""
+Servis za kampanje (obaveštenja o izmenama i podsetnici)
+Primaoci se čitaju u delovima (keyset po id_prijava, svaki deo kratkom
+transakcijom), poruke se šalju u serijama kroz SMTP pool, a posle svake
+serije se upisuje checkpoint, pa se prekinuta kampanja nastavlja od
+poslednje obrađene prijave.
+"""
+import asyncio
+import html
+import logging
+from datetime import date, datetime, timedelta
+from string import Template
+from typing import Optional
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox, KAMPANJA
+from app.models.izlozba import Izlozba
+from app.models.kampanja import Kampanja, IZMENA, PODSETNIK, NA_CEKANJU, U_TOKU, ZAVRSENA
+from app.models.korisnik import Korisnik
+from app.models.prijava import Prijava
+from app.services.email_service import deliver_many
+
+logger = logging.getLogger(__name__)
+
+# Šabloni se kompajliraju jednom; polja kampanje ($naslov, $datum, $lokacija,
+# $izmene) popunjavaju se jednom po kampanji, a $ime i $broj_karata po primaocu
+_NASLOVI = {
+    IZMENA: Template("Izmena izložbe: $naslov"),
+    PODSETNIK: Template("Podsetnik: izložba $naslov počinje sutra"),
+}
+
+_SADRZAJ = {
+    IZMENA: Template("""
+        <html>
+          <body>
+            <h2>Izmena - $naslov</h2>
+            <p>Poštovani/a $ime,</p>
+            <p>Došlo je do izmene izložbe <strong>$naslov</strong> na koju ste prijavljeni. $izmene</p>
+            <p><strong>Datum:</strong> $datum</p>
+            <p><strong>Lokacija:</strong> $lokacija</p>
+            <p><strong>Broj karata:</strong> $broj_karata</p>
+            <p>Vaša karta i dalje važi.</p>
+            <p>Srdačan pozdrav,<br>Tim Galerija</p>
+          </body>
+        </html>
+        """),
+    PODSETNIK: Template("""
+        <html>
+          <body>
+            <h2>Podsetnik - $naslov</h2>
+            <p>Poštovani/a $ime,</p>
+            <p>Izložba <strong>$naslov</strong> na koju ste prijavljeni počinje sutra.</p>
+            <p><strong>Datum:</strong> $datum</p>
+            <p><strong>Lokacija:</strong> $lokacija</p>
+            <p><strong>Broj karata:</strong> $broj_karata</p>
+            <p>Ne zaboravite QR kod za ulaz.</p>
+            <p>Srdačan pozdrav,<br>Tim Galerija</p>
+          </body>
+        </html>
+        """),
+}
+
+_worker: Optional[asyncio.Task] = None
+_probudi: Optional[asyncio.Event] = None
+
+
+def _sabloni_kampanje(kampanja: Kampanja, izlozba: Izlozba) -> tuple:
+    """
+    Popunjava polja kampanje i vraća šablone (naslov, HTML) koji čekaju samo
+    primaoca. '$' u vrednostima se udvaja da ga drugi prolaz ne tumači kao polje.
+    """
+    polja = {
+        "naslov": izlozba.naslov,
+        "datum": f"{izlozba.datum_pocetka} - {izlozba.datum_zavrsetka}",
+        "lokacija": f"{izlozba.lokacija.naziv}, {izlozba.lokacija.adresa}" if izlozba.lokacija else "-",
+        "izmene": kampanja.poruka or "",
+    }
+    naslov = Template(_NASLOVI[kampanja.vrsta].safe_substitute(
+        {k: v.replace("$", "$$") for k, v in polja.items()}
+    ))
+    sadrzaj = Template(_SADRZAJ[kampanja.vrsta].safe_substitute(
+        {k: html.escape(v).replace("$", "$$") for k, v in polja.items()}
+    ))
+    return naslov, sadrzaj
+
+
+def zakazi_kampanju(
+    db: AsyncSession,
+    izlozba_id: int,
+    vrsta: str,
+    poruka: Optional[str] = None,
+    kljuc: Optional[str] = None
+) -> Kampanja:
+    """Dodaje kampanju (bez commit-a - ide u transakciju pozivaoca)"""
+    kampanja = Kampanja(id_izlozba=izlozba_id, vrsta=vrsta, poruka=poruka, kljuc=kljuc)
+    db.add(kampanja)
+    return kampanja
+
+
+def probudi_kampanje() -> None:
+    """Javlja worker-u da postoji nova kampanja (posle commit-a)"""
+    if _probudi is not None:
+        _probudi.set()
+
+
+async def zakazi_podsetnike() -> int:
+    """
+    Pravi podsetnike za objavljene izložbe koje počinju sutra.
+    Ključ sadrži datum početka, pa se isti podsetnik ne pravi dva puta,
+    a pomeren datum dobija novi.
+    """
+    sutra = date.today() + timedelta(days=1)
+    async with AsyncSessionLocal() as db:
+        izlozbe = (await db.scalars(
+            select(Izlozba.id_izlozba).where(
+                Izlozba.datum_pocetka == sutra,
+                Izlozba.objavljeno.is_(True),
+                Izlozba.aktivan.is_(True)
+            )
+        )).all()
+        novih = 0
+        for izlozba_id in izlozbe:
+            result = await db.execute(
+                pg_insert(Kampanja)
+                .values(
+                    id_izlozba=izlozba_id,
+                    vrsta=PODSETNIK,
+                    kljuc=f"{PODSETNIK}:{izlozba_id}:{sutra.isoformat()}",
+                    datum_kreiranja=datetime.utcnow()
+                )
+                .on_conflict_do_nothing(index_elements=[Kampanja.kljuc])
+            )
+            novih += result.rowcount
+        await db.commit()
+    return novih
+
+
+async def _zauzmi_kampanju() -> Optional[int]:
+    """
+    Zauzima jednu kampanju koja čeka ili čiji je worker prestao da radi
+    (isteklo zakljucano_do). Vraća njen id ili None.
+    """
+    sada = datetime.utcnow()
+    slobodna = (
+        select(Kampanja.id_kampanja)
+        .where(or_(
+            Kampanja.status == NA_CEKANJU,
+            and_(Kampanja.status == U_TOKU, Kampanja.zakljucano_do < sada)
+        ))
+        .order_by(Kampanja.id_kampanja)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with AsyncSessionLocal() as db:
+        kampanja_id = await db.scalar(
+            update(Kampanja)
+            .where(Kampanja.id_kampanja == slobodna)
+            .values(
+                status=U_TOKU,
+                zakljucano_do=sada + timedelta(seconds=settings.KAMPANJE_LEASE_SECONDS)
+            )
+            .returning(Kampanja.id_kampanja)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    return kampanja_id
+
+
+async def pokreni_kampanju(kampanja_id: int) -> None:
+    """
+    Šalje kampanju od poslednjeg checkpoint-a do kraja.
+    Svaki deo primalaca čita se posebnim kratkim upitom (id_prijava posle
+    checkpoint-a), pa tokom slanja nije otvorena nijedna transakcija.
+    """
+    async with AsyncSessionLocal() as db:
+        kampanja = await db.get(Kampanja, kampanja_id)
+        if kampanja is None:
+            # Obrisana (npr. sa izložbom) dok je čekala u redu
+            logger.info(f"Kampanja {kampanja_id} više ne postoji")
+            return
+        izlozba = await db.scalar(
+            select(Izlozba)
+            .options(selectinload(Izlozba.lokacija))
+            .where(Izlozba.id_izlozba == kampanja.id_izlozba)
+        )
+        naslov, sadrzaj = _sabloni_kampanje(kampanja, izlozba)
+        await db.commit()
+
+        while True:
+            deo = (await db.execute(
+                select(
+                    Prijava.id_prijava,
+                    Prijava.broj_karata,
+                    Korisnik.email,
+                    Korisnik.ime,
+                    Korisnik.prezime
+                )
+                .join(Korisnik, Korisnik.id_korisnik == Prijava.id_korisnik)
+                .where(
+                    Prijava.id_izlozba == kampanja.id_izlozba,
+                    Prijava.id_prijava > kampanja.poslednja_prijava
+                )
+                .order_by(Prijava.id_prijava)
+                .limit(settings.KAMPANJE_CHUNK)
+            )).all()
+            # Transakcija čitanja se zatvara pre slanja
+            await db.commit()
+            if not deo:
+                break
+
+            poruke = []
+            for red in deo:
+                ime = f"{red.ime} {red.prezime}"
+                poruke.append((
+                    red.email,
+                    naslov.substitute(ime=ime, broj_karata=red.broj_karata),
+                    sadrzaj.substitute(ime=html.escape(ime), broj_karata=red.broj_karata),
+                    None,
+                ))
+
+            greske = await deliver_many(poruke)
+
+            # Neuspele poruke preuzima outbox (ponovni pokušaji, dead-letter)
+            neuspelo = 0
+            for red, poruka, greska in zip(deo, poruke, greske):
+                if greska is None:
+                    continue
+                neuspelo += 1
+                db.add(EmailOutbox(
+                    id_prijava=red.id_prijava,
+                    vrsta=KAMPANJA,
+                    primalac=poruka[0],
+                    naslov=poruka[1],
+                    sadrzaj=poruka[2],
+                    pokusaja=1,
+                    poslednja_greska=str(greska)[:1000]
+                ))
+
+            kampanja.poslednja_prijava = deo[-1].id_prijava
+            kampanja.poslato += len(deo) - neuspelo
+            kampanja.neuspelo += neuspelo
+            kampanja.zakljucano_do = datetime.utcnow() + timedelta(
+                seconds=settings.KAMPANJE_LEASE_SECONDS
+            )
+            await db.commit()
+
+        kampanja.status = ZAVRSENA
+        kampanja.zakljucano_do = None
+        kampanja.datum_zavrsetka = datetime.utcnow()
+        await db.commit()
+        logger.info(
+            f"Kampanja {kampanja_id} ({kampanja.vrsta}) završena: "
+            f"{kampanja.poslato} poslato, {kampanja.neuspelo} u outbox-u"
+        )
+
+
+async def kampanja_worker() -> None:
+    """Petlja worker-a: pravi podsetnike i šalje kampanje koje čekaju"""
+    global _probudi
+    if _probudi is None:
+        _probudi = asyncio.Event()
+    logger.info("Worker za kampanje pokrenut")
+    while True:
+        _probudi.clear()
+        try:
+            await zakazi_podsetnike()
+            while (kampanja_id := await _zauzmi_kampanju()) is not None:
+                await pokreni_kampanju(kampanja_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Greška u worker-u za kampanje: {e}")
+
+        try:
+            await asyncio.wait_for(_probudi.wait(), settings.KAMPANJE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_kampanja_worker() -> None:
+    global _worker, _probudi
+    if _worker is None:
+        _probudi = asyncio.Event()
+        _worker = asyncio.create_task(kampanja_worker())
+
+
+async def stop_kampanja_worker() -> None:
+    global _worker, _probudi
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
+        _probudi = None
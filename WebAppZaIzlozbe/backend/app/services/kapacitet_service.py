@@ -0,0 +1,86 @@
+"""
+Servis za kapacitet izložbi
+Održava brojač rezervisanih mesta (izlozbe.rezervisano)
+"""
+import logging
+from sqlalchemy import update, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.izlozba import Izlozba
+from app.models.prijava import Prijava
+
+logger = logging.getLogger(__name__)
+
+
+async def rezervisi_mesta(db: AsyncSession, izlozba_id: int, broj_karata: int) -> bool:
+    """
+    Rezerviše mesta jednim uslovnim UPDATE-om.
+    Vraća False ako nema dovoljno slobodnih mesta - prodaja preko
+    kapaciteta nije moguća ni pri konkurentnim zahtevima.
+    """
+    result = await db.execute(
+        update(Izlozba)
+        .where(
+            Izlozba.id_izlozba == izlozba_id,
+            Izlozba.kapacitet - Izlozba.rezervisano >= broj_karata
+        )
+        .values(rezervisano=Izlozba.rezervisano + broj_karata)
+        .returning(Izlozba.rezervisano)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def oslobodi_mesta(db: AsyncSession, izlozba_id: int, broj_karata: int) -> None:
+    """Vraća mesta otkazane prijave"""
+    await db.execute(
+        update(Izlozba)
+        .where(Izlozba.id_izlozba == izlozba_id)
+        .values(rezervisano=func.greatest(Izlozba.rezervisano - broj_karata, 0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def oslobodi_mesta_korisnika(db: AsyncSession, korisnik_id: int) -> None:
+    """Vraća mesta svih prijava korisnika (pre brisanja naloga)"""
+    po_izlozbi = (
+        select(
+            Prijava.id_izlozba,
+            func.sum(Prijava.broj_karata).label("broj_karata")
+        )
+        .where(Prijava.id_korisnik == korisnik_id)
+        .group_by(Prijava.id_izlozba)
+        .subquery()
+    )
+    await db.execute(
+        update(Izlozba)
+        .where(Izlozba.id_izlozba == po_izlozbi.c.id_izlozba)
+        .values(
+            rezervisano=func.greatest(Izlozba.rezervisano - po_izlozbi.c.broj_karata, 0)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def uskladi_rezervisano(db: AsyncSession) -> int:
+    """
+    Ponovo izračunava brojač iz tabele prijave.
+    Vraća broj izložbi čiji je brojač ispravljen.
+    """
+    stvarno = func.coalesce(
+        select(func.sum(Prijava.broj_karata))
+        .where(Prijava.id_izlozba == Izlozba.id_izlozba)
+        .correlate(Izlozba)
+        .scalar_subquery(),
+        0
+    )
+    result = await db.execute(
+        update(Izlozba)
+        .where(Izlozba.rezervisano.is_distinct_from(stvarno))
+        .values(rezervisano=stvarno)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+    if result.rowcount:
+        logger.warning(f"Usklađen brojač rezervacija za {result.rowcount} izložbi")
+    return result.rowcount
@@ -0,0 +1,251 @@
+"""
+Servis za email outbox
+Poruke se upisuju u tabelu email_outbox u transakciji prijave,
+a pozadinski worker ih šalje sa ponovnim pokušajima.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox, KARTA, NA_CEKANJU, U_SLANJU, POSLATO, NEUSPELO, OTKAZANO
+from app.models.izlozba import Izlozba
+from app.models.korisnik import Korisnik
+from app.models.prijava import Prijava
+from app.services.email_service import deliver_many, render_registration_email
+from app.services.qr_service import render_qr_batch
+
+logger = logging.getLogger(__name__)
+
+_worker: Optional[asyncio.Task] = None
+_probudi: Optional[asyncio.Event] = None
+
+
+def zakazi_kartu(
+    db: AsyncSession,
+    prijava: Prijava,
+    korisnik: Korisnik,
+    izlozba: Izlozba,
+    nova_karta: bool = False
+) -> EmailOutbox:
+    """
+    Dodaje poruku sa kartom u outbox (bez commit-a - ide u transakciju pozivaoca).
+    """
+    naslov, sadrzaj = render_registration_email(
+        korisnik_ime=korisnik.puno_ime,
+        izlozba_naslov=izlozba.naslov,
+        broj_karata=prijava.broj_karata,
+        datum_izlozbe=f"{izlozba.datum_pocetka} - {izlozba.datum_zavrsetka}",
+        lokacija=f"{izlozba.lokacija.naziv}, {izlozba.lokacija.adresa}" if izlozba.lokacija else None,
+        nova_karta=nova_karta
+    )
+    poruka = EmailOutbox(
+        id_prijava=prijava.id_prijava,
+        primalac=korisnik.email,
+        naslov=naslov,
+        sadrzaj=sadrzaj,
+        qr_kod=prijava.qr_kod
+    )
+    db.add(poruka)
+    return poruka
+
+
+async def otkazi_karte(db: AsyncSession, prijave_ids: List[int]) -> None:
+    """
+    Otkazuje neposlate poruke sa kartama datih prijava (bez commit-a).
+    Koristi se pri ponovnom izdavanju - stari QR kod više ne važi.
+    """
+    await db.execute(
+        update(EmailOutbox)
+        .where(
+            EmailOutbox.id_prijava.in_(prijave_ids),
+            EmailOutbox.status == NA_CEKANJU,
+            EmailOutbox.vrsta == KARTA
+        )
+        .values(status=OTKAZANO)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def probudi_worker() -> None:
+    """Javlja worker-u da su stigle nove poruke (posle commit-a)"""
+    if _probudi is not None:
+        _probudi.set()
+
+
+def _odlaganje(pokusaja: int) -> timedelta:
+    """Eksponencijalno odlaganje sa malo nasumičnosti"""
+    sekundi = min(
+        settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (pokusaja - 1),
+        settings.EMAIL_RETRY_MAX_SECONDS
+    )
+    return timedelta(seconds=sekundi * random.uniform(0.8, 1.2))
+
+
+async def _posalji(poruke: List[EmailOutbox]) -> List[Optional[Exception]]:
+    """Crta sve QR kodove jednim poslom i šalje seriju kroz SMTP pool"""
+    kodovi = [poruka.qr_kod for poruka in poruke if poruka.qr_kod]
+    slike = dict(zip(kodovi, await render_qr_batch(kodovi))) if kodovi else {}
+    return await deliver_many([
+        (poruka.primalac, poruka.naslov, poruka.sadrzaj, slike.get(poruka.qr_kod))
+        for poruka in poruke
+    ])
+
+
+async def _zauzmi(limit: int) -> Tuple[List[EmailOutbox], datetime]:
+    """
+    Zauzima seriju poruka kojima je došlo vreme (ili čiji je zakup istekao)
+    i odmah potvrđuje transakciju. Vraća poruke i rok zakupa.
+    FOR UPDATE SKIP LOCKED omogućava više worker-a nad istom tabelom.
+    """
+    sada = datetime.utcnow()
+    rok = sada + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+    slobodne = (
+        select(EmailOutbox.id_email)
+        .where(or_(
+            and_(EmailOutbox.status == NA_CEKANJU, EmailOutbox.sledeci_pokusaj <= sada),
+            # Worker koji ih je zauzeo prestao je da radi
+            and_(EmailOutbox.status == U_SLANJU, EmailOutbox.zakljucano_do < sada)
+        ))
+        .order_by(EmailOutbox.sledeci_pokusaj)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    async with AsyncSessionLocal() as db:
+        poruke = (await db.scalars(
+            update(EmailOutbox)
+            .where(EmailOutbox.id_email.in_(slobodne))
+            .values(status=U_SLANJU, zakljucano_do=rok)
+            .returning(EmailOutbox)
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+    return poruke, rok
+
+
+async def _zabelezi(poruke: List[EmailOutbox], greske: List[Optional[Exception]], rok: datetime) -> None:
+    """
+    Upisuje ishod slanja. Menjaju se samo poruke koje su i dalje zauzete
+    ovim zakupom - posle isteka ih je mogao preuzeti drugi worker.
+    """
+    sada = datetime.utcnow()
+    nase = and_(EmailOutbox.status == U_SLANJU, EmailOutbox.zakljucano_do == rok)
+    async with AsyncSessionLocal() as db:
+        poslate = [poruka.id_email for poruka, e in zip(poruke, greske) if e is None]
+        if poslate:
+            prijave = (await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id_email.in_(poslate), nase)
+                .values(status=POSLATO, datum_slanja=sada, zakljucano_do=None)
+                .returning(EmailOutbox.id_prijava, EmailOutbox.vrsta)
+                .execution_options(synchronize_session=False)
+            )).all()
+            # Obaveštenja iz kampanja ne znače da je karta stigla
+            prijave = [
+                red.id_prijava for red in prijave
+                if red.vrsta == KARTA and red.id_prijava is not None
+            ]
+            if prijave:
+                await db.execute(
+                    update(Prijava)
+                    .where(Prijava.id_prijava.in_(prijave))
+                    .values(email_poslat=True, datum_slanja_emaila=sada)
+                    .execution_options(synchronize_session=False)
+                )
+
+        for poruka, e in zip(poruke, greske):
+            if e is None:
+                continue
+            pokusaja = poruka.pokusaja + 1
+            vrednosti = {
+                "pokusaja": pokusaja,
+                "poslednja_greska": str(e)[:1000],
+                "zakljucano_do": None,
+            }
+            if pokusaja >= settings.EMAIL_MAX_POKUSAJA:
+                vrednosti["status"] = NEUSPELO
+                logger.error(
+                    f"Email {poruka.id_email} za {poruka.primalac} nije poslat "
+                    f"posle {pokusaja} pokušaja: {e}"
+                )
+            else:
+                vrednosti["status"] = NA_CEKANJU
+                vrednosti["sledeci_pokusaj"] = sada + _odlaganje(pokusaja)
+                logger.warning(f"Email {poruka.id_email} nije poslat ({e}), novi pokušaj kasnije")
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id_email == poruka.id_email, nase)
+                .values(**vrednosti)
+                .execution_options(synchronize_session=False)
+            )
+
+        await db.commit()
+
+
+async def obradi_outbox(limit: Optional[int] = None) -> int:
+    """
+    Šalje jednu seriju poruka kojima je došlo vreme.
+    Poruke se zauzimaju i ishod se upisuje kratkim transakcijama; tokom
+    slanja ne drži se ni transakcija ni zaključani redovi.
+    Vraća broj obrađenih poruka.
+    """
+    poruke, rok = await _zauzmi(limit or settings.EMAIL_OUTBOX_BATCH)
+    if not poruke:
+        return 0
+
+    try:
+        greske = await _posalji(poruke)
+    except Exception as e:
+        # Npr. QR pool nije dostupan - cela serija ide u ponovni pokušaj
+        greske = [e] * len(poruke)
+
+    await _zabelezi(poruke, greske, rok)
+    return len(poruke)
+
+
+async def outbox_worker() -> None:
+    """Petlja worker-a: prazni outbox, pa čeka novu poruku ili istek intervala"""
+    global _probudi
+    if _probudi is None:
+        _probudi = asyncio.Event()
+    logger.info("Email outbox worker pokrenut")
+    while True:
+        # Brisanje pre obrade - poruka upisana u toku obrade ne čeka interval
+        _probudi.clear()
+        try:
+            obradjeno = await obradi_outbox()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Greška u email outbox worker-u: {e}")
+            obradjeno = 0
+
+        if obradjeno:
+            continue
+        try:
+            await asyncio.wait_for(_probudi.wait(), settings.EMAIL_OUTBOX_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_outbox_worker() -> None:
+    global _worker, _probudi
+    if _worker is None:
+        _probudi = asyncio.Event()
+        _worker = asyncio.create_task(outbox_worker())
+
+
+async def stop_outbox_worker() -> None:
+    global _worker, _probudi
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
+        _probudi = None
@@ -1,9 +1,85 @@
 import qrcode
+import qrcode.image.svg
 import json
-import base64
+import hashlib
+import hmac
+import secrets
+import struct
+import time
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from io import BytesIO
-from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Kompaktan format karte (verzija 2):
+#   "IZ:" + base45(verzija | prijava | korisnik | izlozba | broj karata | izdato | nonce | potpis)
+# Nonce razlikuje karte izdate u istoj sekundi (ponovno izdavanje).
+# Base45 koristi samo alfanumerički skup QR koda, pa simbol ostaje mali.
+QR_PREFIX = "IZ:"
+QR_VERZIJA = 2
+_TELO = struct.Struct(">BIIIBII")
+_POTPIS_DUZINA = 8
+
+_BASE45 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_BASE45_INDEX = {znak: i for i, znak in enumerate(_BASE45)}
+
+
+class KartaQR(NamedTuple):
+    prijava_id: int
+    korisnik_id: int
+    izlozba_id: int
+    broj_karata: int
+    verzija: int
+
+
+def base45_encode(data: bytes) -> str:
+    """Base45 kodiranje (RFC 9285)"""
+    znakovi = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        znakovi += [_BASE45[c], _BASE45[d], _BASE45[e]]
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        znakovi += [_BASE45[c], _BASE45[d]]
+    return "".join(znakovi)
+
+
+def base45_decode(text: str) -> bytes:
+    """Base45 dekodiranje; baca ValueError za neispravan ulaz"""
+    try:
+        brojevi = [_BASE45_INDEX[znak] for znak in text]
+    except KeyError:
+        raise ValueError("base45 znak")
+    rezultat = bytearray()
+    for i in range(0, len(brojevi), 3):
+        grupa = brojevi[i:i + 3]
+        if len(grupa) == 3:
+            n = grupa[0] + grupa[1] * 45 + grupa[2] * 45 * 45
+            if n > 0xFFFF:
+                raise ValueError("base45 vrednost")
+            rezultat += n.to_bytes(2, "big")
+        elif len(grupa) == 2:
+            n = grupa[0] + grupa[1] * 45
+            if n > 0xFF:
+                raise ValueError("base45 vrednost")
+            rezultat.append(n)
+        else:
+            raise ValueError("base45 dužina")
+    return bytes(rezultat)
+
+
+def _sign(telo: bytes) -> bytes:
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), b"karta:" + telo, hashlib.sha256
+    ).digest()[:_POTPIS_DUZINA]
 
 
 def generate_qr_data(
@@ -12,45 +88,186 @@ def generate_qr_data(
     izlozba_id: int,
     broj_karata: int
 ) -> str:
-    data = {
-        "prijava_id": prijava_id,
-        "korisnik_id": korisnik_id,
-        "izlozba_id": izlozba_id,
-        "broj_karata": broj_karata,
-        "datum_generisanja": datetime.utcnow().isoformat(),
-        "verzija": "1.0"
-    }
-    return json.dumps(data)
+    telo = _TELO.pack(
+        QR_VERZIJA, prijava_id, korisnik_id, izlozba_id, broj_karata,
+        int(time.time()), secrets.randbits(32)
+    )
+    return QR_PREFIX + base45_encode(telo + _sign(telo))
 
 
-def generate_qr_code(
-    prijava_id: int,
-    korisnik_id: int,
-    izlozba_id: int,
-    broj_karata: int
-) -> Dict[str, str]:
-    qr_data = generate_qr_data(prijava_id, korisnik_id, izlozba_id, broj_karata)
+def decode_qr_data(qr_data: str) -> Optional[KartaQR]:
+    """
+    Čita sadržaj skeniranog QR koda bez pristupa bazi.
+    Vraća None ako kod nije karta ili potpis nije ispravan.
+    Stare JSON karte (verzija 1.0) nisu potpisane - proverava ih samo baza.
+    """
+    if qr_data.startswith(QR_PREFIX):
+        try:
+            sirovo = base45_decode(qr_data[len(QR_PREFIX):])
+        except ValueError:
+            return None
+        if len(sirovo) != _TELO.size + _POTPIS_DUZINA:
+            return None
+        telo, potpis = sirovo[:_TELO.size], sirovo[_TELO.size:]
+        if not hmac.compare_digest(potpis, _sign(telo)):
+            return None
+        verzija, prijava_id, korisnik_id, izlozba_id, broj_karata, _, _ = _TELO.unpack(telo)
+        if verzija != QR_VERZIJA:
+            return None
+        return KartaQR(prijava_id, korisnik_id, izlozba_id, broj_karata, verzija)
     
+    try:
+        data = json.loads(qr_data)
+        return KartaQR(
+            int(data["prijava_id"]),
+            int(data["korisnik_id"]),
+            int(data["izlozba_id"]),
+            int(data["broj_karata"]),
+            1
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _make_qr(qr_data: str, **kwargs):
+    # Verzija simbola se bira prema sadržaju (fit=True)
     qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
         box_size=10,
         border=4,
+        **kwargs
     )
     qr.add_data(qr_data)
     qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
+    return qr
+
+
+def render_qr_png(qr_data: str) -> bytes:
+    """PNG slika QR koda"""
+    img = _make_qr(qr_data).make_image(fill_color="black", back_color="white")
     buffer = BytesIO()
     img.save(buffer, format="PNG")
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    
+    return buffer.getvalue()
+
+
+def render_qr_svg(qr_data: str) -> bytes:
+    """SVG slika QR koda"""
+    img = _make_qr(qr_data, image_factory=qrcode.image.svg.SvgPathImage).make_image()
+    return img.to_string(encoding="utf-8")
+
+
+_RENDERERI = {"png": render_qr_png, "svg": render_qr_svg}
+
+
+def _render_many(qr_kodovi: List[str], format: str) -> List[bytes]:
+    """Izvršava se u pool-u - cela serija je jedan posao"""
+    render = _RENDERERI[format]
+    return [render(qr_data) for qr_data in qr_kodovi]
+
+
+# Pool za crtanje QR kodova (CPU posao van event loop-a)
+_executor: Optional[Executor] = None
+_vrsta_pool = ""
+_broj_radnika = 0
+_poslova_na_cekanju = 0
+_karata_na_cekanju = 0
+_zavrseno_poslova = 0
+
+# Poslednje nacrtane slike: (format, qr_kod) -> bajtovi
+_kes: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+
+def start_qr_pool() -> None:
+    """Pravi pool prema QR_EXECUTOR ("process" ili "thread") i QR_WORKERS"""
+    global _executor, _vrsta_pool, _broj_radnika
+    if _executor is not None:
+        return
+    _broj_radnika = settings.QR_WORKERS or os.cpu_count() or 1
+    if settings.QR_EXECUTOR == "process":
+        try:
+            _executor = ProcessPoolExecutor(max_workers=_broj_radnika)
+            _vrsta_pool = "process"
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"Process pool nije dostupan ({e}), koriste se niti")
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_broj_radnika, thread_name_prefix="qr")
+        _vrsta_pool = "thread"
+    logger.info(f"QR pool: {_vrsta_pool}, {_broj_radnika} radnika")
+
+
+def stop_qr_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def qr_pool_stats() -> Dict[str, object]:
+    """Metrike pool-a (izlažu se na /health)"""
     return {
-        "qr_data": qr_data,
-        "qr_image": f"data:image/png;base64,{img_base64}"
+        "vrsta": _vrsta_pool or None,
+        "radnika": _broj_radnika,
+        "poslova_na_cekanju": _poslova_na_cekanju,
+        "karata_na_cekanju": _karata_na_cekanju,
+        "zavrseno_poslova": _zavrseno_poslova,
+        "kesirano_slika": len(_kes),
     }
 
 
+def _iz_kesa(format: str, qr_data: str) -> Optional[bytes]:
+    slika = _kes.get((format, qr_data))
+    if slika is not None:
+        _kes.move_to_end((format, qr_data))
+    return slika
+
+
+def _u_kes(format: str, qr_data: str, slika: bytes) -> None:
+    _kes[(format, qr_data)] = slika
+    _kes.move_to_end((format, qr_data))
+    while len(_kes) > settings.QR_CACHE_SIZE:
+        _kes.popitem(last=False)
+
+
+async def render_qr_batch(qr_kodovi: List[str], format: str = "png") -> List[bytes]:
+    """
+    Crta više QR kodova jednim poslom u pool-u.
+    Slike koje su već u kešu se ne crtaju ponovo.
+    """
+    global _poslova_na_cekanju, _karata_na_cekanju, _zavrseno_poslova
+    slike = [_iz_kesa(format, qr_data) for qr_data in qr_kodovi]
+    nedostaju = list(dict.fromkeys(
+        qr_data for qr_data, slika in zip(qr_kodovi, slike) if slika is None
+    ))
+    if not nedostaju:
+        return slike
+    
+    if _executor is None:
+        start_qr_pool()
+    
+    _poslova_na_cekanju += 1
+    _karata_na_cekanju += len(nedostaju)
+    try:
+        nacrtane = await asyncio.get_running_loop().run_in_executor(
+            _executor, _render_many, nedostaju, format
+        )
+    finally:
+        _poslova_na_cekanju -= 1
+        _karata_na_cekanju -= len(nedostaju)
+        _zavrseno_poslova += 1
+    
+    nove = dict(zip(nedostaju, nacrtane))
+    for qr_data, slika in nove.items():
+        _u_kes(format, qr_data, slika)
+    return [slika if slika is not None else nove[qr_data] for qr_data, slika in zip(qr_kodovi, slike)]
+
+
+async def render_qr(qr_data: str, format: str = "png") -> bytes:
+    """Slika jednog QR koda (keš, pa pool)"""
+    return (await render_qr_batch([qr_data], format))[0]
+
+
+def qr_etag(qr_data: str) -> str:
+    """ETag slike - zavisi samo od sadržaja QR koda"""
+    return '"' + hashlib.sha256(qr_data.encode("utf-8")).hexdigest()[:32] + '"'
 
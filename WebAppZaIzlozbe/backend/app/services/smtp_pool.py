@@ -0,0 +1,158 @@
+"""
+Pool SMTP konekcija
+Drži nekoliko otvorenih (TLS + login) konekcija i koristi ih za više poruka,
+uz ograničenje broja poruka u sekundi.
+"""
+import asyncio
+import logging
+import time
+from email.message import Message
+from typing import List, Optional
+import aiosmtplib
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Greške posle kojih se konekcija zatvara i pravi nova
+_GRESKE_KONEKCIJE = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+)
+
+
+def smtp_podesen() -> bool:
+    """Da li su podešeni pravi SMTP podaci (inače se poruke samo loguju)"""
+    return settings.SMTP_USER != "your_email@gmail.com"
+
+
+class RateLimiter:
+    """Token bucket - najviše `rate` poruka u sekundi, uz kratke nalete do `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokeni = float(self.burst)
+        self._poslednje = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                sada = time.monotonic()
+                self._tokeni = min(self.burst, self._tokeni + (sada - self._poslednje) * self.rate)
+                self._poslednje = sada
+                if self._tokeni >= 1:
+                    self._tokeni -= 1
+                    return
+                await asyncio.sleep((1 - self._tokeni) / self.rate)
+
+
+class SMTPPool:
+    """
+    Pool od najviše `size` autentifikovanih konekcija.
+    Poruke se šalju paralelno koliko ima konekcija, a ukupan tempo
+    ograničava RateLimiter.
+    """
+
+    def __init__(self, size: int, rate: float):
+        self.size = size
+        self._slobodne: List[aiosmtplib.SMTP] = []
+        self._mesta = asyncio.Semaphore(size)
+        self._limiter = RateLimiter(rate)
+
+    async def _prijava(self, smtp: aiosmtplib.SMTP) -> None:
+        await smtp.connect()
+        if settings.SMTP_USER and settings.SMTP_PASSWORD:
+            await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+
+    async def _uzmi(self) -> aiosmtplib.SMTP:
+        """Zauzima mesto u pool-u i vraća otvorenu konekciju"""
+        await self._mesta.acquire()
+        try:
+            smtp = self._slobodne.pop() if self._slobodne else aiosmtplib.SMTP(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                use_tls=settings.SMTP_SSL,
+                start_tls=settings.SMTP_STARTTLS and not settings.SMTP_SSL,
+                timeout=settings.SMTP_TIMEOUT,
+            )
+            if not smtp.is_connected:
+                await self._prijava(smtp)
+            return smtp
+        except BaseException:
+            self._mesta.release()
+            raise
+
+    def _vrati(self, smtp: aiosmtplib.SMTP) -> None:
+        self._slobodne.append(smtp)
+        self._mesta.release()
+
+    def _otpisi(self, smtp: aiosmtplib.SMTP) -> None:
+        smtp.close()
+        self._mesta.release()
+
+    async def send(self, msg: Message) -> None:
+        """
+        Šalje jednu poruku. Ako je server zatvorio konekciju (npr. posle
+        neaktivnosti), poruka se jednom ponovi na novoj konekciji.
+        """
+        await self._limiter.acquire()
+        for pokusaj in range(2):
+            smtp = await self._uzmi()
+            try:
+                await smtp.send_message(msg)
+            except _GRESKE_KONEKCIJE:
+                self._otpisi(smtp)
+                if pokusaj:
+                    raise
+                continue
+            except Exception:
+                # Npr. odbijen primalac - konekcija je i dalje ispravna
+                self._vrati(smtp)
+                raise
+            except BaseException:
+                # Prekid usred slanja - stanje konekcije je nepoznato
+                self._otpisi(smtp)
+                raise
+            self._vrati(smtp)
+            return
+
+    async def send_many(self, poruke: List[Message]) -> List[Optional[Exception]]:
+        """
+        Šalje više poruka kroz pool.
+        Vraća grešku (ili None) za svaku poruku, istim redom.
+        """
+        rezultati = await asyncio.gather(
+            *(self.send(msg) for msg in poruke), return_exceptions=True
+        )
+        return [r if isinstance(r, Exception) else None for r in rezultati]
+
+    async def close(self) -> None:
+        while self._slobodne:
+            smtp = self._slobodne.pop()
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+
+
+_pool: Optional[SMTPPool] = None
+
+
+def get_smtp_pool() -> SMTPPool:
+    """Pool se pravi pri prvom slanju, u event loop-u koji ga koristi"""
+    global _pool
+    if _pool is None:
+        _pool = SMTPPool(settings.SMTP_POOL_SIZE, settings.SMTP_RATE_PER_SECOND)
+    return _pool
+
+
+async def close_smtp_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,244 @@
+"""
+Servis za tokene
+Rotacija refresh tokena i lista opozvanih access tokena.
+Opozivi se upisuju u bazu, a svaki proces drži njihovu kopiju u memoriji
+i osvežava je na REVOCATION_SYNC_SECONDS - provera tokena ne ide u bazu.
+Ostali procesi nov opoziv dobijaju odmah, preko NOTIFY-a pri commit-u.
+"""
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.korisnik import Korisnik
+from app.models.opozvan_token import OpozvanToken
+from app.models.refresh_token import RefreshToken
+from app.services.invalidacija_service import registruj_obradu, zabelezi_izmenu
+
+logger = logging.getLogger(__name__)
+
+# Istekli redovi se brišu iz baze najviše jednom na sat
+CISCENJE_SEKUNDI = 3600
+
+# jti -> ističe (unix); korisnik -> (opozvano u, ističe)
+_opozvani_jti: Dict[str, float] = {}
+_opozvani_korisnici: Dict[int, Tuple[float, float]] = {}
+
+_sync: Optional[asyncio.Task] = None
+_poslednje_ciscenje = 0.0
+
+
+def _unix(dt: datetime) -> float:
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _hes(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _zapamti(jti: Optional[str], korisnik_id: Optional[int], opozvano: float, istice: float) -> None:
+    if jti is not None:
+        _opozvani_jti[jti] = istice
+    elif korisnik_id is not None:
+        postojeci = _opozvani_korisnici.get(korisnik_id)
+        if postojeci is None or postojeci[0] < opozvano:
+            _opozvani_korisnici[korisnik_id] = (opozvano, istice)
+
+
+# Opoziv iz drugog procesa: [jti, id korisnika, opozvano, ističe]
+OPOZIV = "opoziv"
+registruj_obradu(OPOZIV, lambda opoziv: _zapamti(*opoziv))
+
+
+def je_opozvan(payload: dict) -> bool:
+    """Proverava dekodovani access token samo u memoriji"""
+    jti = payload.get("jti")
+    if jti is not None and jti in _opozvani_jti:
+        return True
+    opoziv = _opozvani_korisnici.get(payload.get("user_id"))
+    return opoziv is not None and payload.get("iat", 0) <= opoziv[0]
+
+
+async def opozovi_token(db: AsyncSession, payload: dict) -> None:
+    """Opoziva jedan access token (odjava); commit radi pozivalac"""
+    jti = payload.get("jti")
+    if jti is None:
+        return
+    await db.execute(
+        pg_insert(OpozvanToken)
+        .values(
+            jti=jti,
+            id_korisnik=payload.get("user_id"),
+            datum_opoziva=datetime.utcnow(),
+            istice=datetime.utcfromtimestamp(payload["exp"])
+        )
+        .on_conflict_do_nothing(index_elements=[OpozvanToken.jti])
+    )
+    # Lokalna kopija se menja tek posle uspešnog commit-a (after_commit)
+    zabelezi_izmenu(db, OPOZIV, [jti, None, time.time(), payload["exp"]])
+
+
+async def opozovi_korisnika(db: AsyncSession, korisnik_id: int) -> None:
+    """
+    Opoziva sve tokene korisnika izdate do sada (deaktivacija, brisanje).
+    Commit radi pozivalac.
+    """
+    sada = datetime.utcnow()
+    istice = sada + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    db.add(OpozvanToken(id_korisnik=korisnik_id, datum_opoziva=sada, istice=istice))
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id_korisnik == korisnik_id, RefreshToken.datum_opoziva.is_(None))
+        .values(datum_opoziva=sada)
+        .execution_options(synchronize_session=False)
+    )
+    # Lokalna kopija se menja tek posle uspešnog commit-a (after_commit)
+    zabelezi_izmenu(db, OPOZIV, [None, korisnik_id, _unix(sada), _unix(istice)])
+
+
+def izdaj_refresh_token(db: AsyncSession, korisnik_id: int, porodica: Optional[str] = None) -> str:
+    """Pravi novi refresh token (commit radi pozivalac) i vraća ga"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        id_korisnik=korisnik_id,
+        token_hash=_hes(token),
+        porodica=porodica or secrets.token_hex(16),
+        istice=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+
+async def rotiraj_refresh_token(db: AsyncSession, token: str) -> Optional[Tuple[Korisnik, str]]:
+    """
+    Troši refresh token i izdaje novi iz iste porodice.
+    Ponovna upotreba već iskorišćenog tokena znači da je ukraden, pa se
+    opoziva cela porodica. Vraća (korisnik, novi token) ili None.
+    """
+    sada = datetime.utcnow()
+    # Uslovni UPDATE - od dva zahteva sa istim tokenom uspeva samo jedan
+    red = (await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == _hes(token),
+            RefreshToken.datum_opoziva.is_(None),
+            RefreshToken.istice > sada
+        )
+        .values(datum_opoziva=sada)
+        .returning(RefreshToken.id_korisnik, RefreshToken.porodica)
+        .execution_options(synchronize_session=False)
+    )).first()
+
+    if red is None:
+        porodica = await db.scalar(
+            select(RefreshToken.porodica).where(
+                RefreshToken.token_hash == _hes(token),
+                RefreshToken.datum_opoziva.is_not(None)
+            )
+        )
+        # Porodica odjavljene sesije je već cela opozvana - to nije krađa
+        if porodica is not None and await opozovi_porodicu(db, porodica):
+            logger.warning(f"Ponovljen refresh token, opozvana porodica {porodica}")
+        return None
+
+    korisnik = await db.get(Korisnik, red.id_korisnik)
+    if korisnik is None or not korisnik.aktivan:
+        return None
+    return korisnik, izdaj_refresh_token(db, korisnik.id_korisnik, red.porodica)
+
+
+async def opozovi_porodicu(db: AsyncSession, porodica: str) -> int:
+    """Opoziva sve važeće tokene porodice; vraća njihov broj"""
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.porodica == porodica, RefreshToken.datum_opoziva.is_(None))
+        .values(datum_opoziva=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def opozovi_refresh_token(db: AsyncSession, token: str, korisnik_id: int) -> None:
+    """Odjava: opoziva porodicu refresh tokena ako pripada korisniku"""
+    porodica = await db.scalar(
+        select(RefreshToken.porodica).where(
+            RefreshToken.token_hash == _hes(token),
+            RefreshToken.id_korisnik == korisnik_id
+        )
+    )
+    if porodica is not None:
+        await opozovi_porodicu(db, porodica)
+
+
+async def sinhronizuj_opozive() -> None:
+    """
+    Učitava važeće opozive iz baze (i opozive drugih procesa) i izbacuje
+    istekle iz memorije. Opozivi se nikad ne povlače, pa se samo dodaje.
+    """
+    global _poslednje_ciscenje
+    sada = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        redovi = (await db.execute(
+            select(
+                OpozvanToken.jti,
+                OpozvanToken.id_korisnik,
+                OpozvanToken.datum_opoziva,
+                OpozvanToken.istice
+            ).where(OpozvanToken.istice > sada)
+        )).all()
+
+        if time.monotonic() - _poslednje_ciscenje > CISCENJE_SEKUNDI:
+            await db.execute(delete(OpozvanToken).where(OpozvanToken.istice <= sada))
+            await db.execute(delete(RefreshToken).where(RefreshToken.istice <= sada))
+            await db.commit()
+            _poslednje_ciscenje = time.monotonic()
+
+    for red in redovi:
+        _zapamti(red.jti, red.id_korisnik, _unix(red.datum_opoziva), _unix(red.istice))
+
+    sada_unix = time.time()
+    for jti in [j for j, istice in _opozvani_jti.items() if istice <= sada_unix]:
+        del _opozvani_jti[jti]
+    for korisnik_id in [k for k, (_, istice) in _opozvani_korisnici.items() if istice <= sada_unix]:
+        del _opozvani_korisnici[korisnik_id]
+
+
+async def _sync_petlja() -> None:
+    while True:
+        await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
+        try:
+            await sinhronizuj_opozive()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Greška pri sinhronizaciji opozvanih tokena: {e}")
+
+
+async def start_opozivi_sync() -> None:
+    """Učitava opozive pre prvog zahteva i pokreće periodično osvežavanje"""
+    global _sync
+    if _sync is None:
+        await sinhronizuj_opozive()
+        _sync = asyncio.create_task(_sync_petlja())
+
+
+async def stop_opozivi_sync() -> None:
+    global _sync
+    if _sync is not None:
+        _sync.cancel()
+        try:
+            await _sync
+        except asyncio.CancelledError:
+            pass
+        _sync = None
+
+
+def opozivi_stats() -> Dict[str, int]:
+    """Veličina liste u memoriji (izlaže se na /health)"""
+    return {"jti": len(_opozvani_jti), "korisnika": len(_opozvani_korisnici)}
@@ -0,0 +1,118 @@
+"""
+Servis za validaciju karata na ulazu
+Svaka validacija je jedan UPDATE ... RETURNING po indeksu na qr_kod,
+pa druga karta sa istim kodom ne može proći ni pri istovremenom skeniranju.
+Lažne karte (neispravan potpis) odbijaju se pre upita u bazu.
+"""
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.prijava import Prijava
+from app.services.qr_service import decode_qr_data
+
+VALIDIRANO = "validirano"
+VEC_VALIDIRANO = "vec_validirano"
+NEPOZNATO = "nepoznato"
+
+_VRACENE_KOLONE = (
+    Prijava.qr_kod,
+    Prijava.id_prijava,
+    Prijava.id_korisnik,
+    Prijava.id_izlozba,
+    Prijava.broj_karata,
+)
+
+
+def _citljiva(qr_kod: str, id_izlozba: Optional[int]) -> bool:
+    """Provera samo tajnim ključem - potpis i izložba iz sadržaja karte"""
+    karta = decode_qr_data(qr_kod)
+    if karta is None:
+        return False
+    return id_izlozba is None or karta.izlozba_id == id_izlozba
+
+
+def _uslovi(qr_uslov, id_izlozba: Optional[int]) -> list:
+    uslovi = [qr_uslov]
+    if id_izlozba is not None:
+        uslovi.append(Prijava.id_izlozba == id_izlozba)
+    return uslovi
+
+
+async def validiraj_kartu(
+    db: AsyncSession,
+    qr_kod: str,
+    id_izlozba: Optional[int] = None
+) -> Tuple[str, Optional[dict]]:
+    """
+    Označava kartu kao validiranu.
+    Vraća (status, podaci prijave); podaci postoje samo za status "validirano".
+    """
+    if not _citljiva(qr_kod, id_izlozba):
+        return NEPOZNATO, None
+    
+    uslovi = _uslovi(Prijava.qr_kod == qr_kod, id_izlozba)
+    row = (await db.execute(
+        update(Prijava)
+        .where(*uslovi, Prijava.validirano.is_not(True))
+        .values(validirano=True)
+        .returning(*_VRACENE_KOLONE)
+        .execution_options(synchronize_session=False)
+    )).first()
+    await db.commit()
+    
+    if row:
+        return VALIDIRANO, row._asdict()
+    
+    # Razlog odbijanja - samo za poruku, odluka je već doneta UPDATE-om
+    postoji = await db.scalar(select(Prijava.id_prijava).where(*uslovi))
+    return (VEC_VALIDIRANO if postoji else NEPOZNATO), None
+
+
+async def validiraj_karte(
+    db: AsyncSession,
+    qr_kodovi: List[str],
+    id_izlozba: Optional[int] = None
+) -> List[Tuple[str, str, Optional[dict]]]:
+    """
+    Validira više karata jednim UPDATE-om (skeneri koji su radili offline).
+    Vraća (qr_kod, status, podaci) redom kojim su kodovi poslati;
+    ponovljen kod u istoj seriji je "vec_validirano".
+    """
+    jedinstveni = [
+        kod for kod in dict.fromkeys(qr_kodovi) if _citljiva(kod, id_izlozba)
+    ]
+    if not jedinstveni:
+        return [(kod, NEPOZNATO, None) for kod in qr_kodovi]
+    
+    result = await db.execute(
+        update(Prijava)
+        .where(
+            *_uslovi(Prijava.qr_kod.in_(jedinstveni), id_izlozba),
+            Prijava.validirano.is_not(True)
+        )
+        .values(validirano=True)
+        .returning(*_VRACENE_KOLONE)
+        .execution_options(synchronize_session=False)
+    )
+    validirane: Dict[str, dict] = {row.qr_kod: row._asdict() for row in result}
+    await db.commit()
+    
+    ostali = [kod for kod in jedinstveni if kod not in validirane]
+    postojeci = set()
+    if ostali:
+        postojeci = set(await db.scalars(
+            select(Prijava.qr_kod).where(*_uslovi(Prijava.qr_kod.in_(ostali), id_izlozba))
+        ))
+    
+    # Kod koji je validiran ranije u ovoj seriji više nije u "validirane"
+    validirano_sada = set(validirane)
+    rezultati = []
+    for kod in qr_kodovi:
+        podaci = validirane.pop(kod, None)
+        if podaci is not None:
+            rezultati.append((kod, VALIDIRANO, podaci))
+        elif kod in postojeci or kod in validirano_sada:
+            rezultati.append((kod, VEC_VALIDIRANO, None))
+        else:
+            rezultati.append((kod, NEPOZNATO, None))
+    return rezultati
@@ -2,31 +2,82 @@
 FastAPI zavisnosti (Dependencies)
 Autentifikacija i autorizacija
 """
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.database import get_db
 from app.models.korisnik import Korisnik
 from app.utils.security import decode_access_token
+from app.services.token_service import je_opozvan
+from app.services.invalidacija_service import registruj_obradu
 
 # OAuth2 šema za token iz headera
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
+# Razrešeni korisnici: token -> (korisnik van sesije, važi do - unix vreme, payload).
+# Pogodak preskače i dekodiranje tokena i upit u bazu.
+_kes_korisnika: "OrderedDict[str, Tuple[Korisnik, float, dict]]" = OrderedDict()
+
+
+def invalidiraj_korisnika(korisnik_id: int) -> None:
+    """Izbacuje iz keša sve tokene korisnika (posle izmene ili brisanja)"""
+    for token in [t for t, (k, _, _) in _kes_korisnika.items() if k.id_korisnik == korisnik_id]:
+        del _kes_korisnika[token]
+
+
+# Izmena naloga (zabelezi_izmenu) čisti keš u svim procesima
+KORISNIK = "korisnik"
+registruj_obradu(KORISNIK, invalidiraj_korisnika, _kes_korisnika.clear)
+
+
+def _iz_kesa(token: str) -> Optional[Tuple[Korisnik, dict]]:
+    stavka = _kes_korisnika.get(token)
+    if stavka is None:
+        return None
+    korisnik, vazi_do, payload = stavka
+    if time.time() >= vazi_do:
+        del _kes_korisnika[token]
+        return None
+    _kes_korisnika.move_to_end(token)
+    return korisnik, payload
+
+
+def _u_kes(token: str, korisnik: Korisnik, payload: dict) -> None:
+    if settings.USER_CACHE_SIZE <= 0:
+        return
+    vazi_do = time.time() + settings.USER_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        vazi_do = min(vazi_do, payload["exp"])
+    _kes_korisnika[token] = (korisnik, vazi_do, payload)
+    _kes_korisnika.move_to_end(token)
+    while len(_kes_korisnika) > settings.USER_CACHE_SIZE:
+        _kes_korisnika.popitem(last=False)
+
 
 async def get_current_user(
     token: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Optional[Korisnik]:
     """
     Dobija trenutnog korisnika iz JWT tokena.
     Vraća None ako token nije prosleđen ili nije validan.
+    Korisnik se kratko kešira (USER_CACHE_TTL_SECONDS), najduže do isteka tokena.
+    Opoziv se proverava pri svakom zahtevu, iz liste u memoriji.
     """
     if not token:
         return None
+    
+    stavka = _iz_kesa(token)
+    if stavka is not None:
+        user, payload = stavka
+        return None if je_opozvan(payload) else user
         
     payload = decode_access_token(token)
-    if payload is None:
+    if payload is None or je_opozvan(payload):
         return None
     
     username: str = payload.get("sub")
@@ -35,11 +86,14 @@ async def get_current_user(
     if username is None or user_id is None:
         return None
     
-    user = db.query(Korisnik).filter(Korisnik.id_korisnik == user_id).first()
+    user = await db.get(Korisnik, user_id)
     
     if user is None or not user.aktivan:
         return None
     
+    # Keširani objekat je van sesije - izmene u ruti idu na svežu kopiju
+    db.expunge(user)
+    _u_kes(token, user, payload)
     return user
 
 
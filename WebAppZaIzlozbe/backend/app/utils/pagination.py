@@ -0,0 +1,123 @@
+"""
+Keyset (cursor) paginacija
+Kursor nosi vrednosti sortirnih kolona poslednjeg reda i potpisan je,
+pa klijent ne može da ga menja niti da ga prenese na drugu listu.
+"""
+import base64
+import hashlib
+import hmac
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from app.config import settings
+
+# Header kroz koji liste bez omotača vraćaju sledeći kursor
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), payload, hashlib.sha256
+    ).digest()[:16]
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "t" in value:
+            return datetime.fromisoformat(value["t"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(scope: str, values: Sequence[Any]) -> str:
+    """Kodira i potpisuje vrednosti sortirnih kolona"""
+    payload = json.dumps(
+        {"s": scope, "v": [_dump_value(v) for v in values]},
+        separators=(",", ":")
+    ).encode("utf-8")
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor: str, scope: str) -> List[Any]:
+    """
+    Proverava potpis i vraća vrednosti iz kursora.
+    Baca 400 ako je kursor neispravan ili pripada drugoj listi.
+    """
+    try:
+        payload_part, sig_part = cursor.split(".", 1)
+        payload = _b64decode(payload_part)
+        if not hmac.compare_digest(_b64decode(sig_part), _sign(payload)):
+            raise ValueError("potpis")
+        data = json.loads(payload)
+        if data.get("s") != scope:
+            raise ValueError("lista")
+        return [_load_value(v) for v in data["v"]]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Neispravan kursor"
+        )
+
+
+class Keyset:
+    """
+    Opis sortiranja jedne liste.
+    Sve kolone se sortiraju u istom smeru, a poslednja mora biti jedinstvena (id).
+    """
+
+    def __init__(self, scope: str, *columns, descending: bool = False):
+        self.scope = scope
+        self.columns = columns
+        self.descending = descending
+
+    def order_by(self) -> list:
+        if self.descending:
+            return [column.desc() for column in self.columns]
+        return [column.asc() for column in self.columns]
+
+    def apply(self, query, cursor: str, limit: int):
+        """
+        Dodaje uslov "posle kursora", sortiranje i limit.
+        Prazan kursor znači prvu stranu. Učitava se jedan red više
+        da bi se znalo da li postoji sledeća strana.
+        """
+        if cursor:
+            values = decode_cursor(cursor, self.scope)
+            if len(values) != len(self.columns):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Neispravan kursor"
+                )
+            row = tuple_(*self.columns)
+            after = tuple_(*values)
+            query = query.filter(row < after if self.descending else row > after)
+        return query.order_by(*self.order_by()).limit(limit + 1)
+
+    def page(self, items: Sequence[Any], limit: int) -> Tuple[list, Optional[str]]:
+        """Odseca višak reda i pravi kursor za sledeću stranu"""
+        items = list(items)
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        last = items[-1]
+        values = [getattr(last, column.key) for column in self.columns]
+        return items, encode_cursor(self.scope, values)
@@ -0,0 +1,166 @@
+"""
+Rate limiter za prijavu i registraciju
+Klizni prozor (procena iz tekućeg i prethodnog fiksnog prozora) po ključu -
+IP adresi ili korisničkom imenu. Provera je dependency, pa se zahtev
+odbija pre bilo kakvog heširanja lozinke.
+"""
+import hashlib
+import math
+import time
+from typing import Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.rate_limit import RateLimitBrojac
+from app.schemas.token import LoginForm
+
+# Gornja granica broja ključeva u memoriji; preko nje se izbacuju oni
+# kojima najduže nije bilo zahteva
+_NAJVISE_KLJUCEVA = 100_000
+
+
+class MemorijaBackend:
+    """Brojači u memoriji procesa - svaki worker ima svoje"""
+
+    def __init__(self):
+        # kljuc -> (prozor, broj u prozoru, broj u prethodnom prozoru)
+        self._brojaci: Dict[str, Tuple[int, int, int]] = {}
+        self._ciscenje = 0.0
+
+    async def pogodi(self, kljuc: str, prozor: int, duzina: int) -> Tuple[int, int]:
+        """Broji zahtev; vraća (broj u prozoru, broj u prethodnom prozoru)"""
+        stari = self._brojaci.get(kljuc)
+        if stari is None or stari[0] < prozor - 1:
+            trenutni, prethodni = 1, 0
+        elif stari[0] == prozor - 1:
+            trenutni, prethodni = 1, stari[1]
+        else:
+            trenutni, prethodni = stari[1] + 1, stari[2]
+        # Ponovni upis pomera ključ na kraj - redosled je od najstarijeg zahteva
+        self._brojaci.pop(kljuc, None)
+        self._brojaci[kljuc] = (prozor, trenutni, prethodni)
+        self._ocisti(prozor, duzina)
+        while len(self._brojaci) > _NAJVISE_KLJUCEVA:
+            del self._brojaci[next(iter(self._brojaci))]
+        return trenutni, prethodni
+
+    def _ocisti(self, prozor: int, duzina: int) -> None:
+        # Ključevi bez zahteva u poslednja dva prozora više ne utiču na procenu
+        sada = time.monotonic()
+        if sada - self._ciscenje < duzina:
+            return
+        self._ciscenje = sada
+        for kljuc in [k for k, (p, _, _) in self._brojaci.items() if p < prozor - 1]:
+            del self._brojaci[kljuc]
+
+
+class PostgresBackend:
+    """Brojači u UNLOGGED tabeli - zajednički za sve worker-e"""
+
+    def __init__(self):
+        self._ciscenje = 0.0
+
+    async def pogodi(self, kljuc: str, prozor: int, duzina: int) -> Tuple[int, int]:
+        async with AsyncSessionLocal() as db:
+            trenutni = await db.scalar(
+                pg_insert(RateLimitBrojac)
+                .values(kljuc=kljuc, prozor=prozor, broj=1)
+                .on_conflict_do_update(
+                    index_elements=[RateLimitBrojac.kljuc, RateLimitBrojac.prozor],
+                    set_={"broj": RateLimitBrojac.broj + 1}
+                )
+                .returning(RateLimitBrojac.broj)
+            )
+            prethodni = await db.scalar(
+                select(RateLimitBrojac.broj).where(
+                    RateLimitBrojac.kljuc == kljuc,
+                    RateLimitBrojac.prozor == prozor - 1
+                )
+            )
+            if time.monotonic() - self._ciscenje > duzina:
+                self._ciscenje = time.monotonic()
+                await db.execute(delete(RateLimitBrojac).where(RateLimitBrojac.prozor < prozor - 1))
+            await db.commit()
+        return trenutni, prethodni or 0
+
+
+_backend = PostgresBackend() if settings.RATE_LIMIT_BACKEND == "postgres" else MemorijaBackend()
+
+
+def _kljuc(vrsta: str, vrednost: str) -> str:
+    """Ključ ograničene dužine - vrednost (IP, korisničko ime) dolazi od klijenta"""
+    return f"{vrsta}:{hashlib.sha256(vrednost.encode()).hexdigest()[:32]}"
+
+
+def ip_klijenta(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        prosledjeno = request.headers.get("x-forwarded-for")
+        if prosledjeno:
+            return prosledjeno.split(",")[-1].strip()
+    return request.client.host if request.client else "nepoznat"
+
+
+async def proveri_limit(kljuc: str, limit: int, duzina: int) -> Optional[int]:
+    """
+    Broji zahtev pod ključem. Vraća None ako je dozvoljen, inače za koliko
+    sekundi procena kliznog prozora pada ispod limita (za Retry-After).
+    Odbijeni pokušaji se takođe broje - uporan napad ostaje blokiran.
+    """
+    if limit <= 0:
+        return None
+    sada = time.time()
+    prozor = int(sada // duzina)
+    trenutni, prethodni = await _backend.pogodi(kljuc, prozor, duzina)
+    deo = (sada - prozor * duzina) / duzina
+    if prethodni * (1 - deo) + trenutni <= limit:
+        return None
+
+    if trenutni <= limit:
+        # Dovoljno je da stari prozor izbledi ispod preostalog mesta
+        cekanje = (1 - deo - (limit - trenutni) / prethodni) * duzina
+    else:
+        # Tek u sledećem prozoru, kada tekući postane prethodni
+        cekanje = (1 - deo) * duzina + (1 - limit / trenutni) * duzina
+    return max(1, math.ceil(cekanje))
+
+
+def _odbij(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Previše pokušaja, pokušajte ponovo kasnije",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+async def ogranici_prijavu(
+    request: Request,
+    form_data: LoginForm = Depends()
+) -> None:
+    """
+    Dependency za /login - limit po IP adresi, pa po korisničkom imenu.
+    Kada je IP već preko limita, ime se ne broji, pa jedna adresa ne može
+    da napravi više ključeva nego što ima dozvoljenih pokušaja.
+    """
+    duzina = settings.LOGIN_LIMIT_WINDOW_SECONDS
+    cekanje = await proveri_limit(
+        _kljuc("login:ip", ip_klijenta(request)), settings.LOGIN_LIMIT_IP, duzina
+    )
+    if cekanje is None:
+        cekanje = await proveri_limit(
+            _kljuc("login:user", form_data.username.lower()), settings.LOGIN_LIMIT_USERNAME, duzina
+        )
+    if cekanje is not None:
+        raise _odbij(cekanje)
+
+
+async def ogranici_registraciju(request: Request) -> None:
+    """Dependency za /register - limit po IP adresi"""
+    cekanje = await proveri_limit(
+        _kljuc("register:ip", ip_klijenta(request)),
+        settings.REGISTER_LIMIT_IP,
+        settings.REGISTER_LIMIT_WINDOW_SECONDS
+    )
+    if cekanje is not None:
+        raise _odbij(cekanje)
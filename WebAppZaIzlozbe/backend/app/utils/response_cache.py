@@ -0,0 +1,226 @@
+"""
+Keš javnih GET odgovora sa ETag/304
+Odgovori javnih ruta (izložbe, lokacije, slike) čuvaju se serijalizovani u
+LRU kešu, po putanji i normalizovanom upitu. Svaka ruta zavisi od nekoliko
+grupa podataka; upis u grupu povećava njenu verziju i time poništava sve
+odgovore koji od nje zavise. Ponovljen zahtev sa važećim ETag-om dobija 304
+bez upita u bazu. Odgovor pročitan sa replike ubrzo posle upisa u njegove
+grupe se ne čuva, jer replika možda još nema taj upis.
+"""
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from starlette.datastructures import Headers
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.database import PRIMARY_PIN_COOKIE, READ_REPLICA_STATE
+from app.services.invalidacija_service import registruj_obradu
+
+# Grupe podataka
+IZLOZBE = "izlozbe"
+LOKACIJE = "lokacije"
+SLIKE = "slike"
+
+# Putanja -> grupe od kojih odgovor zavisi. Izložba sadrži lokaciju i slike,
+# a brisanje izložbe briše i njene slike.
+_RUTE = (
+    (re.compile(r"^/api/izlozbe/(?:slug/[^/]+|\d+)?$"), (IZLOZBE, LOKACIJE, SLIKE)),
+    (re.compile(r"^/api/lokacije/$"), (LOKACIJE,)),
+    (re.compile(r"^/api/slike/$"), (SLIKE, IZLOZBE)),
+)
+
+# Veći odgovori (npr. strana sa svim slikama) dobijaju ETag, ali se ne čuvaju
+_NAJVECI_ODGOVOR = 512 * 1024
+
+# Zaglavlja koja middleware postavlja sam
+_SOPSTVENA = {b"content-length", b"etag", b"cache-control", b"vary"}
+
+
+class _Stavka(NamedTuple):
+    verzije: Tuple[int, ...]
+    vazi_do: float
+    etag: str
+    zaglavlja: List[Tuple[bytes, bytes]]
+    telo: bytes
+
+
+_verzije: Dict[str, int] = {IZLOZBE: 0, LOKACIJE: 0, SLIKE: 0}
+# Grupa -> vreme poslednjeg upisa (time.monotonic)
+_izmenjeno: Dict[str, float] = dict.fromkeys(_verzije, 0.0)
+_kes: "OrderedDict[str, _Stavka]" = OrderedDict()
+_statistika = {"pogoci": 0, "promasaji": 0, "nije_menjano": 0, "replika_nesacuvano": 0}
+
+
+def invalidiraj_odgovore(*grupe: str) -> None:
+    """Poništava keširane odgovore koji zavise od datih grupa u ovom procesu"""
+    sada = time.monotonic()
+    for grupa in grupe:
+        _verzije[grupa] += 1
+        _izmenjeno[grupa] = sada
+
+
+def isprazni_odgovore() -> None:
+    _kes.clear()
+
+
+# Upisi (zabelezi_izmenu) poništavaju odgovore u svim procesima
+for _grupa in _verzije:
+    registruj_obradu(_grupa, lambda _, grupa=_grupa: invalidiraj_odgovore(grupa), isprazni_odgovore)
+
+
+def response_cache_stats() -> dict:
+    return {"stavki": len(_kes), "verzije": dict(_verzije), **_statistika}
+
+
+def _grupe_rute(scope: Scope) -> Optional[tuple]:
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return None
+    for sablon, grupe in _RUTE:
+        if sablon.match(scope["path"]):
+            return grupe
+    return None
+
+
+def _kljuc(scope: Scope) -> str:
+    """Putanja + parametri sortirani po imenu (redosled u URL-u nije bitan)"""
+    upit = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+    return scope["path"] + "?" + urlencode(sorted(upit))
+
+
+def _iz_kesa(kljuc: str, verzije: tuple) -> Optional[_Stavka]:
+    stavka = _kes.get(kljuc)
+    if stavka is None:
+        return None
+    if stavka.verzije != verzije or time.time() >= stavka.vazi_do:
+        del _kes[kljuc]
+        return None
+    _kes.move_to_end(kljuc)
+    return stavka
+
+
+def _u_kes(kljuc: str, stavka: _Stavka) -> None:
+    if settings.RESPONSE_CACHE_SIZE <= 0 or len(stavka.telo) > _NAJVECI_ODGOVOR:
+        return
+    _kes[kljuc] = stavka
+    _kes.move_to_end(kljuc)
+    while len(_kes) > settings.RESPONSE_CACHE_SIZE:
+        _kes.popitem(last=False)
+
+
+def _replika_mozda_kasni(scope: Scope, grupe: tuple) -> bool:
+    """Odgovor je sa replike, a neka grupa je menjana u poslednjih READ_REPLICA_PIN_SECONDS"""
+    if not scope["state"].get(READ_REPLICA_STATE):
+        return False
+    granica = time.monotonic() - settings.READ_REPLICA_PIN_SECONDS
+    return any(_izmenjeno[g] > granica for g in grupe)
+
+
+def _etag_odgovara(if_none_match: Optional[str], etag: str) -> bool:
+    """Slabo poređenje (W/ se zanemaruje), uz listu ETag-ova i '*'"""
+    if not if_none_match:
+        return False
+    trazeni = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+    return "*" in trazeni or etag.removeprefix("W/") in trazeni
+
+
+def _cache_control(zahtev: Headers, sacuvano: bool) -> str:
+    # Prijavljeni (npr. admin posle izmene) uvek proveravaju ETag,
+    # anonimni smeju kratko da koriste i zastarelu kopiju
+    if "authorization" in zahtev:
+        return "private, no-cache"
+    if not sacuvano:
+        # Možda zastarela kopija sa replike - ni pregledač je ne čuva
+        return "no-cache"
+    return (
+        f"public, max-age={settings.RESPONSE_CACHE_MAX_AGE}, "
+        f"stale-while-revalidate={settings.RESPONSE_CACHE_STALE_SECONDS}"
+    )
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware za keš javnih odgovora.
+    Keširaju se samo odgovori 200; ostali prolaze nepromenjeni.
+    ETag je heš sadržaja, pa je isti u svim procesima i posle restarta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        grupe = _grupe_rute(scope)
+        if grupe is None:
+            await self.app(scope, receive, send)
+            return
+
+        kljuc = _kljuc(scope)
+        # Verzije se čitaju pre obrade - ako upis stigne u međuvremenu,
+        # sačuvana stavka je odmah zastarela
+        verzije = tuple(_verzije[g] for g in grupe)
+        # Klijent koji je upravo upisao čita sa primarne baze, pa ne sme da
+        # dobije kopiju koju je možda napunila replika koja kasni
+        if PRIMARY_PIN_COOKIE in HTTPConnection(scope).cookies:
+            stavka = None
+        else:
+            stavka = _iz_kesa(kljuc, verzije)
+
+        sacuvano = True
+        if stavka is not None:
+            _statistika["pogoci"] += 1
+        else:
+            _statistika["promasaji"] += 1
+            poruke: List[Message] = []
+
+            async def uhvati(poruka: Message) -> None:
+                poruke.append(poruka)
+
+            # Dependency get_read_db ovde beleži da je čitao sa replike
+            scope.setdefault("state", {})
+            await self.app(scope, receive, uhvati)
+
+            if poruke[0]["status"] != 200:
+                for poruka in poruke:
+                    await send(poruka)
+                return
+
+            telo = b"".join(p.get("body", b"") for p in poruke[1:])
+            stavka = _Stavka(
+                verzije=verzije,
+                vazi_do=time.time() + settings.RESPONSE_CACHE_TTL_SECONDS,
+                etag='W/"' + hashlib.blake2b(telo, digest_size=16).hexdigest() + '"',
+                zaglavlja=[
+                    (k, v) for k, v in poruke[0]["headers"] if k.lower() not in _SOPSTVENA
+                ],
+                telo=telo,
+            )
+            if _replika_mozda_kasni(scope, grupe):
+                sacuvano = False
+                _statistika["replika_nesacuvano"] += 1
+            else:
+                _u_kes(kljuc, stavka)
+
+        zahtev = Headers(scope=scope)
+        zaglavlja = [
+            (b"etag", stavka.etag.encode("latin-1")),
+            (b"cache-control", _cache_control(zahtev, sacuvano).encode("latin-1")),
+            (b"vary", b"Authorization"),
+        ]
+
+        if _etag_odgovara(zahtev.get("if-none-match"), stavka.etag):
+            _statistika["nije_menjano"] += 1
+            await send({"type": "http.response.start", "status": 304, "headers": zaglavlja})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": stavka.zaglavlja + zaglavlja + [
+                (b"content-length", str(len(stavka.telo)).encode("latin-1"))
+            ],
+        })
+        await send({"type": "http.response.body", "body": stavka.telo})
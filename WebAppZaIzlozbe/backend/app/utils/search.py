@@ -0,0 +1,57 @@
+"""
+Full-text pretraga izložbi
+Tekst se pre indeksiranja svodi na latinicu bez dijakritika
+(ćirilica -> latinica, š/ś -> s, č/ć -> c, ž -> z, đ -> dj),
+pa "Đurđevdan", "Djurdjevdan" i "Ђурђевдан" daju isti rezultat.
+"""
+import re
+from typing import Optional
+from sqlalchemy import DDL, func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# Preslovljavanje pojedinačnih ćiriličnih slova (višeslovna idu kroz replace)
+_CIRILICA = "абвгдежзијклмнопрстћуфхцчш"
+_LATINICA = "abvgdezzijklmnoprstcufhccs"
+
+# IMMUTABLE omotač oko unaccent-a, da bi mogao da se koristi u generisanoj koloni
+FOLD_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION izlozbe_fold(tekst text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT public.unaccent(
+        'public.unaccent'::regdictionary,
+        translate(
+            replace(replace(replace(replace(replace(
+                lower(coalesce(tekst, '')),
+                'љ', 'lj'), 'њ', 'nj'), 'џ', 'dz'), 'ђ', 'dj'), 'đ', 'dj'),
+            '{_CIRILICA}',
+            '{_LATINICA}'
+        )
+    )
+$$
+"""
+
+# Izraz generisane kolone izlozbe.search_vector (naslov > kratak opis > opis)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, izlozbe_fold(naslov)), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, izlozbe_fold(kratak_opis)), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, izlozbe_fold(opis)), 'C')"
+)
+
+# DDL za create_all u razvoju; u produkciji isto radi migracija 005
+SEARCH_DDL = [
+    DDL("CREATE EXTENSION IF NOT EXISTS unaccent").execute_if(dialect="postgresql"),
+    DDL(FOLD_FUNCTION_SQL).execute_if(dialect="postgresql"),
+]
+TRIGRAM_DDL = DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+
+
+def search_tsquery(search: str) -> Optional[ColumnElement]:
+    """
+    Pravi prefiksni tsquery ("sum car" -> "sum:* & car:*").
+    Vraća None ako u upitu nema reči.
+    """
+    reci = re.findall(r"\w+", search)
+    if not reci:
+        return None
+    upit = " & ".join(f"{rec}:*" for rec in reci)
+    return func.to_tsquery(literal_column("'simple'::regconfig"), func.izlozbe_fold(upit))
@@ -2,14 +2,135 @@
 Sigurnosne funkcije
 Heširanje lozinki i JWT token operacije
 """
+import asyncio
+import logging
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
 
-# Kontekst za heširanje lozinki (bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Granice kalibracije bcrypt cene (svaki korak duplira vreme)
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 15
+BCRYPT_DEFAULT_ROUNDS = 12
+
+
+def _napravi_kontekst(sema: str, rounds: int) -> CryptContext:
+    """
+    Kontekst sa `sema` kao glavnom šemom. Ostale šeme su zastarele, a bcrypt
+    heš slabiji od `rounds` traži ponovno heširanje (needs_update).
+    """
+    if sema == "argon2":
+        try:
+            from passlib.hash import argon2
+            argon2.get_backend()
+        except Exception:
+            logger.warning("argon2-cffi nije instaliran, lozinke se heširaju bcrypt-om")
+            sema = "bcrypt"
+    seme = [sema] if sema == "bcrypt" else [sema, "bcrypt"]
+    return CryptContext(
+        schemes=seme,
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds
+    )
+
+
+# Kontekst za heširanje lozinki; cena se kalibriše u start_hash_pool()
+pwd_context = _napravi_kontekst(
+    settings.PASSWORD_SCHEME, settings.BCRYPT_ROUNDS or BCRYPT_DEFAULT_ROUNDS
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_u_radu = 0
+
+
+def _za_bcrypt(password: str, hashed_password: Optional[str] = None) -> str:
+    """
+    Bcrypt ima limit od 72 bajta - skraćuje se na celom UTF-8 znaku,
+    isto pri heširanju i proveri.
+    """
+    if hashed_password is None:
+        je_bcrypt = pwd_context.default_scheme() == "bcrypt"
+    else:
+        je_bcrypt = pwd_context.identify(hashed_password) == "bcrypt"
+    if not je_bcrypt:
+        return password
+    return password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
+
+
+def kalibrisi_bcrypt(cilj_ms: float) -> int:
+    """
+    Bira bcrypt cenu čije je heširanje na ovoj mašini najbliže cilj_ms.
+    Meri se niska cena, a ostalo se procenjuje (vreme raste sa 2^cena).
+    """
+    from passlib.hash import bcrypt
+    merna = bcrypt.using(rounds=8)
+    merna.hash("kalibracija")  # zagrevanje backend-a
+    pocetak = time.perf_counter()
+    for _ in range(3):
+        merna.hash("kalibracija")
+    ms = (time.perf_counter() - pocetak) * 1000 / 3
+    rounds = 8 + round(math.log2(cilj_ms / max(ms, 0.01)))
+    return max(BCRYPT_MIN_ROUNDS, min(BCRYPT_MAX_ROUNDS, rounds))
+
+
+def start_hash_pool() -> None:
+    """Pravi pool za heširanje i po potrebi kalibriše bcrypt cenu"""
+    global _executor, pwd_context
+    if _executor is not None:
+        return
+    if settings.BCRYPT_ROUNDS is None:
+        rounds = kalibrisi_bcrypt(settings.HASH_TARGET_MS)
+        pwd_context = _napravi_kontekst(settings.PASSWORD_SCHEME, rounds)
+        logger.info(f"Bcrypt cena kalibrisana na {rounds} (cilj {settings.HASH_TARGET_MS:.0f} ms)")
+    _executor = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="hash")
+
+
+def stop_hash_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def hash_pool_stats() -> dict:
+    """Metrike pool-a (izlažu se na /health)"""
+    return {
+        "sema": pwd_context.default_scheme(),
+        "radnika": settings.HASH_WORKERS,
+        "u_radu": _u_radu,
+        "najvise": settings.HASH_WORKERS + settings.HASH_QUEUE_MAX,
+    }
+
+
+async def _u_pool(fn, *args):
+    """
+    Izvršava heširanje u pool-u. Kada je red pun, odmah vraća 503 umesto
+    da zahtevi čekaju dok ne isteknu.
+    """
+    global _u_radu
+    if _executor is None:
+        start_hash_pool()
+    if _u_radu >= settings.HASH_WORKERS + settings.HASH_QUEUE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server je trenutno preopterećen, pokušajte ponovo za trenutak",
+            headers={"Retry-After": "1"},
+        )
+    _u_radu += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _u_radu -= 1
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -23,12 +144,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True ako se lozinke poklapaju, False inače
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context.verify(_za_bcrypt(plain_password, hashed_password), hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """
-    Hešira lozinku koristeći bcrypt.
+    Hešira lozinku trenutnom šemom (sinhrono - za skripte).
     
     Args:
         password: Lozinka u plain text-u
@@ -36,15 +157,40 @@ def get_password_hash(password: str) -> str:
     Returns:
         Heširana lozinka
     """
-    # Bcrypt ima limit od 72 bajta, skratimo ako je potrebno
-    password_bytes = password.encode('utf-8')[:72]
-    password_truncated = password_bytes.decode('utf-8', errors='ignore')
-    return pwd_context.hash(password_truncated)
+    return pwd_context.hash(_za_bcrypt(password))
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if not pwd_context.needs_update(hashed_password):
+        return True, None
+    return True, get_password_hash(plain_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hešira lozinku u pool-u za heširanje (za API rute)"""
+    return await _u_pool(get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Proverava lozinku u pool-u za heširanje.
+    
+    Returns:
+        (poklapa se, novi heš) - novi heš je različit od None kada je
+        sačuvani napravljen starom šemom ili slabijom cenom i treba ga upisati
+    """
+    return await _u_pool(_verify_and_update, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Kreira JWT access token.
+    Svaki token dobija jedinstveni jti (za opoziv) i iat sa delovima sekunde.
     
     Args:
         data: Podaci koji se enkoduju u token
@@ -62,7 +208,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.SECRET_KEY, 
@@ -0,0 +1,105 @@
+"""
+Merenje cene serijalizacije liste izložbi (GET /api/izlozbe/).
+Izložbe sa po 50 slika prave se u memoriji, bez baze, i prolaze kroz
+isti response_model kao u ruti.
+
+Pokretanje:
+    python bench_serialization.py [broj_slika]
+"""
+import sys
+import os
+import asyncio
+import time
+import warnings
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from fastapi.routing import serialize_response
+from app.routers.izlozbe import router
+from app.models.izlozba import Izlozba
+from app.models.lokacija import Lokacija
+from app.models.slika import Slika
+from app.schemas.izlozba import IzlozbaResponse
+
+PO_STRANI = 12
+PONAVLJANJA = 200
+
+
+def napravi_izlozbe(broj_slika: int) -> list:
+    lokacija = Lokacija(
+        id_lokacija=1, naziv="Galerija", adresa="Knez Mihailova 1", grad="Beograd",
+        opis="Opis lokacije", g_sirina=44.8, g_duzina=20.4
+    )
+    izlozbe = []
+    for i in range(PO_STRANI):
+        slike = [
+            Slika(
+                id_slika=i * 1000 + j, id_izlozba=i, slika=f"/static/slike/{i}_{j}.jpg",
+                thumbnail=f"/static/slike/{i}_{j}_t.jpg", naslov=f"Fotografija {j}",
+                opis="Opis fotografije " * 5, fotograf="Autor", istaknuta=j == 0,
+                naslovna=False, redosled=j, datum_otpremanja=datetime(2024, 1, 1, 12, 0)
+            )
+            for j in range(broj_slika)
+        ]
+        izlozbe.append(Izlozba(
+            id_izlozba=i, slug=f"izlozba-{i}", naslov=f"Izložba {i}", opis="Opis izložbe " * 20,
+            kratak_opis="Kratak opis", datum_pocetka=date(2024, 5, 1), datum_zavrsetka=date(2024, 6, 1),
+            id_lokacija=1, kapacitet=100, rezervisano=10, thumbnail="/static/t.jpg",
+            osmislio="Kustos", aktivan=True, objavljeno=True, id_slika=None,
+            datum_kreiranja=datetime(2024, 1, 1), datum_izmene=None,
+            lokacija=lokacija, slika_naslovna=slike[0] if slike else None, slike=slike
+        ))
+    return izlozbe
+
+
+def stari_items(izlozbe: list) -> list:
+    """Nekadašnji put: validacija, dump, izmena rečnika i ponovna validacija"""
+    items = []
+    for izlozba in izlozbe:
+        izlozba_dict = IzlozbaResponse.model_validate(izlozba).model_dump()
+        izlozba_dict["preostali_kapacitet"] = izlozba.preostali_kapacitet
+        items.append(IzlozbaResponse(**izlozba_dict))
+    return items
+
+
+def strana(items: list) -> dict:
+    return {"items": items, "total": 100, "page": 1, "per_page": PO_STRANI, "pages": 9}
+
+
+async def meri(naziv: str, field, izlozbe: list, pripremi, response_class=None) -> None:
+    pocetak = time.perf_counter()
+    for _ in range(PONAVLJANJA):
+        sadrzaj = await serialize_response(
+            field=field,
+            response_content=strana(pripremi(izlozbe)),
+            dump_json=response_class is None
+        )
+        if response_class is not None:
+            sadrzaj = response_class(sadrzaj).body
+    us = (time.perf_counter() - pocetak) / (PONAVLJANJA * PO_STRANI) * 1e6
+    print(f"  {naziv:<45} {us:8.1f} µs po izložbi  ({len(sadrzaj)} B po strani)")
+
+
+async def main():
+    broj_slika = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    route = next(r for r in router.routes if r.path == "/api/izlozbe/")
+    field = route.response_field
+    izlozbe = napravi_izlozbe(broj_slika)
+
+    print(f"{PO_STRANI} izložbi po strani, {broj_slika} slika po izložbi")
+    await meri("pre (dupla validacija, JSONResponse)", field, izlozbe, stari_items, JSONResponse)
+    await meri("pre (dupla validacija, Pydantic JSON)", field, izlozbe, stari_items)
+    if orjson is not None:
+        # Zastareo u novijem FastAPI-ju, meri se samo radi poređenja
+        warnings.filterwarnings("ignore", message="ORJSONResponse")
+        await meri("posle (ORM -> response_model, ORJSONResponse)", field, izlozbe, list, ORJSONResponse)
+    await meri("posle (ORM -> response_model, Pydantic JSON)", field, izlozbe, list)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""
+Zajednička podešavanja testova (pytest)
+Testovi nad bazom koriste DATABASE_URL; sve izmene idu u transakciju koja
+se na kraju poništava. Ako baza nije dostupna, takvi testovi se preskaču.
+
+Pokretanje:
+    python -m pytest -s
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.config import settings
+from app.database import to_async_url
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_conn():
+    """Konekcija sa otvorenom transakcijom koja se poništava posle testa"""
+    engine = create_async_engine(to_async_url(settings.DATABASE_URL), poolclass=NullPool)
+    try:
+        conn = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Baza nije dostupna: {e}")
+    transakcija = await conn.begin()
+    try:
+        yield conn
+    finally:
+        await transakcija.rollback()
+        await conn.close()
+        await engine.dispose()
+
+
+@pytest.fixture
+async def db(db_conn):
+    """Sesija nad db_conn; commit u kodu koji se testira postaje savepoint"""
+    async with AsyncSession(
+        bind=db_conn,
+        join_transaction_mode="create_savepoint",
+        autoflush=False,
+        expire_on_commit=False
+    ) as sesija:
+        yield sesija
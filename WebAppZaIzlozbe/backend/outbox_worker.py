@@ -0,0 +1,35 @@
+"""
+Samostalni worker za email outbox i kampanje.
+Koristi se kada su u API procesima isključeni
+(EMAIL_OUTBOX_WORKER=false, KAMPANJE_WORKER=false).
+
+Pokretanje:
+    python outbox_worker.py
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import async_engine
+from app.services.qr_service import start_qr_pool, stop_qr_pool
+from app.services.outbox_service import outbox_worker
+from app.services.kampanja_service import kampanja_worker
+from app.services.smtp_pool import close_smtp_pool
+
+
+async def main():
+    start_qr_pool()
+    try:
+        await asyncio.gather(outbox_worker(), kampanja_worker())
+    finally:
+        await close_smtp_pool()
+        stop_qr_pool()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("✓ Email outbox worker zaustavljen")
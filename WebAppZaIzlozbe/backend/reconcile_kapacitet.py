@@ -0,0 +1,24 @@
+"""
+Usklađivanje brojača rezervisanih mesta sa tabelom prijave.
+
+Pokretanje:
+    python reconcile_kapacitet.py
+"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import AsyncSessionLocal, async_engine
+from app.services.kapacitet_service import uskladi_rezervisano
+
+
+async def main():
+    async with AsyncSessionLocal() as db:
+        ispravljeno = await uskladi_rezervisano(db)
+    await async_engine.dispose()
+    print(f"✓ Brojač rezervacija usklađen ({ispravljeno} izložbi ispravljeno)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
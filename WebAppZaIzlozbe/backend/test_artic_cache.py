@@ -0,0 +1,223 @@
+"""
+Testovi Artic keša nad lokalnim lažnim Artic serverom: pogodak iz memorije
+i sa diska (SQLite), osvežavanje zastarele stavke u pozadini, kratko
+pamćenje 404 odgovora i služenje stare kopije dok API vraća 503.
+
+Pokretanje:
+    python -m pytest -s test_artic_cache.py
+"""
+import asyncio
+import time
+import pytest
+import uvicorn
+from fastapi import FastAPI, Response
+from app.config import settings
+from app.services import artic_cache, artic_service
+
+pytestmark = pytest.mark.anyio
+
+KASNJENJE = 0.2
+
+
+class LokalniArtic:
+    """
+    Lažni Artic API (/api/v1/artworks, /search i /artworks/{id}) na
+    slobodnom portu. Broji zahteve; `dole` - svi zahtevi dobijaju 503.
+    Radovi sa id >= 1000 ne postoje (404). Naslovi nose redni broj
+    zahteva, pa se vidi da li je odgovor stari ili osvežen.
+    """
+
+    def __init__(self):
+        self.zahteva = 0
+        self.dole = False
+        self.port = None
+        self._server = None
+        self._zadatak = None
+        self.app = FastAPI()
+        self.app.get("/api/v1/artworks/search")(self._lista)
+        self.app.get("/api/v1/artworks")(self._lista)
+        self.app.get("/api/v1/artworks/{aid}")(self._rad)
+
+    async def _odgovor(self) -> int:
+        self.zahteva += 1
+        broj = self.zahteva
+        await asyncio.sleep(KASNJENJE)
+        return broj
+
+    async def _lista(self, page: int = 1, limit: int = 12, q: str = ""):
+        broj = await self._odgovor()
+        if self.dole:
+            return Response(status_code=503)
+        return {
+            "data": [{"id": i, "title": f"{q} {broj}", "image_id": f"img{i}"} for i in range(limit)],
+            "pagination": {"total": 100, "current_page": page},
+            "info": {"license_text": "..."},
+        }
+
+    async def _rad(self, aid: int):
+        broj = await self._odgovor()
+        if self.dole:
+            return Response(status_code=503)
+        if aid >= 1000:
+            return Response(status_code=404, content='{"status": 404}')
+        return {"data": {"id": aid, "title": f"Rad {aid} {broj}", "image_id": "abc"}}
+
+    async def start(self) -> None:
+        self._server = uvicorn.Server(uvicorn.Config(
+            self.app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"
+        ))
+        self._zadatak = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            await asyncio.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.should_exit = True
+        await self._zadatak
+
+
+@pytest.fixture
+async def artic(monkeypatch, tmp_path):
+    server = LokalniArtic()
+    await server.start()
+    for naziv, vrednost in {
+        "ARTIC_API_BASE_URL": f"http://127.0.0.1:{server.port}/api/v1",
+        "ARTIC_CACHE_PATH": str(tmp_path / "artic.sqlite3"),
+        "ARTIC_CACHE_TTL_SECONDS": 3600.0,
+        "ARTIC_CACHE_ARTWORK_TTL_SECONDS": 3600.0,
+        "ARTIC_CACHE_NEGATIVE_SECONDS": 600.0,
+    }.items():
+        monkeypatch.setattr(settings, naziv, vrednost)
+    # Svaki test počinje sa praznim kešom i zatvorenim prekidačem
+    monkeypatch.setattr(artic_cache, "_memorija", type(artic_cache._memorija)())
+    monkeypatch.setattr(artic_cache, "_statistika", dict.fromkeys(artic_cache._statistika, 0))
+    monkeypatch.setattr(artic_service, "_prekidac", artic_service.CircuitBreaker(
+        settings.ARTIC_BREAKER_MIN_CALLS, settings.ARTIC_BREAKER_ERROR_RATE,
+        settings.ARTIC_BREAKER_OPEN_SECONDS, settings.ARTIC_BREAKER_WINDOW_SECONDS
+    ))
+    artic_cache.start_artic_cache()
+    artic_service.start_artic_client()
+    try:
+        yield server
+    finally:
+        await artic_service.stop_artic_client()
+        await artic_cache.stop_artic_cache()
+        await server.stop()
+
+
+async def _sacekaj_osvezavanja() -> None:
+    await asyncio.gather(*list(artic_cache._osvezavanja.values()))
+
+
+async def test_pogodak_iz_memorije_i_sa_diska(artic):
+    prvi = await artic_service.fetch_artworks(search="Monet")
+    assert len(prvi["data"]) == 12
+    assert artic.zahteva == 1
+
+    # Isti upit, drugačija velika slova i razmaci - isti ključ, iz memorije
+    pocetak = time.monotonic()
+    assert await artic_service.fetch_artworks(search="  monet ") == prvi
+    assert time.monotonic() - pocetak < KASNJENJE
+    assert artic_cache.artic_cache_stats()["memorija"] == 1
+
+    # Posle restarta memorija je prazna, stavka se čita iz SQLite fajla
+    await artic_cache.stop_artic_cache()
+    artic_cache._memorija.clear()
+    artic_cache.start_artic_cache()
+    assert await artic_service.fetch_artworks(search="Monet") == prvi
+    assert artic_cache.artic_cache_stats()["disk"] == 1
+    # Pročitana stavka je vraćena u memoriju
+    assert await artic_service.fetch_artworks(search="Monet") == prvi
+    assert artic_cache.artic_cache_stats()["memorija"] == 2
+    assert artic.zahteva == 1
+
+
+async def test_zastarelo_se_osvezava_u_pozadini(artic, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIC_CACHE_TTL_SECONDS", 0.3)
+    prvi = await artic_service.fetch_artworks(search="Monet")
+    await asyncio.sleep(0.4)
+
+    # Zastarela kopija se vraća odmah, nova se preuzima u pozadini
+    pocetak = time.monotonic()
+    assert await artic_service.fetch_artworks(search="Monet") == prvi
+    assert time.monotonic() - pocetak < KASNJENJE
+    assert artic_cache.artic_cache_stats()["zastarelo"] == 1
+    # Više zahteva za istu zastarelu stavku - jedno osvežavanje
+    await artic_service.fetch_artworks(search="Monet")
+    await _sacekaj_osvezavanja()
+    assert artic.zahteva == 2
+
+    novi = await artic_service.fetch_artworks(search="Monet")
+    assert novi != prvi
+    assert novi["data"][0]["title"] == "monet 2"
+    assert artic.zahteva == 2
+
+
+async def test_404_se_pamti_kratko(artic, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIC_CACHE_NEGATIVE_SECONDS", 0.3)
+    assert await artic_service.get_artwork_by_id(1234) is None
+    assert await artic_service.get_artwork_by_id(1234) is None
+    assert artic.zahteva == 1
+
+    # Posle isteka negativnog rezultata API se pita ponovo
+    await asyncio.sleep(0.4)
+    assert await artic_service.get_artwork_by_id(1234) is None
+    assert artic.zahteva == 2
+    # Postojeći rad se ne meša sa negativnim rezultatom
+    assert (await artic_service.get_artwork_by_id(5))["id"] == 5
+
+
+async def test_stara_kopija_dok_api_vraca_503(artic, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIC_CACHE_TTL_SECONDS", 0.3)
+    prvi = await artic_service.fetch_artworks(search="Monet")
+    rad = await artic_service.get_artwork_by_id(5)
+    artic.dole = True
+    await asyncio.sleep(0.4)
+
+    # Osvežavanje ne uspeva, stara kopija ostaje i služi se dalje
+    assert await artic_service.fetch_artworks(search="Monet") == prvi
+    await _sacekaj_osvezavanja()
+    assert artic_cache.artic_cache_stats()["greske"] == 1
+    assert await artic_service.fetch_artworks(search="Monet") == prvi
+    # Rad ima duži TTL i još je svež
+    assert await artic_service.get_artwork_by_id(5) == rad
+
+    # Upit koji nije u kešu dobija praznu listu, greška se ne pamti
+    assert await artic_service.fetch_artworks(search="Renoir") == {"data": [], "pagination": {}}
+    assert "artworks:1:12:renoir" not in artic_cache._memorija
+
+
+async def test_otvoren_prekidac_bez_osvezavanja(artic, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIC_CACHE_TTL_SECONDS", 0.3)
+    prvi = await artic_service.fetch_artworks(search="Monet")
+    artic.dole = True
+    for _ in range(settings.ARTIC_BREAKER_MIN_CALLS):
+        await artic_service.get_artwork_by_id(5000)
+    assert artic_service._prekidac.stanje == "otvoren"
+    zahteva = artic.zahteva
+    await asyncio.sleep(0.4)
+
+    # Zastarela kopija se služi, a API se ne pita dok je prekidač otvoren
+    for _ in range(5):
+        assert await artic_service.fetch_artworks(search="Monet") == prvi
+    assert not artic_cache._osvezavanja
+    assert artic.zahteva == zahteva
+    assert artic_cache.artic_cache_stats()["greske"] == 0
+
+
+async def test_prekid_poziva_nije_greska(artic):
+    # Probni poziv posle pauze prekidača
+    artic_service._prekidac._otvoren_do = time.monotonic() - 1
+    assert artic_service._prekidac.stanje == "poluotvoren"
+    zadatak = asyncio.create_task(artic_service.get_artwork_by_id(5))
+    await asyncio.sleep(KASNJENJE / 2)
+
+    # Gašenje klijenta prekida poziv u toku
+    await artic_service.stop_artic_client()
+    with pytest.raises(asyncio.CancelledError):
+        await zadatak
+    assert artic_service._prekidac.stanje == "poluotvoren"
+    assert not artic_service._prekidac._ishodi
+    # Probno mesto je slobodno, sledeći poziv zatvara prekidač
+    assert (await artic_service.get_artwork_by_id(5))["id"] == 5
+    assert artic_service._prekidac.stanje == "zatvoren"
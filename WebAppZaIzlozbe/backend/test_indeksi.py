@@ -0,0 +1,136 @@
+"""
+Provera da upiti javne liste izložbi, /api/prijave/moje i liste slika
+koriste indekse iz migracije 006, bez sortiranja.
+Na generisanom skupu podataka (u transakciji koja se poništava) rute se
+pozivaju kroz aplikaciju, a njihovi upiti se ponavljaju sa EXPLAIN.
+
+Pokretanje:
+    python -m pytest -s test_indeksi.py
+"""
+import json
+import httpx
+import pytest
+from sqlalchemy import event, select, text
+from app.database import get_db, get_read_db
+from app.main import app
+from app.models.korisnik import Korisnik
+from app.utils.dependencies import get_current_user_required
+from app.utils.response_cache import isprazni_odgovore
+
+pytestmark = pytest.mark.anyio
+
+KORISNIKA = 1000
+IZLOZBI = 20000
+PRIJAVA_PO_KORISNIKU = 50
+SLIKA = 50000
+
+
+async def _generisi(db_conn) -> None:
+    await db_conn.execute(text("""
+        INSERT INTO lokacije (naziv, adresa, grad)
+        SELECT 'Lokacija ' || i, 'Adresa ' || i, 'Grad ' || (i % 20)
+        FROM generate_series(1, 50) i
+    """))
+    await db_conn.execute(text("""
+        INSERT INTO izlozbe (slug, naslov, datum_pocetka, datum_zavrsetka, id_lokacija,
+                             kapacitet, rezervisano, aktivan, objavljeno, datum_kreiranja)
+        SELECT 'test-indeksi-' || i, 'Izložba ' || i,
+               DATE '2000-01-01' + (i % 9000), DATE '2000-02-01' + (i % 9000),
+               (SELECT min(id_lokacija) FROM lokacije), 100, 0, true, i % 10 < 7, now()
+        FROM generate_series(1, :n) i
+    """), {"n": IZLOZBI})
+    await db_conn.execute(text("""
+        INSERT INTO korisnici (username, email, lozinka, ime, prezime, aktivan,
+                               super_korisnik, datum_pridruzivanja)
+        SELECT 'test_indeksi_' || i, 'test_indeksi_' || i || '@example.com', 'x', 'Ime', 'Prezime',
+               true, false, now()
+        FROM generate_series(1, :n) i
+    """), {"n": KORISNIKA})
+    await db_conn.execute(text("""
+        INSERT INTO prijave (id_korisnik, id_izlozba, broj_karata, validirano,
+                             datum_registracije, verifikovan_email, email_poslat)
+        SELECT k.id_korisnik, i.id_izlozba, 1, false,
+               now() - (i.id_izlozba % 1000) * interval '1 hour', false, false
+        FROM (SELECT id_korisnik, row_number() OVER (ORDER BY id_korisnik) AS r
+              FROM korisnici WHERE username LIKE 'test_indeksi_%') k
+        JOIN (SELECT id_izlozba, row_number() OVER (ORDER BY id_izlozba) AS r
+              FROM izlozbe WHERE slug LIKE 'test-indeksi-%') i
+          ON i.r BETWEEN (k.r - 1) * :po + 1 AND k.r * :po
+    """), {"po": PRIJAVA_PO_KORISNIKU})
+    await db_conn.execute(text("""
+        INSERT INTO slike (slika, istaknuta, naslovna, redosled, datum_otpremanja)
+        SELECT '/static/slike/' || i || '.jpg', i % 20 = 0, false, i % 1000, now()
+        FROM generate_series(1, :n) i
+    """), {"n": SLIKA})
+    for tabela in ("lokacije", "izlozbe", "korisnici", "prijave", "slike"):
+        await db_conn.execute(text(f"ANALYZE {tabela}"))
+
+
+def _cvorovi(plan: dict):
+    yield plan
+    for podplan in plan.get("Plans", []):
+        yield from _cvorovi(podplan)
+
+
+async def _plan_rute(klijent, db_conn, url: str, params: dict = None) -> list:
+    """Poziva rutu i vraća čvorove plana njenog prvog upita"""
+    upiti = []
+
+    def hvataj(conn, cursor, statement, parameters, context, executemany):
+        upiti.append((statement, parameters))
+
+    isprazni_odgovore()
+    event.listen(db_conn.sync_connection, "before_cursor_execute", hvataj)
+    try:
+        odgovor = await klijent.get(url, params=params)
+    finally:
+        event.remove(db_conn.sync_connection, "before_cursor_execute", hvataj)
+    assert odgovor.status_code == 200, odgovor.text
+
+    statement, parameters = upiti[0]
+    rezultat = await db_conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    plan = rezultat.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    cvorovi = list(_cvorovi(plan[0]["Plan"]))
+    print(f"\n{url} {params or ''}: " + " -> ".join(
+        c["Node Type"] + (f" ({c['Index Name']})" if "Index Name" in c else "") for c in cvorovi
+    ))
+    return cvorovi
+
+
+def _proveri(cvorovi: list, indeks: str) -> None:
+    assert indeks in {c.get("Index Name") for c in cvorovi}
+    assert not any(c["Node Type"] in ("Sort", "Incremental Sort") for c in cvorovi)
+    assert not any(c["Node Type"] == "Seq Scan" for c in cvorovi)
+
+
+async def test_upiti_koriste_indekse(db, db_conn):
+    await _generisi(db_conn)
+    korisnik = await db.scalar(
+        select(Korisnik.id_korisnik).where(Korisnik.username == "test_indeksi_1")
+    )
+
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[get_current_user_required] = lambda: Korisnik(id_korisnik=korisnik)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as klijent:
+            # Javna lista: objavljene, najnovije prve (offset i keyset)
+            _proveri(await _plan_rute(klijent, db_conn, "/api/izlozbe/"), "ix_izlozbe_objavljeno_datum")
+            _proveri(
+                await _plan_rute(klijent, db_conn, "/api/izlozbe/", {"cursor": ""}),
+                "ix_izlozbe_objavljeno_datum"
+            )
+            # Prijave korisnika, najnovije prve
+            _proveri(await _plan_rute(klijent, db_conn, "/api/prijave/moje"), "ix_prijave_korisnik_datum")
+            # Slike po redosledu, sve i samo istaknute
+            _proveri(await _plan_rute(klijent, db_conn, "/api/slike/"), "ix_slike_redosled")
+            _proveri(
+                await _plan_rute(klijent, db_conn, "/api/slike/", {"istaknuta": "true"}),
+                "ix_slike_istaknuta_redosled"
+            )
+    finally:
+        for zavisnost in (get_db, get_read_db, get_current_user_required):
+            app.dependency_overrides.pop(zavisnost, None)
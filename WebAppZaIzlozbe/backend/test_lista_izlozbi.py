@@ -0,0 +1,133 @@
+"""
+Broj upita i trajanje liste izložbi (GET /api/izlozbe/) u zavisnosti od broja
+slika po izložbi. Strana mora da košta isti broj upita i sa 5 i sa 500 slika
+po izložbi - bez N+1 i bez množenja redova join-om.
+
+Pokretanje:
+    python -m pytest -s test_lista_izlozbi.py
+"""
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+import httpx
+import pytest
+from sqlalchemy import delete, event, insert, update
+from app.database import get_read_db
+from app.main import app
+from app.routers.izlozbe import SAZETAK_POLJA, _load_sazetke
+from app.models.izlozba import Izlozba
+from app.models.lokacija import Lokacija
+from app.models.slika import Slika
+from app.utils.response_cache import isprazni_odgovore
+
+pytestmark = pytest.mark.anyio
+
+PO_STRANI = 12
+PONAVLJANJA = 10
+SVE_RELACIJE = "lokacija,slika_naslovna,slike"
+
+
+async def _napravi_izlozbe(db) -> list:
+    """Objavljene izložbe sa datumom posle svih postojećih - one su prva strana"""
+    oznaka = uuid.uuid4().hex[:8]
+    lokacija = Lokacija(naziv="Test galerija", adresa="Test 1", grad="Beograd")
+    db.add(lokacija)
+    await db.flush()
+    izlozbe = [
+        Izlozba(
+            slug=f"test-lista-{oznaka}-{i}", naslov=f"Test izložba {i}", kratak_opis="Kratak opis",
+            datum_pocetka=date(2999, 1, 1) + timedelta(days=i), datum_zavrsetka=date(2999, 12, 31),
+            id_lokacija=lokacija.id_lokacija, kapacitet=100, aktivan=True, objavljeno=True
+        )
+        for i in range(PO_STRANI)
+    ]
+    db.add_all(izlozbe)
+    await db.flush()
+    return [izlozba.id_izlozba for izlozba in izlozbe]
+
+
+async def _dodaj_slike(db, ids: list, od: int, do: int) -> None:
+    nove = await db.execute(insert(Slika).returning(Slika.id_slika, Slika.id_izlozba, Slika.naslovna), [
+        {"id_izlozba": izlozba_id, "slika": f"/static/slike/{izlozba_id}_{j}.jpg",
+         "thumbnail": f"/static/slike/{izlozba_id}_{j}_t.jpg", "naslov": f"Slika {j}",
+         "istaknuta": False, "naslovna": j == 0, "redosled": j}
+        for izlozba_id in ids
+        for j in range(od, do)
+    ])
+    for slika in nove:
+        if slika.naslovna:
+            await db.execute(
+                update(Izlozba).where(Izlozba.id_izlozba == slika.id_izlozba).values(id_slika=slika.id_slika)
+            )
+
+
+async def _izmeri(klijent, db_conn, ids: list, parametri: dict) -> tuple:
+    """Vraća (broj upita po zahtevu, medijanu trajanja u ms, telo odgovora)"""
+    upiti = []
+
+    def brojac(conn, cursor, statement, parameters, context, executemany):
+        upiti.append(statement)
+
+    event.listen(db_conn.sync_connection, "before_cursor_execute", brojac)
+    try:
+        trajanja = []
+        for _ in range(PONAVLJANJA):
+            isprazni_odgovore()
+            upiti.clear()
+            pocetak = time.perf_counter()
+            odgovor = await klijent.get("/api/izlozbe/", params={"per_page": PO_STRANI, **parametri})
+            trajanja.append((time.perf_counter() - pocetak) * 1000)
+            assert odgovor.status_code == 200
+    finally:
+        event.remove(db_conn.sync_connection, "before_cursor_execute", brojac)
+
+    telo = odgovor.json()
+    assert sorted(item["id_izlozba"] for item in telo["items"]) == sorted(ids)
+    return len(upiti), statistics.median(trajanja), telo
+
+
+async def test_cena_strane_ne_zavisi_od_broja_slika(db, db_conn):
+    ids = await _napravi_izlozbe(db)
+    app.dependency_overrides[get_read_db] = lambda: db
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as klijent:
+            rezultati = {}
+            for od, do in ((0, 5), (5, 500)):
+                await _dodaj_slike(db, ids, od, do)
+                rezultati[do] = (
+                    await _izmeri(klijent, db_conn, ids, {}),
+                    await _izmeri(klijent, db_conn, ids, {"include": SVE_RELACIJE}),
+                )
+    finally:
+        app.dependency_overrides.pop(get_read_db, None)
+
+    for do, (kartice, sve) in rezultati.items():
+        print(
+            f"\n{do:>3} slika po izložbi: kartice {kartice[0]} upita, {kartice[1]:.1f} ms; "
+            f"sa relacijama {sve[0]} upita, {sve[1]:.1f} ms"
+        )
+        assert len(sve[2]["items"][0]["slike"]) == do
+
+    (kartice_5, sve_5), (kartice_500, sve_500) = rezultati[5], rezultati[500]
+    # Id strana + skalarna polja; svaka relacija dodaje tačno jedan batch upit
+    assert kartice_5[0] == kartice_500[0] == 2
+    assert sve_5[0] == sve_500[0] == 2 + len(SVE_RELACIJE.split(","))
+    # Kartice ne čitaju slike, pa ni trajanje ne raste sa njihovim brojem
+    assert kartice_500[1] < 2 * kartice_5[1] + 5
+
+
+async def test_obrisana_izlozba_se_izostavlja(db):
+    # Izložba obrisana između upita za id-jeve strane i upita za redove
+    ids = await _napravi_izlozbe(db)
+    await _dodaj_slike(db, ids, 0, 2)
+    obrisana = ids[3]
+    await db.execute(update(Izlozba).where(Izlozba.id_izlozba == obrisana).values(id_slika=None))
+    await db.execute(delete(Slika).where(Slika.id_izlozba == obrisana))
+    await db.execute(delete(Izlozba).where(Izlozba.id_izlozba == obrisana))
+
+    items = await _load_sazetke(db, ids, list(SAZETAK_POLJA), SVE_RELACIJE.split(","))
+    assert [item["id_izlozba"] for item in items] == [i for i in ids if i != obrisana]
+    assert all(item["lokacija"] is not None and len(item["slike"]) == 2 for item in items)
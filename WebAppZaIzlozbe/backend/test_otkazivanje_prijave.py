@@ -0,0 +1,105 @@
+"""
+Istovremeno otkazivanje iste prijave vraća njena mesta samo jednom.
+Podaci se upisuju (commit), jer zahtevi idu kroz zasebne konekcije, i
+brišu se na kraju testa.
+
+Pokretanje:
+    python -m pytest -s test_otkazivanje_prijave.py
+"""
+import asyncio
+import uuid
+from datetime import date
+import httpx
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.config import settings
+from app.database import get_db, to_async_url
+from app.main import app
+from app.models.izlozba import Izlozba
+from app.models.korisnik import Korisnik
+from app.models.lokacija import Lokacija
+from app.models.prijava import Prijava
+from app.utils.dependencies import get_current_user_required
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def sesije():
+    engine = create_async_engine(to_async_url(settings.DATABASE_URL), poolclass=NullPool)
+    try:
+        async with engine.connect():
+            pass
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Baza nije dostupna: {e}")
+    try:
+        yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+async def test_dvostruko_otkazivanje_vraca_mesta_jednom(sesije):
+    oznaka = uuid.uuid4().hex[:8]
+    async with sesije() as db:
+        lokacija = Lokacija(naziv="Test galerija", adresa="Test 1", grad="Beograd")
+        korisnik = Korisnik(
+            username=f"test_otkaz_{oznaka}", email=f"test_otkaz_{oznaka}@example.com",
+            lozinka="x", ime="Ime", prezime="Prezime"
+        )
+        db.add_all([lokacija, korisnik])
+        await db.flush()
+        # 3 mesta drži ova prijava, 2 neka druga
+        izlozba = Izlozba(
+            slug=f"test-otkaz-{oznaka}", naslov="Test izložba",
+            datum_pocetka=date(2999, 1, 1), datum_zavrsetka=date(2999, 12, 31),
+            id_lokacija=lokacija.id_lokacija, kapacitet=10, rezervisano=5,
+            aktivan=True, objavljeno=True
+        )
+        db.add(izlozba)
+        await db.flush()
+        prijava = Prijava(id_korisnik=korisnik.id_korisnik, id_izlozba=izlozba.id_izlozba, broj_karata=3)
+        db.add(prijava)
+        await db.commit()
+
+    async def nova_sesija():
+        async with sesije() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = nova_sesija
+    app.dependency_overrides[get_current_user_required] = lambda: Korisnik(
+        id_korisnik=korisnik.id_korisnik, super_korisnik=False
+    )
+    try:
+        async with sesije() as blokada, httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as klijent:
+            # Dok je red izložbe zaključan, oba zahteva stignu do vraćanja mesta
+            await blokada.execute(
+                select(Izlozba.id_izlozba).where(Izlozba.id_izlozba == izlozba.id_izlozba).with_for_update()
+            )
+            zahtevi = [
+                asyncio.create_task(klijent.delete(f"/api/prijave/{prijava.id_prijava}"))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0.5)
+            await blokada.rollback()
+            odgovori = await asyncio.gather(*zahtevi)
+
+        assert sorted(odgovor.status_code for odgovor in odgovori) == [204, 404]
+        async with sesije() as db:
+            assert await db.scalar(
+                select(Izlozba.rezervisano).where(Izlozba.id_izlozba == izlozba.id_izlozba)
+            ) == 2
+            assert await db.get(Prijava, prijava.id_prijava) is None
+    finally:
+        for zavisnost in (get_db, get_current_user_required):
+            app.dependency_overrides.pop(zavisnost, None)
+        async with sesije() as db:
+            await db.execute(delete(Prijava).where(Prijava.id_izlozba == izlozba.id_izlozba))
+            await db.execute(delete(Izlozba).where(Izlozba.id_izlozba == izlozba.id_izlozba))
+            await db.execute(delete(Lokacija).where(Lokacija.id_lokacija == lokacija.id_lokacija))
+            await db.execute(delete(Korisnik).where(Korisnik.id_korisnik == korisnik.id_korisnik))
+            await db.commit()
@@ -0,0 +1,91 @@
+"""
+Keš javnih odgovora uz repliku za čitanje: odgovor pročitan sa replike
+ubrzo posle upisa se ne čuva (replika možda još nema upis), a odgovor
+sa primarne baze se čuva odmah.
+
+Pokretanje:
+    python -m pytest -s test_response_cache.py
+"""
+import asyncio
+from contextlib import asynccontextmanager
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from app import database
+from app.config import settings
+from app.database import PRIMARY_PIN_COOKIE, get_read_db
+from app.utils import response_cache
+from app.utils.response_cache import LOKACIJE, ResponseCacheMiddleware, invalidiraj_odgovore
+
+pytestmark = pytest.mark.anyio
+
+
+class LaznaBaza:
+    """Lažna sesija - broji čitanja i vraća naziv baze"""
+
+    def __init__(self, izvor: str):
+        self.izvor = izvor
+        self.citanja = 0
+
+
+@pytest.fixture
+def klijent(monkeypatch):
+    primarna, replika = LaznaBaza("primarna"), LaznaBaza("replika")
+
+    def fabrika(baza):
+        @asynccontextmanager
+        async def sesija():
+            yield baza
+        return sesija
+
+    monkeypatch.setattr(database, "read_engine", object())
+    monkeypatch.setattr(database, "AsyncSessionLocal", fabrika(primarna))
+    monkeypatch.setattr(database, "ReadSessionLocal", fabrika(replika))
+    monkeypatch.setattr(settings, "READ_REPLICA_PIN_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SIZE", 16)
+    monkeypatch.setattr(response_cache, "_izmenjeno", dict.fromkeys(response_cache._verzije, 0.0))
+    response_cache.isprazni_odgovore()
+
+    app = FastAPI()
+
+    @app.get("/api/lokacije/")
+    async def lokacije(db=Depends(get_read_db)):
+        db.citanja += 1
+        return {"izvor": db.izvor}
+
+    app.add_middleware(ResponseCacheMiddleware)
+    yield httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test"), primarna, replika
+    response_cache.isprazni_odgovore()
+
+
+async def test_replika_posle_upisa_se_ne_cuva(klijent):
+    http, primarna, replika = klijent
+    async with http:
+        # Bez skorašnjeg upisa odgovor sa replike se čuva
+        assert (await http.get("/api/lokacije/")).json() == {"izvor": "replika"}
+        await http.get("/api/lokacije/")
+        assert replika.citanja == 1
+
+        # Posle upisa replika se čita, ali odgovor se ne čuva ni na serveru ni u pregledaču
+        invalidiraj_odgovore(LOKACIJE)
+        for _ in range(2):
+            odgovor = await http.get("/api/lokacije/")
+            assert odgovor.headers["cache-control"] == "no-cache"
+        assert replika.citanja == 3
+
+        # Klijent vezan za primarnu bazu puni keš i u tom periodu
+        http.cookies.set(PRIMARY_PIN_COOKIE, "1")
+        assert (await http.get("/api/lokacije/")).json() == {"izvor": "primarna"}
+        http.cookies.clear()
+        odgovor = await http.get("/api/lokacije/")
+        assert odgovor.json() == {"izvor": "primarna"}
+        assert odgovor.headers["cache-control"].startswith("public")
+        assert replika.citanja == 3
+
+        # Kada period prođe, odgovor sa replike se opet čuva
+        invalidiraj_odgovore(LOKACIJE)
+        await asyncio.sleep(0.35)
+        await http.get("/api/lokacije/")
+        await http.get("/api/lokacije/")
+        assert replika.citanja == 4
+        assert primarna.citanja == 1
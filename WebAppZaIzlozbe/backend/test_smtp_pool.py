@@ -0,0 +1,151 @@
+"""
+Testovi SMTP pool-a nad lokalnim SMTP serverom (zamena za smtpd/aiosmtpd
+debugging server): ponovna upotreba konekcija, ograničenje tempa slanja
+i jedan ponovni pokušaj kada server prekine konekciju.
+
+Pokretanje:
+    python -m pytest -s test_smtp_pool.py
+"""
+import asyncio
+import time
+from email.message import EmailMessage
+import pytest
+from app.config import settings
+from app.services.smtp_pool import RateLimiter, SMTPPool
+
+pytestmark = pytest.mark.anyio
+
+
+class LokalniSMTP:
+    """
+    Minimalan SMTP server koji prima poruke i broji konekcije.
+    `prekini` - koliko sledećih MAIL komandi dobija prekid konekcije
+    umesto odgovora (kao server koji je zatvorio neaktivnu vezu).
+    """
+
+    def __init__(self):
+        self.konekcija = 0
+        self.poruke = []
+        self.prekini = 0
+        self._server = None
+        self.port = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._obradi, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _obradi(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.konekcija += 1
+
+        async def odgovori(*linije: str) -> None:
+            writer.write("".join(linija + "\r\n" for linija in linije).encode())
+            await writer.drain()
+
+        try:
+            await odgovori("220 lokalni ESMTP")
+            while linija := await reader.readline():
+                komanda = linija.decode(errors="replace").strip().upper()
+                if komanda.startswith(("EHLO", "HELO")):
+                    await odgovori("250-lokalni", "250 8BITMIME")
+                elif komanda.startswith("MAIL") and self.prekini:
+                    self.prekini -= 1
+                    break
+                elif komanda == "DATA":
+                    await odgovori("354 kraj sa <CR><LF>.<CR><LF>")
+                    telo = []
+                    while (red := await reader.readline()) not in (b".\r\n", b""):
+                        telo.append(red)
+                    self.poruke.append(b"".join(telo))
+                    await odgovori("250 primljeno")
+                elif komanda == "QUIT":
+                    await odgovori("221 dovidjenja")
+                    break
+                else:
+                    await odgovori("250 OK")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def smtp_server(monkeypatch):
+    server = LokalniSMTP()
+    await server.start()
+    for naziv, vrednost in {
+        "SMTP_HOST": "127.0.0.1", "SMTP_PORT": server.port, "SMTP_STARTTLS": False,
+        "SMTP_SSL": False, "SMTP_USER": "", "SMTP_PASSWORD": "", "SMTP_TIMEOUT": 5.0,
+    }.items():
+        monkeypatch.setattr(settings, naziv, vrednost)
+    yield server
+    await server.stop()
+
+
+def _poruka(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "noreply@galerija.com"
+    msg["To"] = f"posetilac{i}@example.com"
+    msg["Subject"] = f"Poruka {i}"
+    msg.set_content("Test")
+    return msg
+
+
+async def test_pool_koristi_iste_konekcije(smtp_server):
+    pool = SMTPPool(size=2, rate=0)
+    try:
+        greske = await pool.send_many([_poruka(i) for i in range(50)])
+        greske += await pool.send_many([_poruka(i) for i in range(50, 60)])
+    finally:
+        await pool.close()
+    assert greske == [None] * 60
+    assert len(smtp_server.poruke) == 60
+    # Najviše jedna konekcija po mestu u pool-u, i za drugu seriju
+    assert smtp_server.konekcija == 2
+
+
+async def test_rate_limiter_token_bucket():
+    limiter = RateLimiter(rate=50, burst=5)
+    pocetak = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+    # Nalet do veličine kante prolazi odmah
+    assert time.monotonic() - pocetak < 0.05
+    for _ in range(25):
+        await limiter.acquire()
+    # Ostalih 25 po 50 u sekundi
+    assert 0.45 <= time.monotonic() - pocetak < 1.0
+
+
+async def test_pool_postuje_tempo(smtp_server):
+    pool = SMTPPool(size=3, rate=40)
+    try:
+        pocetak = time.monotonic()
+        greske = await pool.send_many([_poruka(i) for i in range(60)])
+        trajanje = time.monotonic() - pocetak
+    finally:
+        await pool.close()
+    assert greske == [None] * 60
+    # Početni nalet od 40, ostalih 20 po 40 u sekundi
+    assert 0.45 <= trajanje < 1.5
+
+
+async def test_ponovni_pokusaj_posle_prekida(smtp_server):
+    pool = SMTPPool(size=1, rate=0)
+    try:
+        assert await pool.send_many([_poruka(0)]) == [None]
+        # Server prekida postojeću konekciju - poruka ide jednom ponovo, na novoj
+        smtp_server.prekini = 1
+        assert await pool.send_many([_poruka(1)]) == [None]
+        assert smtp_server.konekcija == 2
+        # Dva prekida zaredom - greška ide pozivaocu, mesto u pool-u se oslobađa
+        smtp_server.prekini = 2
+        greske = await pool.send_many([_poruka(2)])
+        assert greske[0] is not None
+        assert await pool.send_many([_poruka(3)]) == [None]
+    finally:
+        await pool.close()
+    assert len(smtp_server.poruke) == 3
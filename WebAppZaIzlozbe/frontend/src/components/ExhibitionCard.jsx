@@ -24,9 +24,8 @@ export default function ExhibitionCard({ exhibition }) {
     };
 
     const status = getStatus();
-    const thumbnail = (exhibition.thumbnail && exhibition.thumbnail.trim() !== '')
-        ? exhibition.thumbnail
-        : (exhibition.slika_naslovna?.thumbnail || 'https://images.unsplash.com/photo-1579783902614-a3fb3927b6a5?q=80&w=400&auto=format&fit=crop');
+    // Server već vraća thumbnail naslovne slike ako izložba nema svoj
+    const thumbnail = exhibition.thumbnail || exhibition.slika_naslovna?.thumbnail || 'https://images.unsplash.com/photo-1579783902614-a3fb3927b6a5?q=80&w=400&auto=format&fit=crop';
 
     const FALLBACK_THUMBNAIL = 'https://images.unsplash.com/photo-1579783902614-a3fb3927b6a5?q=80&w=400&auto=format&fit=crop';
     return (
@@ -92,11 +91,11 @@ export default function ExhibitionCard({ exhibition }) {
                     </div>
 
 
-                    {exhibition.lokacija && (
+                    {exhibition.naziv_lokacije && (
                         <div className="flex items-center">
                             <FiMapPin className="w-4 h-4 mr-2 text-accent-gold" />
                             <span className="truncate">
-                                {exhibition.lokacija.naziv}, {exhibition.lokacija.grad}
+                                {exhibition.naziv_lokacije}, {exhibition.grad}
                             </span>
                         </div>
                     )}
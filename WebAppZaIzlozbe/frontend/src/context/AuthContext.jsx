@@ -18,6 +18,7 @@ export function AuthProvider({ children }) {
                 } catch (err) {
                     console.error('Token nije validan:', err);
                     localStorage.removeItem('token');
+                    localStorage.removeItem('refresh_token');
                     localStorage.removeItem('user');
                 }
             }
@@ -32,6 +33,7 @@ export function AuthProvider({ children }) {
             setError(null);
             const data = await authAPI.login(username, password);
             localStorage.setItem('token', data.access_token);
+            localStorage.setItem('refresh_token', data.refresh_token);
 
             const userData = await authAPI.getMe();
             setUser(userData);
@@ -65,6 +67,7 @@ export function AuthProvider({ children }) {
             console.error('Greška pri odjavi:', err);
         } finally {
             localStorage.removeItem('token');
+            localStorage.removeItem('refresh_token');
             localStorage.removeItem('user');
             setUser(null);
         }
@@ -11,6 +11,9 @@ import Modal from '../components/ui/Modal';
 import InputField from '../components/ui/InputField';
 import { slugify } from '../utils/helpers';
 
+// Polja za tabelu i formu za izmenu (lista podrazumevano vraća samo sažetak)
+const ADMIN_POLJA_IZLOZBE = 'slug,naslov,opis,datum_pocetka,datum_zavrsetka,thumbnail,osmislio,aktivan,objavljeno,kapacitet,id_lokacija,naziv_lokacije';
+
 export default function AdminPanel() {
     const navigate = useNavigate();
     const { isAdmin, isAuthenticated } = useAuth();
@@ -49,7 +52,7 @@ export default function AdminPanel() {
             try {
                 setLoading(true);
 
-                const exhibitionsData = await izlozbeAPI.getAll({ per_page: 50 });
+                const exhibitionsData = await izlozbeAPI.getAll({ per_page: 50, fields: ADMIN_POLJA_IZLOZBE });
                 setExhibitions(exhibitionsData.items || []);
 
                 const locationsData = await lokacijeAPI.getAll();
@@ -200,7 +203,7 @@ export default function AdminPanel() {
                 setMessage({ type: 'success', text: 'Izložba uspešno ažurirana' });
             }
 
-            const refreshData = await izlozbeAPI.getAll({ per_page: 50 });
+            const refreshData = await izlozbeAPI.getAll({ per_page: 50, fields: ADMIN_POLJA_IZLOZBE });
             setExhibitions(refreshData.items || []);
             setExhibitionModal({ open: false, mode: 'create', data: null });
         } catch (err) {
@@ -378,7 +381,7 @@ export default function AdminPanel() {
                                             {exhibitions.map((exhibition) => (
                                                 <tr key={exhibition.id_izlozba} className="hover:bg-luxury-gray/50">
                                                     <td className="px-4 py-3 text-white">{exhibition.naslov}</td>
-                                                    <td className="px-4 py-3 text-luxury-silver">{exhibition.lokacija?.naziv || '-'}</td>
+                                                    <td className="px-4 py-3 text-luxury-silver">{exhibition.naziv_lokacije || '-'}</td>
                                                     <td className="px-4 py-3 text-luxury-silver">{formatDate(exhibition.datum_pocetka)}</td>
                                                     <td className="px-4 py-3">
                                                         {exhibition.objavljeno ? (
@@ -54,6 +54,15 @@ export default function ExhibitionDetails() {
         fetchExhibition();
     }, [slug]);
 
+    // Blob URL QR koda se oslobađa kad se zameni novim ili pri napuštanju strane
+    useEffect(() => {
+        return () => {
+            if (qrData) {
+                URL.revokeObjectURL(qrData);
+            }
+        };
+    }, [qrData]);
+
 
     const handleRegisterClick = () => {
         if (!isAuthenticated) {
@@ -73,7 +82,7 @@ export default function ExhibitionDetails() {
                 broj_karata: ticketCount,
             });
 
-            setQrData(response.slika_qr);
+            setQrData(await prijaveAPI.getQrUrl(response.id_prijava));
             setRegisterSuccess(true);
         } catch (err) {
             setRegisterError(err.response?.data?.detail || 'Greška pri prijavi');
@@ -31,7 +31,7 @@ export default function Profile() {
     const [updatingProfile, setUpdatingProfile] = useState(false);
     const [successModal, setSuccessModal] = useState(false);
 
-    const [qrModal, setQrModal] = useState({ open: false, data: null });
+    const [qrModal, setQrModal] = useState({ open: false, data: null, url: null });
 
     useEffect(() => {
         if (!isAuthenticated) {
@@ -74,6 +74,23 @@ export default function Profile() {
     };
 
 
+    const openQr = async (registration) => {
+        try {
+            const url = await prijaveAPI.getQrUrl(registration.id_prijava);
+            setQrModal({ open: true, data: registration, url });
+        } catch (err) {
+            console.error('Greška pri učitavanju QR koda:', err);
+        }
+    };
+
+    const closeQr = () => {
+        if (qrModal.url) {
+            URL.revokeObjectURL(qrModal.url);
+        }
+        setQrModal({ open: false, data: null, url: null });
+    };
+
+
     const formatDate = (dateString) => {
         if (!dateString) return '';
         const date = new Date(dateString);
@@ -234,11 +251,11 @@ export default function Profile() {
 
                                     <div className="flex items-center gap-2">
 
-                                        {registration.slika_qr && (
+                                        {registration.qr_kod && (
                                             <CustomButton
                                                 variant="outline"
                                                 size="sm"
-                                                onClick={() => setQrModal({ open: true, data: registration })}
+                                                onClick={() => openQr(registration)}
                                             >
                                                 <FiDownload className="w-4 h-4 mr-1" />
                                                 QR Kod
@@ -293,14 +310,14 @@ export default function Profile() {
 
             <Modal
                 isOpen={qrModal.open}
-                onClose={() => setQrModal({ open: false, data: null })}
+                onClose={closeQr}
                 title="QR kod za ulaz"
                 size="sm"
             >
                 {qrModal.data && (
                     <div className="text-center">
                         <img
-                            src={qrModal.data.slika_qr}
+                            src={qrModal.url}
                             alt="QR kod"
                             className="w-48 h-48 mx-auto mb-4 border border-luxury-gray"
                         />
@@ -20,11 +20,47 @@ api.interceptors.request.use(
     }
 );
 
+let refreshPromise = null;
+
+const refreshTokens = async () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!refreshToken) {
+        throw new Error('Nema refresh tokena');
+    }
+    const response = await axios.post(`${API_BASE_URL}/auth/refresh`, {
+        refresh_token: refreshToken,
+    });
+    localStorage.setItem('token', response.data.access_token);
+    localStorage.setItem('refresh_token', response.data.refresh_token);
+    return response.data.access_token;
+};
+
 api.interceptors.response.use(
     (response) => response,
-    (error) => {
+    async (error) => {
+        const original = error.config;
+        const isAuthRequest = ['/auth/login', '/auth/refresh'].includes(original?.url);
+
+        if (error.response?.status === 401 && original && !original._retry && !isAuthRequest) {
+            original._retry = true;
+            try {
+                // Istovremeni zahtevi sa isteklim tokenom čekaju isto osvežavanje
+                if (!refreshPromise) {
+                    refreshPromise = refreshTokens().finally(() => {
+                        refreshPromise = null;
+                    });
+                }
+                const token = await refreshPromise;
+                original.headers.Authorization = `Bearer ${token}`;
+                return api(original);
+            } catch {
+                // Refresh token je istekao ili opozvan - odjava ispod
+            }
+        }
+
         if (error.response?.status === 401) {
             localStorage.removeItem('token');
+            localStorage.removeItem('refresh_token');
             localStorage.removeItem('user');
             window.location.href = '/login';
         }
@@ -50,7 +86,11 @@ export const authAPI = {
     },
 
     logout: async () => {
-        const response = await api.post('/auth/logout');
+        const refreshToken = localStorage.getItem('refresh_token');
+        const response = await api.post(
+            '/auth/logout',
+            refreshToken ? { refresh_token: refreshToken } : undefined
+        );
         return response.data;
     },
 
@@ -177,11 +217,21 @@ export const prijaveAPI = {
         return response.data;
     },
 
+    getQrUrl: async (id) => {
+        const response = await api.get(`/prijave/${id}/qr.png`, { responseType: 'blob' });
+        return URL.createObjectURL(response.data);
+    },
+
     validate: async (qrKod) => {
         const response = await api.post('/prijave/validate', { qr_kod: qrKod });
         return response.data;
     },
 
+    validateBatch: async (qrKodovi) => {
+        const response = await api.post('/prijave/validate/batch', { qr_kodovi: qrKodovi });
+        return response.data;
+    },
+
     delete: async (id) => {
         const response = await api.delete(`/prijave/${id}`);
         return response.data;